@@ -6,11 +6,18 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from ..users.models import Patient
+from .routers import ServiceRouter
 from .swagger_schemas import (
     create_feedback_decorator, my_feedbacks_decorator, 
-    feedback_status_decorator, test_feedback_decorator
+    feedback_status_decorator, test_feedback_decorator, bulk_feedback_decorator,
+    batch_feedback_status_decorator
 )
 import httpx
 import json
@@ -19,6 +26,30 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _conditional_headers(request) -> dict:
+    """En-tête If-None-Match du client, transmis tel quel au feedback-service"""
+    if_none_match = request.headers.get('If-None-Match')
+    return {'If-None-Match': if_none_match} if if_none_match else {}
+
+
+def _conditional_response(response, payload=None) -> Response:
+    """
+    Réponse du feedback-service renvoyée au client avec ETag / Cache-Control
+
+    Args:
+        response: Réponse httpx du service
+        payload: Corps à renvoyer (par défaut le JSON du service), ignoré pour un 304
+    """
+    if response.status_code == 304:
+        proxied = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        proxied = Response(response.json() if payload is None else payload, status=response.status_code)
+    for header in ('ETag', 'Cache-Control'):
+        if header in response.headers:
+            proxied[header] = response.headers[header]
+    return proxied
+
+
 @create_feedback_decorator
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -104,6 +135,69 @@ def create_feedback(request):
         )
 
 
+
+@bulk_feedback_decorator
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_feedbacks(request):
+    """
+    Envoi groupé de feedbacks (tableau JSON ou NDJSON) depuis les bornes hors ligne
+    Route: POST /api/v1/patient/feedback/bulk/
+    """
+    headers = {
+        'Content-Type': request.content_type or 'application/json',
+        'X-User-Type': request.user.user_type,
+        'X-Request-ID': request.headers.get('X-Request-ID', ''),
+        'Authorization': request.headers.get('Authorization', '')
+    }
+
+    if request.user.user_type == 'patient':
+        try:
+            patient = Patient.objects.get(user=request.user)
+        except Patient.DoesNotExist:
+            return Response(
+                {'error': 'Profil patient introuvable'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        # Le feedback-service force ce patient_id sur chaque élément
+        headers['X-User-ID'] = str(patient.patient_id)
+    elif request.user.user_type not in ('professional', 'admin'):
+        return Response(
+            {'error': 'Accès réservé aux patients et aux professionnels'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
+        if not service_url:
+            return Response(
+                {'error': 'Service feedback temporairement indisponible'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        # Corps transmis tel quel : le feedback-service parse le JSON ou le NDJSON
+        with httpx.Client(timeout=60.0) as client:
+            response = client.post(
+                f"{service_url}/api/v1/feedbacks/bulk/",
+                headers=headers,
+                content=request.body
+            )
+
+        return Response(response.json(), status=response.status_code)
+
+    except httpx.TimeoutException:
+        logger.error("Timeout lors de l'envoi groupé de feedbacks")
+        return Response(
+            {'error': 'Délai d\'attente dépassé, veuillez réessayer'},
+            status=status.HTTP_504_GATEWAY_TIMEOUT
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de l'envoi groupé de feedbacks: {str(e)}")
+        return Response(
+            {'error': 'Erreur interne, veuillez réessayer plus tard'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 @my_feedbacks_decorator
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -123,7 +217,8 @@ def my_feedbacks(request):
     headers = {
         'X-User-ID': str(patient.patient_id),
         'X-User-Type': 'patient',
-        'Authorization': request.headers.get('Authorization', '')
+        'Authorization': request.headers.get('Authorization', ''),
+        **_conditional_headers(request)
     }
     
     try:
@@ -133,10 +228,16 @@ def my_feedbacks(request):
             response = client.get(
                 f"{service_url}/api/v1/feedbacks/my_feedbacks/",  # URL corrigée
                 headers=headers,
-                params=request.query_params.dict()
+                # Paramètres transmis tels quels, valeurs répétées comprises (?fields=a&fields=b)
+                params=dict(request.query_params.lists())
             )
         
-        return Response(response.json(), status=response.status_code)
+        if response.status_code == 304:
+            return _conditional_response(response)
+        # Les curseurs (cursor, page_size) sont opaques : seuls les liens sont réécrits vers la gateway
+        return _conditional_response(
+            response, ServiceRouter.rewrite_pagination_links(response.json(), request)
+        )
             
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des feedbacks: {str(e)}")
@@ -146,6 +247,55 @@ def my_feedbacks(request):
         )
 
 
+@batch_feedback_status_decorator
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_feedback_status(request):
+    """
+    Statut de traitement de plusieurs feedbacks en une requête
+    Route: POST /api/v1/patient/feedback/status/
+    """
+    headers = {
+        'X-User-Type': request.user.user_type,
+        'Authorization': request.headers.get('Authorization', '')
+    }
+
+    if request.user.user_type == 'patient':
+        try:
+            patient = Patient.objects.get(user=request.user)
+        except Patient.DoesNotExist:
+            return Response(
+                {'error': 'Profil patient introuvable'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        # Vérifié une fois pour toute la liste : le feedback-service ne renvoie que ses feedbacks
+        headers['X-User-ID'] = str(patient.patient_id)
+    elif request.user.user_type not in ('professional', 'admin'):
+        return Response(
+            {'error': 'Accès réservé aux patients et aux professionnels'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
+
+        with httpx.Client(timeout=30.0) as client:
+            response = client.post(
+                f"{service_url}/api/v1/feedbacks/processing_status/",
+                headers=headers,
+                json=request.data
+            )
+
+        return Response(response.json(), status=response.status_code)
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la vérification des statuts: {str(e)}")
+        return Response(
+            {'error': 'Erreur lors de la vérification des statuts'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @feedback_status_decorator
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -165,7 +315,8 @@ def feedback_status(request, feedback_id):
     headers = {
         'X-User-ID': str(patient.patient_id),
         'X-User-Type': 'patient',
-        'Authorization': request.headers.get('Authorization', '')
+        'Authorization': request.headers.get('Authorization', ''),
+        **_conditional_headers(request)
     }
     
     try:
@@ -177,7 +328,8 @@ def feedback_status(request, feedback_id):
                 headers=headers
             )
         
-        return Response(response.json(), status=response.status_code)
+        # 304 tant que le traitement n'a pas avancé (If-None-Match avec l'ETag reçu)
+        return _conditional_response(response)
             
     except Exception as e:
         logger.error(f"Erreur lors de la vérification du statut: {str(e)}")
@@ -239,7 +391,9 @@ def test_feedback(request):
                     'test_info': {
                         'description': 'Ce feedback sera automatiquement analysé en arrière-plan',
                         'check_status_url': f'/api/v1/patient/feedback/{feedback_data["feedback_id"]}/status/',
-                        'wait_time': 'Attendez 10-30 secondes puis vérifiez le statut'
+                        'wait_time': 'Attendez 10-30 secondes puis vérifiez le statut',
+                        'polling': "Renvoyez l'ETag reçu dans If-None-Match : 304 sans corps tant que rien n'a changé",
+                        'events_url': f'/api/v1/patient/feedback/events/?feedback_ids={feedback_data["feedback_id"]}'
                     }
                 }, 
                 status=status.HTTP_201_CREATED
@@ -252,4 +406,83 @@ def test_feedback(request):
         return Response(
             {'error': 'Erreur lors de la création du feedback de test'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+async def _relay_event_stream(client, response):
+    """Relaie le flux SSE du feedback-service au fil de l'eau, puis libère la connexion"""
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+        await client.aclose()
+
+
+@require_GET
+async def feedback_events(request):
+    """
+    Flux SSE des fins de traitement des feedbacks du patient connecté
+    Route: GET /api/v1/patient/feedback/events/?feedback_ids=a,b
+
+    Vue async (ASGI) : la connexion ouverte n'occupe pas de worker. Le JWT et le patient
+    sont vérifiés une seule fois, à l'ouverture du flux.
+    """
+    try:
+        authenticated = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({'error': str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if authenticated is None:
+        return JsonResponse({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        patient = await Patient.objects.aget(user=authenticated[0])
+    except Patient.DoesNotExist:
+        return JsonResponse(
+            {'error': 'Accès réservé aux patients uniquement'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    headers = {
+        'X-User-ID': str(patient.patient_id),
+        'X-User-Type': 'patient',
+        'Accept': 'text/event-stream',
+    }
+    # Reconnexion automatique du navigateur : rattrapage des événements manqués
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        headers['Last-Event-ID'] = last_event_id
+
+    service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
+    # Pas de délai de lecture : le service envoie un keep-alive régulier et ferme le flux lui-même
+    client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None))
+    try:
+        response = await client.send(
+            client.build_request(
+                'GET', f"{service_url}/api/v1/feedbacks/events/", headers=headers, params=dict(request.GET.items())
+            ),
+            stream=True
+        )
+    except Exception as e:
+        await client.aclose()
+        logger.error(f"Erreur lors de l'ouverture du flux d'événements: {str(e)}")
+        return JsonResponse(
+            {'error': "Flux d'événements indisponible"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    if not response.headers.get('content-type', '').startswith('text/event-stream'):
+        # Requête refusée par le service (400/403) : erreur renvoyée telle quelle
+        try:
+            await response.aread()
+            return JsonResponse(response.json(), status=response.status_code, safe=False)
+        except ValueError:
+            return JsonResponse({'error': "Flux d'événements indisponible"}, status=response.status_code)
+        finally:
+            await response.aclose()
+            await client.aclose()
+
+    proxied = StreamingHttpResponse(_relay_event_stream(client, response), content_type='text/event-stream')
+    proxied['Cache-Control'] = 'no-cache'
+    proxied['X-Accel-Buffering'] = 'no'
+    return proxied
@@ -2,7 +2,7 @@
 import uuid
 import time
 import json
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from .routers import ServiceRouter
 import asyncio
@@ -57,15 +57,20 @@ class ServiceRoutingMiddleware(MiddlewareMixin):
                 )
             )
 
-            # Construire la réponse Django
-            django_response = JsonResponse(
-                response.json() if response.headers.get('content-type', '').startswith('application/json') else {},
-                status=response.status_code,
-                safe=False
-            )
+            # Construire la réponse Django (liens de pagination ramenés sur la gateway)
+            if response.status_code == 304:
+                # GET conditionnel : aucun corps, le client réutilise sa copie (ETag)
+                django_response = HttpResponse(status=304)
+            else:
+                payload = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                django_response = JsonResponse(
+                    ServiceRouter.rewrite_pagination_links(payload, request),
+                    status=response.status_code,
+                    safe=False
+                )
 
             # Copier certains headers
-            for header in ['content-type', 'cache-control']:
+            for header in ['content-type', 'cache-control', 'etag']:
                 if header in response.headers:
                     django_response[header] = response.headers[header]
 
@@ -1,5 +1,6 @@
 # api-gateway/apps/gateway/routers.py
 from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
 import httpx
 from django.conf import settings
 from django.core.cache import cache
@@ -69,6 +70,22 @@ class ServiceRouter:
                 logger.error(f"Error calling {service_url}{path}: {str(e)}")
                 raise
 
+    @staticmethod
+    def rewrite_pagination_links(payload, request, gateway_path: Optional[str] = None):
+        """
+        Réécrit les liens next/previous d'une réponse paginée (URL interne du service)
+        vers l'URL publique de la gateway ; seul le query string (curseur opaque) est conservé
+        """
+        if not isinstance(payload, dict):
+            return payload
+        base_url = request.build_absolute_uri(gateway_path or request.path)
+        for key in ('next', 'previous'):
+            link = payload.get(key)
+            if link:
+                query = urlsplit(link).query
+                payload[key] = f"{base_url}?{query}" if query else base_url
+        return payload
+
     @staticmethod
     def _clean_headers(headers: Dict) -> Dict:
         """Nettoie les headers pour le forwarding"""
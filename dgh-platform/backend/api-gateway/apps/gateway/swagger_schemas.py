@@ -237,26 +237,58 @@ my_feedbacks_decorator = swagger_auto_schema(
             description="Filtrer par date de fin", 
             type=openapi.TYPE_STRING,
             format=openapi.FORMAT_DATE
+        ),
+        openapi.Parameter(
+            'cursor',
+            openapi.IN_QUERY,
+            description="Curseur opaque de pagination (repris du lien next/previous)",
+            type=openapi.TYPE_STRING
+        ),
+        openapi.Parameter(
+            'page_size',
+            openapi.IN_QUERY,
+            description="Nombre de feedbacks par page (20 par défaut, 100 maximum)",
+            type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter(
+            'fields',
+            openapi.IN_QUERY,
+            description="Champs à renvoyer, séparés par des virgules (ex. feedback_id,rating,sentiment)",
+            type=openapi.TYPE_STRING
+        ),
+        openapi.Parameter(
+            'omit',
+            openapi.IN_QUERY,
+            description="Champs à retirer de la réponse, séparés par des virgules",
+            type=openapi.TYPE_STRING
         )
     ],
     responses={
         200: openapi.Response(
-            description='Liste des feedbacks du patient',
+            description='Page des feedbacks du patient (du plus récent au plus ancien)',
             schema=openapi.Schema(
-                type=openapi.TYPE_ARRAY,
-                items=openapi.Schema(
-                    type=openapi.TYPE_OBJECT,
-                    properties={
-                        'feedback_id': openapi.Schema(type=openapi.TYPE_STRING),
-                        'description': openapi.Schema(type=openapi.TYPE_STRING),
-                        'rating': openapi.Schema(type=openapi.TYPE_INTEGER),
-                        'sentiment': openapi.Schema(type=openapi.TYPE_STRING),
-                        'is_processed': openapi.Schema(type=openapi.TYPE_BOOLEAN),
-                        'created_at': openapi.Schema(type=openapi.TYPE_STRING)
-                    }
-                )
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'next': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_URI, x_nullable=True),
+                    'previous': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_URI, x_nullable=True),
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'feedback_id': openapi.Schema(type=openapi.TYPE_STRING),
+                                'description': openapi.Schema(type=openapi.TYPE_STRING),
+                                'rating': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'sentiment': openapi.Schema(type=openapi.TYPE_STRING),
+                                'is_processed': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                                'created_at': openapi.Schema(type=openapi.TYPE_STRING)
+                            }
+                        )
+                    )
+                }
             )
         ),
+        304: openapi.Response(description="Inchangé depuis l'ETag envoyé dans If-None-Match (corps vide)"),
         403: openapi.Response(description='Accès réservé aux patients')
     },
     tags=['Feedback Patient']
@@ -266,7 +298,10 @@ feedback_status_decorator = swagger_auto_schema(
     methods=['GET'],
     operation_id="get_feedback_status",
     operation_summary="Vérifier le statut d'un feedback", 
-    operation_description="Vérifie le statut de traitement d'un feedback spécifique avec sentiment et thème",
+    operation_description=(
+        "Vérifie le statut de traitement d'un feedback spécifique avec sentiment et thème. "
+        "Renvoyer l'ETag reçu dans If-None-Match : 304 sans corps tant que le traitement n'a pas avancé"
+    ),
     responses={
         200: openapi.Response(
             description='Statut du feedback',
@@ -289,6 +324,7 @@ feedback_status_decorator = swagger_auto_schema(
                 }
             )
         ),
+        304: openapi.Response(description="Inchangé depuis l'ETag envoyé dans If-None-Match (corps vide)"),
         403: openapi.Response(description='Accès réservé aux patients'),
         404: openapi.Response(description='Feedback non trouvé')
     },
@@ -330,4 +366,128 @@ test_feedback_decorator = swagger_auto_schema(
         403: openapi.Response(description='Accès réservé aux patients')
     },
     tags=['Feedback Patient - Test']
-)
\ No newline at end of file
+)
+
+bulk_feedback_decorator = swagger_auto_schema(
+    methods=['POST'],
+    operation_id="create_bulk_feedbacks",
+    operation_summary="Envoi groupé de feedbacks",
+    operation_description="""
+    Envoi groupé des feedbacks collectés hors ligne (bornes) : tableau JSON
+    ou flux NDJSON (Content-Type: application/x-ndjson, un feedback par ligne).
+
+    **Validation :** chaque feedback est validé indépendamment, le résultat est
+    retourné élément par élément (index dans l'envoi, feedback_id ou erreurs).
+
+    **Patients :** le patient_id est forcé sur celui du patient connecté.
+    **Professionnels (bornes) :** chaque feedback porte son propre patient_id.
+
+    **Traitement :** l'analyse des feedbacks créés est lancée en une seule tâche batch.
+    """,
+    request_body=openapi.Schema(
+        type=openapi.TYPE_ARRAY,
+        items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['description', 'rating', 'department_id'],
+            properties={
+                'description': openapi.Schema(type=openapi.TYPE_STRING),
+                'rating': openapi.Schema(type=openapi.TYPE_INTEGER, minimum=1, maximum=5),
+                'language': openapi.Schema(type=openapi.TYPE_STRING, enum=['fr', 'en', 'dua', 'bas', 'ewo']),
+                'input_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['text', 'audio']),
+                'department_id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                'patient_id': openapi.Schema(
+                    type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID,
+                    description='Requis pour les comptes professionnels, ignoré pour les patients'
+                )
+            }
+        )
+    ),
+    responses={
+        201: openapi.Response(description='Tous les feedbacks ont été créés'),
+        207: openapi.Response(
+            description='Création partielle, voir les résultats par élément',
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'received': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'failed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'index': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['created', 'error']),
+                                'feedback_id': openapi.Schema(type=openapi.TYPE_STRING),
+                                'errors': openapi.Schema(type=openapi.TYPE_OBJECT)
+                            }
+                        )
+                    )
+                }
+            )
+        ),
+        400: openapi.Response(description='Aucun feedback valide ou format invalide'),
+        403: openapi.Response(description='Accès réservé aux patients et aux professionnels'),
+        413: openapi.Response(description='Trop de feedbacks dans une seule requête')
+    },
+    tags=['Feedback Patient']
+)
+
+batch_feedback_status_decorator = swagger_auto_schema(
+    methods=['POST'],
+    operation_id="get_feedbacks_status",
+    operation_summary="Statut de plusieurs feedbacks",
+    operation_description="""
+    Statut de traitement de plusieurs feedbacks en une requête (bornes après un envoi groupé),
+    au lieu d'un appel par feedback.
+
+    **Patients :** seuls leurs propres feedbacks sont renvoyés, les autres identifiants
+    apparaissent dans not_found.
+    """,
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['feedback_ids'],
+        properties={
+            'feedback_ids': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID)
+            )
+        }
+    ),
+    responses={
+        200: openapi.Response(
+            description='Statut de chaque feedback trouvé, dans l\'ordre demandé',
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'processed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'pending': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'feedback_id': openapi.Schema(type=openapi.TYPE_STRING),
+                                'is_processed': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                                'processing_stage': openapi.Schema(type=openapi.TYPE_STRING),
+                                'processed_at': openapi.Schema(type=openapi.TYPE_STRING),
+                                'sentiment': openapi.Schema(
+                                    type=openapi.TYPE_STRING, enum=['positive', 'negative', 'neutral']
+                                ),
+                                'theme': openapi.Schema(type=openapi.TYPE_STRING)
+                            }
+                        )
+                    ),
+                    'not_found': openapi.Schema(
+                        type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)
+                    )
+                }
+            )
+        ),
+        400: openapi.Response(description='Liste vide ou identifiants invalides'),
+        403: openapi.Response(description='Accès réservé aux patients et aux professionnels'),
+        413: openapi.Response(description='Trop d\'identifiants dans une seule requête')
+    },
+    tags=['Feedback Patient']
+)
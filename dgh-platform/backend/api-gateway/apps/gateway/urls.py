@@ -1,7 +1,10 @@
 # api-gateway/apps/gateway/urls.py
 from django.urls import path
 from .views import health_check, service_status
-from .feedback_proxy import create_feedback, my_feedbacks, feedback_status, test_feedback
+from .feedback_proxy import (
+    create_feedback, bulk_feedbacks, my_feedbacks, feedback_status, test_feedback, feedback_events,
+    batch_feedback_status
+)
 
 urlpatterns = [
     path('', health_check, name='health-check'),
@@ -9,7 +12,10 @@ urlpatterns = [
     
     # Routes feedback pour patients
     path('api/v1/patient/feedback/', create_feedback, name='create-feedback'),
+    path('api/v1/patient/feedback/bulk/', bulk_feedbacks, name='bulk-feedbacks'),
     path('api/v1/patient/feedbacks/', my_feedbacks, name='my-feedbacks'),
+    path('api/v1/patient/feedback/status/', batch_feedback_status, name='batch-feedback-status'),
     path('api/v1/patient/feedback/<str:feedback_id>/status/', feedback_status, name='feedback-status'),
     path('api/v1/patient/feedback/test/', test_feedback, name='test-feedback'),
+    path('api/v1/patient/feedback/events/', feedback_events, name='feedback-events'),
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@
 Administration Django pour les feedbacks
 """
 from django.contrib import admin
-from .models import Feedback, FeedbackTheme, Department, Appointment, Reminder, Medication, Prescription, PrescriptionMedication
+from .models import Feedback, FeedbackDailyRollup, FeedbackOutbox, FeedbackProcessingMetric, FeedbackTheme, FeedbackThemeEmbedding, Department, Appointment, Reminder, Medication, Prescription, PrescriptionMedication
 
 
 @admin.register(Department)
@@ -21,12 +21,20 @@ class FeedbackThemeAdmin(admin.ModelAdmin):
     readonly_fields = ('theme_id', 'created_at', 'updated_at')
 
 
+@admin.register(FeedbackThemeEmbedding)
+class FeedbackThemeEmbeddingAdmin(admin.ModelAdmin):
+    list_display = ('theme', 'sentiment', 'embedding_model', 'sample_count', 'updated_at')
+    list_filter = ('sentiment', 'embedding_model')
+    search_fields = ('theme__theme_name',)
+    readonly_fields = ('theme', 'sentiment', 'embedding_model', 'centroid', 'sample_count', 'updated_at')
+
+
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
-    list_display = ('feedback_id', 'patient_id', 'department_id', 'rating', 'language', 'is_processed', 'created_at')
-    list_filter = ('rating', 'language', 'input_type', 'is_processed', 'created_at')
+    list_display = ('feedback_id', 'patient_id', 'department_id', 'rating', 'language', 'is_processed', 'analysis_mode', 'processing_time_seconds', 'created_at')
+    list_filter = ('rating', 'language', 'input_type', 'is_processed', 'processing_stage', 'analysis_mode', 'analysis_method', 'created_at')
     search_fields = ('description', 'patient_id', 'department_id')
-    readonly_fields = ('feedback_id', 'created_at', 'processed_at')
+    readonly_fields = ('feedback_id', 'created_at', 'processed_at', 'analysis_mode', 'analysis_method', 'processing_time_seconds', 'processing_stage', 'processing_attempts')
     
     fieldsets = (
         ('Informations principales', {
@@ -36,11 +44,47 @@ class FeedbackAdmin(admin.ModelAdmin):
             'fields': ('rating', 'language', 'input_type', 'created_at')
         }),
         ('Traitement', {
-            'fields': ('theme', 'is_processed', 'processed_at')
+            'fields': ('theme', 'is_processed', 'processed_at', 'analysis_mode', 'analysis_method', 'processing_time_seconds', 'processing_stage', 'processing_attempts')
         })
     )
 
 
+@admin.register(FeedbackOutbox)
+class FeedbackOutboxAdmin(admin.ModelAdmin):
+    list_display = ('outbox_id', 'feedback', 'created_at', 'published_at', 'attempts')
+    list_filter = ('published_at', 'created_at')
+    search_fields = ('feedback__feedback_id',)
+    readonly_fields = ('outbox_id', 'feedback', 'created_at', 'published_at', 'attempts', 'last_error')
+
+
+
+@admin.register(FeedbackProcessingMetric)
+class FeedbackProcessingMetricAdmin(admin.ModelAdmin):
+    list_display = (
+        'feedback', 'created_at', 'analysis_mode', 'analysis_method', 'succeeded', 'queue_wait_ms',
+        'sentiment_ms', 'theme_ms', 'combined_ms', 'theme_upsert_ms', 'save_ms', 'total_ms', 'prompt_tokens', 'completion_tokens'
+    )
+    list_filter = ('analysis_mode', 'analysis_method', 'succeeded', 'created_at')
+    search_fields = ('feedback__feedback_id',)
+    readonly_fields = [field.name for field in FeedbackProcessingMetric._meta.fields]
+    change_list_template = 'admin/feedback/feedbackprocessingmetric/change_list.html'
+    
+    def changelist_view(self, request, extra_context=None):
+        """Ajoute les percentiles p50/p95/p99 des dernières 24 h au-dessus de la liste"""
+        from .metrics import get_stage_percentiles
+        
+        extra_context = extra_context or {}
+        extra_context['stage_percentiles'] = get_stage_percentiles(hours=24)
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(FeedbackDailyRollup)
+class FeedbackDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'department_id', 'language', 'sentiment', 'theme', 'feedback_count', 'rating_sum', 'updated_at')
+    list_filter = ('day', 'language', 'sentiment')
+    search_fields = ('department_id', 'theme__theme_name')
+    readonly_fields = [field.name for field in FeedbackDailyRollup._meta.fields]
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ('appointment_id', 'patient_id', 'department', 'scheduled_date', 'time', 'status')
@@ -0,0 +1,168 @@
+"""
+Cache des résultats d'analyse des feedbacks (sentiment + thème)
+Adressé par contenu : hash du texte normalisé, de la langue et de la version prompt/modèle
+"""
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from django.conf import settings
+from django.core.cache import cache
+from . import combined_analysis, sentimental_analysis, theme_extraction
+from .hf_config import HF_MODEL_ID
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'feedback-analysis'
+INDEX_KEY = f'{CACHE_PREFIX}:index'
+HITS_KEY = f'{CACHE_PREFIX}:hits'
+MISSES_KEY = f'{CACHE_PREFIX}:misses'
+EVICTIONS_KEY = f'{CACHE_PREFIX}:evictions'
+
+# Méthodes dont le résultat ne doit pas être mis en cache (fallbacks locaux)
+UNCACHEABLE_METHODS = {'keyword_fallback', 'default'}
+# Origines de thème déduites du seul texte : un thème tiré de la note (fallback) ne vaut
+# pas pour un autre feedback au même texte
+CACHEABLE_THEME_METHODS = {'local_index', 'groq'}
+# Format des entrées : incrémenté pour écarter les entrées écrites avant un changement de règles
+ENTRY_VERSION = "2"
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_EDGE_PUNCTUATION_RE = re.compile(r'^[\W_]+|[\W_]+$')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte pour que les variantes triviales partagent la même clé
+    ("Très bien !", "très  bien" -> "très bien")
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    return _EDGE_PUNCTUATION_RE.sub('', text)
+
+
+def _analysis_version(mode: str) -> str:
+    """Version des prompts et du modèle utilisés pour un mode d'analyse"""
+    if mode == 'combined':
+        prompt_version = combined_analysis.PROMPT_VERSION
+    else:
+        prompt_version = f"{sentimental_analysis.PROMPT_VERSION}.{theme_extraction.PROMPT_VERSION}"
+    sentiment_model = HF_MODEL_ID if settings.SENTIMENT_BACKEND == 'local' else settings.SENTIMENT_BACKEND
+    return f"{mode}:{sentiment_model}:{sentimental_analysis.GROQ_MODEL}:{prompt_version}"
+
+
+def make_cache_key(text: str, language: str, mode: str) -> str:
+    """Construit la clé de cache d'une analyse"""
+    material = "\x1f".join([normalize_text(text), language or '', _analysis_version(mode), ENTRY_VERSION])
+    digest = hashlib.sha256(material.encode('utf-8')).hexdigest()
+    return f'{CACHE_PREFIX}:{digest}'
+
+
+def _incr(key: str, delta: int = 1):
+    """Incrémente un compteur sans expiration (un seul INCR Redis, qui crée la clé absente)"""
+    redis = get_redis()
+    if redis is not None:
+        # django_redis stocke les entiers en clair : cache.get() relit la valeur
+        redis.incr(cache.make_key(key), delta)
+        return
+    cache.add(key, 0, timeout=None)
+    cache.incr(key, delta)
+
+
+def _enforce_size_limit(key: str):
+    """Indexe la clé et évince les entrées les plus anciennes au-delà de la taille maximale"""
+    redis = get_redis()
+    if redis is None:
+        # Backend local : la limite MAX_ENTRIES du backend s'applique
+        return
+
+    now = time.time()
+    max_entries = settings.FEEDBACK_ANALYSIS_CACHE_MAX_ENTRIES
+    redis.zadd(INDEX_KEY, {key: now})
+    # Les entrées expirées par TTL sortent de l'index
+    redis.zremrangebyscore(INDEX_KEY, 0, now - settings.FEEDBACK_ANALYSIS_CACHE_TTL)
+    overflow = redis.zcard(INDEX_KEY) - max_entries
+    if overflow > 0:
+        evicted = [member.decode() if isinstance(member, bytes) else member
+                   for member, _score in redis.zpopmin(INDEX_KEY, overflow)]
+        cache.delete_many(evicted)
+        _incr(EVICTIONS_KEY, len(evicted))
+        logger.debug(f"Cache d'analyse: {len(evicted)} entrées évincées")
+
+
+def get_cached_analysis(text: str, language: str, mode: str):
+    """
+    Récupère une analyse en cache
+
+    Args:
+        text: Texte du feedback
+        language: Code langue du feedback
+        mode: Mode d'analyse (separate, combined, batch)
+
+    Returns:
+        dict | None: Analyse (prediction, confidence, theme, method) ou None
+    """
+    if not settings.FEEDBACK_ANALYSIS_CACHE_ENABLED:
+        return None
+
+    try:
+        analysis = cache.get(make_cache_key(text, language, mode))
+        _incr(HITS_KEY if analysis is not None else MISSES_KEY)
+        return analysis
+    except Exception as e:
+        logger.warning(f"Cache d'analyse indisponible: {e}")
+        return None
+
+
+def store_analysis(text: str, language: str, mode: str, analysis: dict):
+    """
+    Met en cache le résultat d'une analyse issue du LLM
+
+    Args:
+        text: Texte du feedback
+        language: Code langue du feedback
+        mode: Mode d'analyse
+        analysis: Résultat (prediction, confidence, theme, method, theme_method)
+    """
+    if not settings.FEEDBACK_ANALYSIS_CACHE_ENABLED:
+        return
+    if analysis.get("method") in UNCACHEABLE_METHODS:
+        return
+    if analysis.get("theme_method") not in CACHEABLE_THEME_METHODS:
+        return
+
+    key = make_cache_key(text, language, mode)
+    entry = {
+        "prediction": analysis["prediction"],
+        "confidence": analysis["confidence"],
+        "theme": analysis["theme"],
+        "method": analysis.get("method"),
+    }
+    try:
+        cache.set(key, entry, timeout=settings.FEEDBACK_ANALYSIS_CACHE_TTL)
+        _enforce_size_limit(key)
+    except Exception as e:
+        logger.warning(f"Impossible de mettre en cache l'analyse: {e}")
+
+
+def get_cache_stats() -> dict:
+    """Compteurs du cache d'analyse (hits, misses, évictions, taille)"""
+    try:
+        hits = cache.get(HITS_KEY, 0)
+        misses = cache.get(MISSES_KEY, 0)
+        redis = get_redis()
+        return {
+            "enabled": settings.FEEDBACK_ANALYSIS_CACHE_ENABLED,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "evictions": cache.get(EVICTIONS_KEY, 0),
+            "entries": redis.zcard(INDEX_KEY) if redis is not None else None,
+            "max_entries": settings.FEEDBACK_ANALYSIS_CACHE_MAX_ENTRIES,
+            "ttl_seconds": settings.FEEDBACK_ANALYSIS_CACHE_TTL,
+        }
+    except Exception as e:
+        logger.warning(f"Statistiques du cache d'analyse indisponibles: {e}")
+        return {"enabled": settings.FEEDBACK_ANALYSIS_CACHE_ENABLED, "error": str(e)}
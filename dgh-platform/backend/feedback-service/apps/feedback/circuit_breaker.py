@@ -0,0 +1,231 @@
+"""
+Disjoncteur (circuit breaker) des appels Groq, partagé entre les workers via Redis
+Ouvert après N échecs consécutifs ou un p95 de latence trop élevé : les analyses
+basculent directement sur le fallback local, puis quelques requêtes sondes
+testent l'API (semi-ouvert) avant de refermer le circuit
+"""
+import logging
+import math
+from django.conf import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Transitions atomiques du disjoncteur. ARGV[1] = événement :
+# 'allow' -> 'allow' | 'probe' | 'deny' ; 'success' / 'failure' -> nouvel état ;
+# 'release' (sonde terminée sans verdict sur l'API) -> état inchangé, emplacement de sonde rendu
+CIRCUIT_SCRIPT = """
+local key = KEYS[1]
+local latency_key = KEYS[2]
+local event = ARGV[1]
+local failure_threshold = tonumber(ARGV[2])
+local open_seconds = tonumber(ARGV[3])
+local max_probes = tonumber(ARGV[4])
+local latency_threshold = tonumber(ARGV[5])
+local window = tonumber(ARGV[6])
+local min_samples = tonumber(ARGV[7])
+local latency = tonumber(ARGV[8])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HGET', key, 'state') or 'closed'
+
+local function open_circuit(reason)
+    redis.call('HSET', key, 'state', 'open', 'opened_at', now, 'failures', 0, 'probes', 0, 'reason', reason)
+    redis.call('HINCRBY', key, 'trips', 1)
+    redis.call('DEL', latency_key)
+    return 'open'
+end
+
+if event == 'allow' then
+    if state == 'closed' then
+        return 'allow'
+    end
+    if state == 'open' then
+        local opened_at = tonumber(redis.call('HGET', key, 'opened_at') or '0')
+        if now - opened_at < open_seconds then
+            return 'deny'
+        end
+        redis.call('HSET', key, 'state', 'half_open', 'half_open_at', now, 'probes', 0)
+    else
+        -- Sondes sans réponse (worker arrêté) : nouvelle série de sondes
+        local half_open_at = tonumber(redis.call('HGET', key, 'half_open_at') or '0')
+        if now - half_open_at >= open_seconds then
+            redis.call('HSET', key, 'half_open_at', now, 'probes', 0)
+        end
+    end
+    if redis.call('HINCRBY', key, 'probes', 1) <= max_probes then
+        return 'probe'
+    end
+    return 'deny'
+end
+
+if event == 'release' then
+    if state == 'half_open' and tonumber(redis.call('HGET', key, 'probes') or '0') > 0 then
+        redis.call('HINCRBY', key, 'probes', -1)
+    end
+    return state
+end
+
+if event == 'failure' then
+    if state == 'half_open' then
+        return open_circuit('probe_failed')
+    end
+    if state == 'open' then
+        return state
+    end
+    if redis.call('HINCRBY', key, 'failures', 1) >= failure_threshold then
+        return open_circuit('consecutive_failures')
+    end
+    return state
+end
+
+if state == 'half_open' then
+    redis.call('HSET', key, 'state', 'closed', 'failures', 0, 'probes', 0)
+    redis.call('DEL', latency_key)
+    return 'closed'
+end
+redis.call('HSET', key, 'failures', 0)
+redis.call('LPUSH', latency_key, latency)
+redis.call('LTRIM', latency_key, 0, window - 1)
+if state == 'closed' then
+    local samples = redis.call('LRANGE', latency_key, 0, -1)
+    if #samples >= min_samples then
+        local values = {}
+        for index, value in ipairs(samples) do
+            values[index] = tonumber(value)
+        end
+        table.sort(values)
+        if values[math.ceil(#values * 0.95)] > latency_threshold then
+            return open_circuit('latency_p95')
+        end
+    end
+end
+return state
+"""
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé : le disjoncteur est ouvert"""
+
+
+def _percentile(values: list, percentile: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * percentile / 100) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur nommé dont l'état vit dans Redis
+
+    Sans Redis (ou en cas d'erreur Redis), le disjoncteur laisse passer
+    tous les appels : il protège les workers, il ne doit pas les bloquer.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = f'circuit-breaker:{name}'
+        self.latency_key = f'circuit-breaker:{name}:latencies'
+        self._script = None
+
+    def _run(self, event: str, latency: float = 0.0):
+        if not settings.GROQ_CIRCUIT_BREAKER_ENABLED:
+            return None
+        try:
+            redis = get_redis()
+            if redis is None:
+                return None
+            if self._script is None:
+                self._script = redis.register_script(CIRCUIT_SCRIPT)
+            result = self._script(
+                keys=[self.key, self.latency_key],
+                args=[
+                    event,
+                    settings.GROQ_CIRCUIT_FAILURE_THRESHOLD,
+                    settings.GROQ_CIRCUIT_OPEN_SECONDS,
+                    settings.GROQ_CIRCUIT_HALF_OPEN_PROBES,
+                    settings.GROQ_CIRCUIT_LATENCY_P95_SECONDS,
+                    settings.GROQ_CIRCUIT_LATENCY_WINDOW,
+                    settings.GROQ_CIRCUIT_MIN_SAMPLES,
+                    round(latency, 4),
+                ],
+                client=redis
+            )
+            return result.decode() if isinstance(result, bytes) else result
+        except Exception as e:
+            logger.warning(f"Disjoncteur {self.name} indisponible, appel autorisé: {e}")
+            return None
+
+    def before_call(self) -> bool:
+        """
+        Lève CircuitOpenError si le circuit est ouvert (ou si les sondes sont déjà en cours)
+
+        Returns:
+            bool: True si l'appel est une sonde : il doit se terminer par record_success,
+            record_failure ou release_probe, sinon l'emplacement reste pris jusqu'au
+            renouvellement des sondes (GROQ_CIRCUIT_OPEN_SECONDS)
+        """
+        decision = self._run('allow')
+        if decision == 'deny':
+            raise CircuitOpenError(f"Disjoncteur {self.name} ouvert, appel court-circuité")
+        if decision == 'probe':
+            logger.info(f"Disjoncteur {self.name} semi-ouvert: requête sonde")
+            return True
+        return False
+
+    def record_success(self, latency: float):
+        state = self._run('success', latency)
+        if state == STATE_OPEN:
+            logger.error(f"Disjoncteur {self.name} ouvert: latence p95 trop élevée")
+
+    def record_failure(self):
+        state = self._run('failure')
+        if state == STATE_OPEN:
+            logger.error(f"Disjoncteur {self.name} ouvert après échecs")
+
+    def release_probe(self):
+        """Rend l'emplacement d'une sonde terminée sans réponse exploitable (quota local, requête invalide)"""
+        self._run('release')
+
+    def get_state(self) -> dict:
+        """État courant du disjoncteur pour le monitoring"""
+        info = {
+            "name": self.name,
+            "enabled": settings.GROQ_CIRCUIT_BREAKER_ENABLED,
+            "failure_threshold": settings.GROQ_CIRCUIT_FAILURE_THRESHOLD,
+            "latency_p95_threshold_seconds": settings.GROQ_CIRCUIT_LATENCY_P95_SECONDS,
+            "open_seconds": settings.GROQ_CIRCUIT_OPEN_SECONDS,
+        }
+        redis = get_redis()
+        if redis is None:
+            return {**info, "state": None, "shared": False}
+        try:
+            data = {
+                (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+                for key, value in redis.hgetall(self.key).items()
+            }
+            latencies = [float(value) for value in redis.lrange(self.latency_key, 0, -1)]
+        except Exception as e:
+            logger.warning(f"État du disjoncteur {self.name} indisponible: {e}")
+            return {**info, "state": None, "shared": True, "error": str(e)}
+
+        return {
+            **info,
+            "state": data.get('state', STATE_CLOSED),
+            "shared": True,
+            "consecutive_failures": int(data.get('failures', 0)),
+            "opened_at": float(data['opened_at']) if 'opened_at' in data else None,
+            "last_trip_reason": data.get('reason'),
+            "trips": int(data.get('trips', 0)),
+            "latency_samples": len(latencies),
+            "latency_p95_seconds": _percentile(latencies, 95),
+        }
+
+
+groq_circuit_breaker = CircuitBreaker('groq')
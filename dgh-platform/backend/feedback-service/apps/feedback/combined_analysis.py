@@ -0,0 +1,147 @@
+"""
+Analyse combinée sentiment + thème pour les feedbacks patients
+Une seule requête Groq structurée au lieu de deux appels séparés
+"""
+import time
+import json
+import logging
+from .llm_client import chat_completion
+from .sentimental_analysis import _validate_sentiment_payload, _simple_sentiment_analysis
+from .theme_catalog import get_theme_shortlist
+from .theme_index import learn_theme
+from .theme_extraction import _validate_theme_payload, _fallback_theme_extraction
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = "1"  # À incrémenter à chaque modification du prompt (invalide le cache)
+
+
+def _analyze_combined_groq(text: str, existing_themes: list) -> dict:
+    """
+    Analyse sentiment et thème du feedback en un seul appel Groq
+
+    Args:
+        text: Texte du feedback patient
+        existing_themes: Thèmes candidats présélectionnés
+
+    Returns:
+        dict: {'sentiment', 'confidence', 'theme', 'is_new', 'theme_confidence'}
+    """
+    themes_list = "\n".join([f"- {theme}" for theme in existing_themes])
+
+    prompt = f"""Tu es un expert en analyse de feedbacks médicaux. Analyse le sentiment de ce feedback patient et assigne-lui le thème le plus approprié.
+
+FEEDBACK À ANALYSER:
+"{text}"
+
+THÈMES EXISTANTS (utilise un de ces thèmes si approprié):
+{themes_list}
+
+INSTRUCTIONS:
+1. Détermine le sentiment (positive, negative ou neutral) avec des pourcentages de confiance totalisant 100%
+2. Si le feedback correspond à un thème existant, utilise EXACTEMENT ce thème
+3. Si aucun thème existant ne convient, propose un nouveau thème concis et descriptif
+4. Évite les doublons sémantiques avec les thèmes existants
+
+Réponds UNIQUEMENT au format JSON suivant:
+{{
+    "sentiment": "positive|negative|neutral",
+    "confidence": {{
+        "positive": 85.2,
+        "negative": 10.1,
+        "neutral": 4.7
+    }},
+    "theme": "nom du thème choisi ou créé",
+    "is_new": true/false,
+    "theme_confidence": 0.85
+}}"""
+
+    response = chat_completion(
+        messages=[
+            {"role": "system", "content": "Tu es un expert en analyse de feedbacks médicaux. Réponds uniquement en JSON valide."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        max_tokens=300
+    )
+
+    response_text = response.choices[0].message.content.strip()
+    logger.debug(f"Réponse Groq combinée brute: {response_text}")
+
+    try:
+        result = json.loads(response_text)
+        sentiment_result = _validate_sentiment_payload(result)
+        theme_result = _validate_theme_payload({
+            "theme": result.get("theme"),
+            "is_new": result.get("is_new"),
+            "confidence": result.get("theme_confidence"),
+        })
+    except (json.JSONDecodeError, ValueError, KeyError, AttributeError) as e:
+        logger.warning(f"Erreur parsing réponse Groq combinée: {e}, réponse: {response_text}")
+        raise ValueError(f"Réponse Groq combinée invalide: {e}")
+
+    return {
+        "sentiment": sentiment_result["sentiment"],
+        "confidence": sentiment_result["confidence"],
+        "theme": theme_result["theme"],
+        "is_new": theme_result["is_new"],
+        "theme_confidence": theme_result["confidence"],
+    }
+
+
+def analyze_feedback_combined(text: str, rating: int = None, language: str = 'fr') -> dict:
+    """
+    Analyse sentiment, scores de confiance et thème en une seule requête
+
+    Args:
+        text: Texte du feedback à analyser
+        rating: Note optionnelle du patient (utilisée par le fallback)
+        language: Code langue du feedback (utilisé par le fallback)
+
+    Returns:
+        dict: prediction, confidence, theme, method et temps de traitement
+    """
+    start = time.time()
+
+    try:
+        groq_result = _analyze_combined_groq(text, get_theme_shortlist(text))
+        elapsed = round(time.time() - start, 3)
+        # Le thème choisi par Groq enrichit l'index local utilisé par le mode séparé
+        learn_theme(groq_result["theme"], text, groq_result["sentiment"])
+
+        logger.info(
+            f"Analyse combinée via Groq: {groq_result['sentiment']} / {groq_result['theme']} en {elapsed}s"
+        )
+        return {
+            "text": text,
+            "prediction": groq_result["sentiment"],
+            "confidence": {
+                "negative": round(groq_result["confidence"]["negative"], 2),
+                "neutral": round(groq_result["confidence"]["neutral"], 2),
+                "positive": round(groq_result["confidence"]["positive"], 2)
+            },
+            "theme": groq_result["theme"],
+            "is_new_theme": groq_result["is_new"],
+            "processing_time_seconds": elapsed,
+            "method": "groq_combined",
+            "theme_method": "groq"
+        }
+
+    except Exception as e:
+        logger.warning(f"Erreur Groq API combinée, utilisation du fallback: {e}")
+
+        sentiment, confidence = _simple_sentiment_analysis(text, language)
+        theme = _fallback_theme_extraction(sentiment, rating)["theme"]
+        elapsed = round(time.time() - start, 3)
+
+        return {
+            "text": text,
+            "prediction": sentiment,
+            "confidence": confidence,
+            "theme": theme,
+            "is_new_theme": False,
+            "processing_time_seconds": elapsed,
+            "method": "keyword_fallback",
+            "theme_method": "fallback",
+            "error": str(e)
+        }
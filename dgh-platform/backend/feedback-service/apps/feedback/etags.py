@@ -0,0 +1,166 @@
+"""
+ETags et GET conditionnels des ressources interrogées en boucle par les applications
+Les listes (my_feedbacks, upcoming, pending) sont identifiées par des compteurs de
+version dans Redis, incrémentés par signaux après commit à chaque modification
+(par patient, par professionnel, et global). Un If-None-Match correspondant reçoit
+un 304 sans requête sur les données ni sérialisation.
+"""
+import functools
+import hashlib
+import json
+import logging
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY_PREFIX = 'etag-version'
+# Noms affichés dans les listes (theme_name, department_name)
+THEMES_SCOPE = 'feedback-themes'
+DEPARTMENTS_SCOPE = 'departments'
+# Révalidation obligatoire à chaque affichage, jamais de cache partagé (données patient)
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _version_key(scope: str) -> str:
+    return f'{VERSION_KEY_PREFIX}:{scope}'
+
+
+def owner_scopes(name: str, patient_id=None, professional_id=None) -> list:
+    """Compteurs touchés par la modification d'un objet : propriétaire(s) et vue globale"""
+    scopes = [f'{name}:all']
+    if patient_id:
+        scopes.append(f'{name}:patient:{patient_id}')
+    if professional_id:
+        scopes.append(f'{name}:professional:{professional_id}')
+    return scopes
+
+
+def request_scope(name: str, request, owner_types=('patient',)) -> str:
+    """
+    Compteur de la liste vue par l'appelant
+
+    owner_types reprend les restrictions du get_queryset de la ressource : un type
+    d'utilisateur non restreint voit la liste globale, donc le compteur global.
+    """
+    user_id = request.headers.get('X-User-ID')
+    user_type = request.headers.get('X-User-Type')
+    if user_id and user_type in owner_types:
+        return f'{name}:{user_type}:{user_id}'
+    return f'{name}:all'
+
+
+def bump_versions(*scopes):
+    """Incrémente les compteurs après le commit de la transaction en cours"""
+    def bump():
+        for scope in scopes:
+            key = _version_key(scope)
+            try:
+                # Valeur initiale horodatée : un compteur perdu (éviction Redis) ne
+                # retrouve jamais une version déjà servie, donc jamais de 304 périmé
+                cache.add(key, time.time_ns(), timeout=None)
+                cache.incr(key)
+            except Exception as e:
+                logger.warning(f"Incrément de la version ETag {scope} impossible: {e}")
+
+    transaction.on_commit(bump)
+
+
+def bump_feedback_versions(patient_ids):
+    """
+    Nouvelle version des listes de feedbacks de ces patients (et de la liste globale)
+
+    Pour les écritures qui n'envoient pas post_save : bulk_create, bulk_update, QuerySet.update.
+    """
+    bump_versions(*{scope for patient_id in patient_ids for scope in owner_scopes('feedbacks', patient_id=patient_id)})
+
+
+def get_versions(*scopes) -> list:
+    """Valeurs courantes des compteurs (créés au besoin), None si Redis est indisponible"""
+    keys = [_version_key(scope) for scope in scopes]
+    try:
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Lecture des versions ETag impossible: {e}")
+        return None
+    if any(versions[key] is None for key in keys):
+        return None
+    return [versions[key] for key in keys]
+
+
+def make_etag(*parts) -> str:
+    """ETag fort (entre guillemets) : empreinte des éléments qui déterminent la réponse"""
+    digest = hashlib.sha1(json.dumps(parts, default=str, sort_keys=True).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def list_etag(request, name: str, *extra, owner_types=('patient',), scopes=()) -> str:
+    """
+    ETag d'une liste : version de la vue de l'appelant, paramètres de la requête et format
+
+    Args:
+        request: Requête DRF
+        name: Famille de compteurs (feedbacks, appointments, reminders)
+        *extra: Autres éléments dont dépend la réponse (ex. date du jour)
+        owner_types: Types d'utilisateurs dont la liste est restreinte à leurs objets
+        scopes: Compteurs supplémentaires (ex. thèmes, départements affichés par nom)
+
+    Returns:
+        str: ETag, ou None si les versions sont indisponibles (réponse complète)
+    """
+    versions = get_versions(request_scope(name, request, owner_types), *scopes)
+    if versions is None:
+        return None
+    return make_etag(
+        versions, request.get_full_path(), request.headers.get('X-User-ID'),
+        request.headers.get('X-User-Type'), request.headers.get('Accept'), *extra
+    )
+
+
+def etag_matches(request, etag: str) -> bool:
+    """If-None-Match correspond-il à l'ETag courant (comparaison faible, RFC 9110) ?"""
+    header = request.headers.get('If-None-Match')
+    if not header or not etag:
+        return False
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return True
+    bare = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == bare for candidate in etags)
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def conditional(etag_func):
+    """
+    Décorateur d'action : 304 si If-None-Match correspond, sinon réponse complète avec ETag
+
+    Args:
+        etag_func: Callable (view, request, *args, **kwargs) -> ETag ou None
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            etag = etag_func(view, request, *args, **kwargs)
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+            response = view_method(view, request, *args, **kwargs)
+            if etag and 200 <= response.status_code < 300:
+                response['ETag'] = etag
+                response['Cache-Control'] = CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,255 @@
+"""
+Notifications de fin de traitement des feedbacks (Server-Sent Events)
+
+process_feedback publie l'état final sur Redis (un canal par patient) après le commit
+du feedback traité ; l'endpoint SSE, vue async servie en ASGI, relaie ces messages au
+patient abonné. Un événement a pour id un jeton opaque (base64 URL-safe de processed_at
+et feedback_id) : à la reconnexion, Last-Event-ID rejoue depuis la base ce qui a été
+traité entre-temps. Sans Redis, le flux interroge la base toutes les
+FEEDBACK_EVENTS_POLL_SECONDS (repli par polling) en relisant les FEEDBACK_EVENTS_COMMIT_LAG_SECONDS
+précédentes : processed_at est fixé avant le commit, un traitement validé tardivement
+peut porter une date antérieure au dernier polling. Les clients sans SSE interrogent
+processing_status (ETag, 304 tant que rien ne change).
+"""
+import asyncio
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'feedback-events:patient'
+EVENT_PROCESSED = 'feedback.processed'
+EVENT_STATUS = 'feedback.status'
+STATUS_FIELDS = (
+    'feedback_id', 'is_processed', 'processing_stage', 'processed_at', 'sentiment', 'theme__theme_name'
+)
+
+
+class InvalidEventId(ValueError):
+    """Last-Event-ID illisible ou falsifié"""
+
+
+def patient_channel(patient_id) -> str:
+    return f'{CHANNEL_PREFIX}:{patient_id}'
+
+
+def encode_event_id(status: dict) -> str:
+    """Id d'événement opaque et sans caractère réservé d'URL : position (processed_at, feedback_id)"""
+    position = {'processed_at': status['processed_at'], 'feedback_id': status['feedback_id']}
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_event_id(event_id: str) -> tuple:
+    """(processed_at, feedback_id) encodés dans un id d'événement"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(event_id.encode('ascii')))
+        processed_at = datetime.fromisoformat(position['processed_at'])
+        if processed_at.tzinfo is None:
+            raise ValueError("processed_at sans fuseau horaire")
+        return processed_at, uuid.UUID(position['feedback_id'])
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise InvalidEventId(f"Last-Event-ID invalide: {event_id}") from e
+
+
+def compact_status(row: dict) -> dict:
+    """État compact d'un feedback (ligne values(*STATUS_FIELDS)), tel que publié et renvoyé au client"""
+    processed_at = row['processed_at']
+    return {
+        'feedback_id': str(row['feedback_id']),
+        'is_processed': row['is_processed'],
+        'processing_stage': row['processing_stage'],
+        'processed_at': processed_at.isoformat() if processed_at else None,
+        'sentiment': row['sentiment'],
+        'theme': row['theme__theme_name'],
+    }
+
+
+def publish_feedback_processed(feedback):
+    """
+    Publie la fin de traitement d'un feedback sur le canal de son patient (après commit)
+
+    Args:
+        feedback: Feedback traité et sauvegardé
+    """
+    message = json.dumps(compact_status({
+        'feedback_id': feedback.feedback_id,
+        'is_processed': feedback.is_processed,
+        'processing_stage': feedback.processing_stage,
+        'processed_at': feedback.processed_at,
+        'sentiment': feedback.sentiment,
+        'theme__theme_name': feedback.theme.theme_name if feedback.theme_id else None,
+    }))
+    channel = patient_channel(feedback.patient_id)
+
+    def publish():
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            redis.publish(channel, message)
+        except Exception as e:
+            # Les abonnés rattrapent l'événement à la reconnexion (Last-Event-ID) ou par polling
+            logger.warning(f"Publication de l'événement du feedback {feedback.feedback_id} impossible: {e}")
+
+    transaction.on_commit(publish)
+
+
+def _format_event(status: dict, event: str = EVENT_PROCESSED) -> str:
+    lines = [f"event: {event}"]
+    # Seuls les événements de traitement font avancer Last-Event-ID (pas l'état initial)
+    if event == EVENT_PROCESSED and status['processed_at']:
+        lines.append(f"id: {encode_event_id(status)}")
+    lines.append(f"data: {json.dumps(status)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _processed_since(patient_id, since=None, after=None) -> list:
+    """
+    Feedbacks du patient traités, dans l'ordre de traitement
+
+    Args:
+        patient_id: Patient abonné
+        since: Date de traitement minimale (exclue)
+        after: Position (processed_at, feedback_id) d'un événement déjà reçu : seuls les suivants
+    """
+    from .models import Feedback
+
+    queryset = Feedback.objects.filter(patient_id=patient_id, is_processed=True, processed_at__isnull=False)
+    if since is not None:
+        queryset = queryset.filter(processed_at__gt=since)
+    if after is not None:
+        processed_at, feedback_id = after
+        queryset = queryset.filter(
+            Q(processed_at__gt=processed_at) | Q(processed_at=processed_at, feedback_id__gt=feedback_id)
+        )
+    rows = queryset.order_by('processed_at', 'feedback_id').values(*STATUS_FIELDS)
+    return [compact_status(row) for row in rows]
+
+
+def _current_statuses(patient_id, feedback_ids: list) -> list:
+    """État courant des feedbacks suivis (uniquement ceux du patient)"""
+    from .models import Feedback
+
+    rows = Feedback.objects.filter(patient_id=patient_id, feedback_id__in=feedback_ids).values(*STATUS_FIELDS)
+    return [compact_status(row) for row in rows]
+
+
+async def _subscribe(patient_id):
+    """Abonnement Redis au canal du patient, ou None (repli par polling)"""
+    if not settings.CACHES['default']['BACKEND'].startswith('django_redis'):
+        return None
+    try:
+        from redis import asyncio as aioredis
+
+        client = aioredis.from_url(settings.REDIS_URL)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(patient_channel(patient_id))
+        return client, pubsub
+    except Exception as e:
+        logger.warning(f"Abonnement Redis impossible, flux en polling: {e}")
+        return None
+
+
+async def _event_stream(patient_id, feedback_ids: list, last_event):
+    """
+    Flux SSE : état courant des feedbacks suivis, rattrapage depuis Last-Event-ID,
+    puis événements publiés (ou polling de la base) jusqu'à FEEDBACK_EVENTS_MAX_STREAM_SECONDS
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.FEEDBACK_EVENTS_MAX_STREAM_SECONDS
+    heartbeat = settings.FEEDBACK_EVENTS_HEARTBEAT_SECONDS
+    commit_lag = timedelta(seconds=settings.FEEDBACK_EVENTS_COMMIT_LAG_SECONDS)
+    # Abonnement avant la lecture de la base : aucun traitement terminé entre les deux n'est perdu
+    subscription = await _subscribe(patient_id)
+    # Événements envoyés encore dans la fenêtre relue par le polling (id -> processed_at)
+    sent = {}
+    try:
+        yield f"retry: {settings.FEEDBACK_EVENTS_RETRY_MS}\n\n"
+        if feedback_ids:
+            for status in await sync_to_async(_current_statuses)(patient_id, feedback_ids):
+                yield _format_event(status, EVENT_STATUS)
+        if last_event:
+            for status in await sync_to_async(_processed_since)(patient_id, after=last_event):
+                # Le polling ne renvoie pas les événements rejoués
+                sent[status['feedback_id']] = parse_datetime(status['processed_at'])
+                yield _format_event(status)
+
+        while loop.time() < deadline:
+            if subscription is None:
+                # Repli : traitements relus en base à intervalle fixe, sur une fenêtre qui
+                # couvre les commits tardifs (processed_at antérieur au polling précédent)
+                await asyncio.sleep(settings.FEEDBACK_EVENTS_POLL_SECONDS)
+                since = timezone.now() - commit_lag
+                statuses = [
+                    status for status in await sync_to_async(_processed_since)(patient_id, since, last_event)
+                    if sent.get(status['feedback_id']) != parse_datetime(status['processed_at'])
+                ]
+                sent = {feedback_id: at for feedback_id, at in sent.items() if at > since}
+                for status in statuses:
+                    sent[status['feedback_id']] = parse_datetime(status['processed_at'])
+                    yield _format_event(status)
+                if not statuses:
+                    yield ": keep-alive\n\n"
+                continue
+
+            message = await subscription[1].get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_event(json.loads(message['data']))
+    finally:
+        if subscription is not None:
+            client, pubsub = subscription
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+@require_GET
+async def feedback_events(request):
+    """
+    Flux SSE des fins de traitement des feedbacks du patient (en-têtes X-User-* de la gateway)
+
+    ?feedback_ids=a,b envoie d'abord l'état courant de ces feedbacks (suivi d'un envoi récent) ;
+    Last-Event-ID (ou ?last_event_id=) rejoue les traitements terminés depuis cet événement.
+    """
+    user_id = request.headers.get('X-User-ID')
+    if request.headers.get('X-User-Type') != 'patient' or not user_id:
+        return JsonResponse({'error': 'Accessible uniquement aux patients'}, status=403)
+    try:
+        patient_id = uuid.UUID(user_id)
+        feedback_ids = [
+            uuid.UUID(value) for value in request.GET.get('feedback_ids', '').split(',') if value.strip()
+        ]
+    except ValueError:
+        return JsonResponse({'error': 'Identifiants invalides (UUID attendus)'}, status=400)
+    if len(feedback_ids) > settings.FEEDBACK_EVENTS_MAX_FEEDBACK_IDS:
+        return JsonResponse(
+            {'error': f'Maximum {settings.FEEDBACK_EVENTS_MAX_FEEDBACK_IDS} feedbacks suivis'}, status=400
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event = decode_event_id(last_event_id) if last_event_id else None
+    except InvalidEventId:
+        return JsonResponse({'error': 'Last-Event-ID invalide'}, status=400)
+
+    response = StreamingHttpResponse(
+        _event_stream(patient_id, feedback_ids, last_event), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy nginx devant le service
+    response['X-Accel-Buffering'] = 'no'
+    return response
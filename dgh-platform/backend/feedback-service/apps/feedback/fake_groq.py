@@ -0,0 +1,217 @@
+"""
+Serveur local compatible avec l'API chat completions de Groq (format OpenAI)
+Utilisé par le benchmark du pipeline d'analyse : aucune dépendance réseau,
+latence et taux d'erreurs configurables. Les réponses sont déduites du prompt
+(sentiment unitaire, lot de sentiments, thème ou analyse combinée).
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+
+NEGATIVE_WORDS = ('attente', 'attendu', 'sale', 'mauvais', 'impoli', 'long', 'douleur', 'cher', 'perdu', 'jamais')
+POSITIVE_WORDS = ('merci', 'excellent', 'bien', 'rapide', 'propre', 'aimable', 'satisfait', 'professionnel', 'bravo')
+DEFAULT_THEME = 'Qualité des soins'
+
+BATCH_LINE_RE = re.compile(r'^(\d+)\. "', re.MULTILINE)
+THEME_LINE_RE = re.compile(r'^- (.+)$', re.MULTILINE)
+FEEDBACK_TEXT_RE = re.compile(r'^(?:Feedback: )?"(.+)"$', re.MULTILINE)
+
+
+def _fake_sentiment(text: str) -> dict:
+    """Sentiment déterministe par mots-clés, au format attendu par les prompts"""
+    lowered = text.lower()
+    negative = sum(word in lowered for word in NEGATIVE_WORDS)
+    positive = sum(word in lowered for word in POSITIVE_WORDS)
+    if negative > positive:
+        return {"sentiment": "negative", "confidence": {"positive": 8.0, "negative": 84.0, "neutral": 8.0}}
+    if positive > negative:
+        return {"sentiment": "positive", "confidence": {"positive": 86.0, "negative": 5.0, "neutral": 9.0}}
+    return {"sentiment": "neutral", "confidence": {"positive": 20.0, "negative": 15.0, "neutral": 65.0}}
+
+
+def _fake_theme(prompt: str) -> dict:
+    """Premier thème proposé dans le prompt, sinon un thème nouveau par défaut"""
+    themes = THEME_LINE_RE.findall(prompt)
+    if themes:
+        return {"theme": themes[0].strip(), "is_new": False}
+    return {"theme": DEFAULT_THEME, "is_new": True}
+
+
+def build_completion_content(system_prompt: str, prompt: str) -> dict:
+    """
+    Contenu JSON de la réponse selon le type de requête reconnu dans les prompts
+
+    Args:
+        system_prompt: Message système envoyé par le client
+        prompt: Message utilisateur envoyé par le client
+
+    Returns:
+        dict: Réponse au format attendu par le module d'analyse appelant
+    """
+    batch_ids = [int(number) for number in BATCH_LINE_RE.findall(prompt)]
+    if '"results"' in prompt and batch_ids:
+        lines = dict(re.findall(r'^(\d+)\. "(.*)"$', prompt, re.MULTILINE))
+        return {"results": [{"id": index, **_fake_sentiment(lines.get(str(index), ''))} for index in batch_ids]}
+
+    match = FEEDBACK_TEXT_RE.search(prompt)
+    text = match.group(1) if match else prompt
+    if 'analyse de feedbacks médicaux' in system_prompt:
+        theme = _fake_theme(prompt)
+        return {**_fake_sentiment(text), "theme": theme["theme"], "is_new": theme["is_new"], "theme_confidence": 0.82}
+    if 'classification de feedbacks' in system_prompt:
+        return {**_fake_theme(prompt), "confidence": 0.8}
+    return _fake_sentiment(text)
+
+
+class FakeGroqServer:
+    """
+    Serveur HTTP local (thread en arrière-plan) imitant Groq
+
+    Args:
+        latency_ms: Latence moyenne de chaque réponse
+        jitter_ms: Écart maximal autour de la latence moyenne
+        error_rate: Proportion de réponses 500
+        rate_limit_rate: Proportion de réponses 429 (avec retry-after-ms)
+        retry_after_ms: Valeur de l'en-tête retry-after-ms des réponses 429
+        seed: Graine du tirage des latences et des erreurs (reproductibilité)
+        host: Adresse d'écoute
+        port: Port d'écoute (0 = port libre choisi par le système)
+    """
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after_ms: int = 200, seed: int = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_ms = retry_after_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'tokens': 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeGroqServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-groq', daemon=True)
+        self._thread.start()
+        logger.info(f"Serveur Groq simulé démarré sur {self.base_url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw(self) -> tuple:
+        """Tire (latence en secondes, statut HTTP) de la prochaine réponse"""
+        with self._lock:
+            self.stats['requests'] += 1
+            latency = max(self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.stats['errors'] += 1
+                return latency, 500
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.stats['rate_limited'] += 1
+                return latency, 429
+            return latency, 200
+
+    def _count_tokens(self, tokens: int):
+        with self._lock:
+            self.stats['tokens'] += tokens
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._send(400, {"error": {"message": "JSON invalide", "type": "invalid_request_error"}})
+                    return
+                if self.path.rstrip('/') != COMPLETIONS_PATH:
+                    self._send(404, {"error": {"message": f"Route inconnue: {self.path}", "type": "not_found"}})
+                    return
+
+                latency, status = server._draw()
+                time.sleep(latency)
+                if status == 500:
+                    self._send(500, {"error": {"message": "Erreur simulée", "type": "internal_server_error"}})
+                    return
+                if status == 429:
+                    self._send(
+                        429, {"error": {"message": "Quota simulé dépassé", "type": "rate_limit_exceeded"}},
+                        headers={'retry-after-ms': str(server.retry_after_ms)}
+                    )
+                    return
+                self._send(200, server._completion(payload))
+
+            def _send(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(f"fake-groq: {format % args}")
+
+        return Handler
+
+    def _completion(self, payload: dict) -> dict:
+        messages = payload.get('messages') or []
+        system_prompt = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+        content = json.dumps(build_completion_content(system_prompt, prompt), ensure_ascii=False)
+
+        # Estimation grossière (~4 caractères par token), suffisante pour les quotas et les métriques
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        self._count_tokens(prompt_tokens + completion_tokens)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get('model', 'fake'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
@@ -0,0 +1,148 @@
+"""
+Sélection des champs renvoyés par les endpoints de lecture (sparse fieldsets)
+?fields=a,b ne renvoie que ces champs, ?omit=a,b les retire. La projection est
+répercutée sur la requête (.only() et select_related des relations lues) : la base,
+la sérialisation et le réseau ne traitent que les colonnes demandées.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(request, param: str) -> list:
+    """Noms de champs d'un paramètre (?fields=a,b ou ?fields=a&fields=b)"""
+    names = []
+    for value in request.query_params.getlist(param):
+        names.extend(name.strip() for name in value.split(',') if name.strip())
+    return names
+
+
+def is_sparse(request) -> bool:
+    """La requête (GET) demande-t-elle une sélection de champs ?"""
+    return request is not None and request.method == 'GET' and bool(
+        _names(request, FIELDS_PARAM) or _names(request, OMIT_PARAM)
+    )
+
+
+def selected_fields(request, available) -> list:
+    """
+    Champs à renvoyer pour cette requête, dans l'ordre du serializer
+
+    Args:
+        request: Requête DRF (paramètres fields / omit)
+        available: Noms des champs du serializer
+
+    Returns:
+        list: Noms retenus, ou None si aucune sélection n'est demandée (GET uniquement)
+
+    Raises:
+        ValidationError: Champ inconnu du serializer
+    """
+    if not is_sparse(request):
+        return None
+    fields, omit = _names(request, FIELDS_PARAM), _names(request, OMIT_PARAM)
+
+    available = list(available)
+    unknown = {param: [name for name in names if name not in available]
+               for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit))}
+    unknown = {param: names for param, names in unknown.items() if names}
+    if unknown:
+        raise serializers.ValidationError({
+            param: f"Champs inconnus: {', '.join(names)} (disponibles: {', '.join(available)})"
+            for param, names in unknown.items()
+        })
+    return [name for name in available if (not fields or name in fields) and name not in omit]
+
+
+def projection(serializer, names, keep=()) -> tuple:
+    """
+    Colonnes et relations à charger pour sérialiser `names`
+
+    Args:
+        serializer: Serializer (instancié) du modèle
+        names: Champs sérialisés
+        keep: Champs du modèle toujours chargés (tri, pagination par clé)
+
+    Returns:
+        tuple: (champs pour .only(), relations pour select_related), ou None si un
+        champ n'est pas une simple colonne (méthode, propriété, serializer imbriqué, relation multiple)
+    """
+    model = serializer.Meta.model
+    opts = model._meta
+    only = {opts.pk.name}
+    related = set()
+    for name in keep:
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete:
+            only.add(field.name)
+
+    for name in names:
+        field = serializer.fields[name]
+        if isinstance(field, serializers.BaseSerializer) or field.source == '*':
+            return None
+        attrs = field.source.split('.')
+        try:
+            model_field = opts.get_field(attrs[0])
+        except FieldDoesNotExist:
+            if hasattr(model, attrs[0]):
+                return None
+            # Valeur annotée par le queryset (ex. rank de la recherche) : rien à charger
+            continue
+        if not model_field.concrete:
+            return None
+        only.add(model_field.name)
+        if len(attrs) > 1:
+            # Colonne d'une relation (ex. theme.theme_name) : jointure au lieu d'une requête par ligne
+            if not (model_field.many_to_one or model_field.one_to_one) or len(attrs) > 2:
+                return None
+            related.add(model_field.name)
+            only.add('__'.join(attrs))
+    return sorted(only), sorted(related)
+
+
+class SparseFieldsetSerializerMixin:
+    """Retire du serializer les champs non demandés par ?fields= / ?omit="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = selected_fields(self.context.get('request'), self.fields)
+        if names is not None:
+            for name in set(self.fields) - set(names):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet : projection de la requête sur les champs demandés pour les actions de lecture
+
+    Les relations lues par le serializer (ex. theme_name) sont jointes même sans sélection.
+    """
+    # Actions dont le queryset n'alimente que le serializer (lecture seule)
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_fieldset_actions:
+            return queryset
+
+        # Champs déjà restreints par SparseFieldsetSerializerMixin (champ inconnu : 400)
+        serializer = self.get_serializer_class()(context={'request': self.request})
+        keep = set(getattr(self.pagination_class, 'ordering', None) or ())
+        for attr in ('ordering', 'ordering_fields'):
+            keep.update(getattr(self, attr, None) or ())
+        plan = projection(serializer, serializer.fields, keep={field.lstrip('-') for field in keep})
+        if plan is None:
+            return queryset
+
+        only, related = plan
+        if related:
+            queryset = queryset.select_related(*related)
+        if not is_sparse(self.request):
+            # Toutes les colonnes du serializer : pas de projection à appliquer
+            return queryset
+        return queryset.only(*only)
@@ -0,0 +1,235 @@
+"""
+Moteur de sentiment par lexique compilé (fallback sans API)
+Un seul motif regex par langue avec frontières de mots et fenêtre de négation
+"""
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Lexiques intégrés (contexte médical)
+BUILTIN_LEXICONS = {
+    'fr': {
+        'positive': [
+            'excellent', 'excellente', 'parfait', 'parfaite', 'très bien', 'super', 'formidable',
+            'fantastique', 'merveilleux', 'satisfait', 'satisfaite', 'content', 'contente', 'heureux',
+            'heureuse', 'bon', 'bonne', 'bien', 'génial', 'top', 'recommande', 'bravo', 'félicitations',
+            'efficace', 'rapide', 'professionnel', 'professionnelle', 'qualité', 'compétent', 'compétente',
+            'attentif', 'attentive', 'bienveillant', 'bienveillante', 'rassurant', 'rassurante',
+            'disponible', 'aimable', 'gentil', 'gentille', 'souriant', 'souriante', 'merci', 'accueillant',
+            'accueillante', 'propre',
+        ],
+        'negative': [
+            'mauvais', 'mauvaise', 'nul', 'nulle', 'problème', 'problèmes', 'insatisfait', 'insatisfaite',
+            'décevant', 'décevante', 'terrible', 'catastrophique', 'mal', 'lent', 'lente', 'attente',
+            'attendu', 'retard', 'erreur', 'difficile', 'compliqué', 'inquiet', 'inquiète', 'peur',
+            'douleur', 'souffrance', 'déçu', 'déçue', 'mécontent', 'mécontente', 'plainte', 'inadéquat',
+            'impoli', 'impolie', 'froid', 'froide', 'indisponible', 'négligent', 'négligente',
+            'incompétent', 'incompétente', 'désagréable', 'stressant', 'angoissant', 'sale', 'cher', 'chère',
+        ],
+        'negators': ['pas', 'jamais', 'aucun', 'aucune', 'sans', 'ni', 'guère', 'rien'],
+    },
+    'en': {
+        'positive': [
+            'excellent', 'perfect', 'very good', 'great', 'good', 'wonderful', 'fantastic', 'amazing',
+            'satisfied', 'happy', 'recommend', 'efficient', 'fast', 'quick', 'professional', 'competent',
+            'attentive', 'caring', 'kind', 'friendly', 'helpful', 'reassuring', 'available', 'clean',
+            'thank', 'thanks', 'polite',
+        ],
+        'negative': [
+            'bad', 'poor', 'terrible', 'awful', 'horrible', 'problem', 'problems', 'unsatisfied',
+            'dissatisfied', 'disappointing', 'disappointed', 'slow', 'wait', 'waiting', 'waited', 'delay',
+            'late', 'error', 'mistake', 'difficult', 'worried', 'afraid', 'pain', 'suffering', 'complaint',
+            'rude', 'cold', 'unavailable', 'negligent', 'incompetent', 'unpleasant', 'stressful', 'dirty',
+            'expensive',
+        ],
+        'negators': ['not', 'no', 'never', 'without', "don't", "didn't", "isn't", "wasn't", 'nobody', 'nothing'],
+    },
+}
+
+# Langues locales sans lexique dédié : les patients mêlent souvent français et anglais
+DEFAULT_FALLBACK_LANGUAGES = ('fr', 'en')
+
+# Articles et pronoms élidés devant un terme du lexique
+ELISIONS = "c|d|j|l|m|n|qu|s|t"
+
+# Nombre de mots après une négation dont la polarité est inversée
+NEGATION_WINDOW = 3
+
+_WORD_RE = re.compile(r"[\w']+")
+# Une ponctuation de fin de proposition referme la fenêtre de négation
+_CLAUSE_BREAK_RE = re.compile(r"[.,;:!?]")
+
+
+class CompiledLexicon:
+    """Lexique d'une langue compilé en un seul motif regex"""
+
+    def __init__(self, positive: list, negative: list, negators: list):
+        polarity = {}
+        for term in positive:
+            polarity[term.casefold()] = 1
+        for term in negative:
+            polarity[term.casefold()] = -1
+        self.polarity = polarity
+        self.negators = frozenset(term.casefold() for term in negators)
+
+        # Termes longs d'abord pour que "très bien" l'emporte sur "bien"
+        terms = sorted(set(polarity) | self.negators, key=len, reverse=True)
+        alternation = "|".join(re.escape(term).replace(r"\ ", r"\s+") for term in terms)
+        # Élision française facultative devant le terme : "d'attente", "l'accueil", "qu'aucun"
+        self.pattern = re.compile(
+            rf"(?<![\w'])(?:(?:{ELISIONS})['’])?(?P<term>{alternation})(?![\w'])", re.IGNORECASE
+        )
+
+    def score(self, text: str) -> tuple:
+        """
+        Compte les occurrences positives et négatives en tenant compte des négations
+
+        Returns:
+            tuple: (positive_count, negative_count)
+        """
+        positive_count = 0
+        negative_count = 0
+        negation_until = -1
+        word_index = 0
+        last_end = 0
+
+        for match in self.pattern.finditer(text):
+            # Position du mot courant, comptée de façon incrémentale depuis la correspondance précédente
+            word_index += len(_WORD_RE.findall(text, last_end, match.start()))
+            if negation_until >= 0 and _CLAUSE_BREAK_RE.search(text, last_end, match.start()):
+                negation_until = -1
+            last_end = match.end()
+            matched = match.group(0)
+            term = " ".join(match.group('term').casefold().split())
+
+            if term in self.negators:
+                negation_until = word_index + NEGATION_WINDOW
+            else:
+                value = self.polarity[term]
+                if word_index <= negation_until:
+                    value = -value
+                if value > 0:
+                    positive_count += 1
+                else:
+                    negative_count += 1
+
+            word_index += len(_WORD_RE.findall(matched))
+
+        return positive_count, negative_count
+
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+def _load_lexicon_terms(language: str) -> dict:
+    """
+    Charge les termes d'une langue : lexique intégré, complété par le fichier
+    <FEEDBACK_LEXICON_DIR>/<langue>.json s'il existe ({"positive": [], "negative": [], "negators": []})
+    """
+    terms = {key: list(values) for key, values in BUILTIN_LEXICONS.get(language, {}).items()}
+
+    lexicon_dir = getattr(settings, 'FEEDBACK_LEXICON_DIR', '')
+    if lexicon_dir:
+        path = Path(lexicon_dir) / f"{language}.json"
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                for key in ('positive', 'negative', 'negators'):
+                    terms.setdefault(key, []).extend(data.get(key, []))
+                logger.info(f"Lexique {language} chargé depuis {path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Lexique {path} illisible: {e}")
+
+    if not terms.get('positive') and not terms.get('negative'):
+        # Aucun lexique pour cette langue (dua, bas, ewo) : union des lexiques par défaut
+        for fallback_language in DEFAULT_FALLBACK_LANGUAGES:
+            for key, values in BUILTIN_LEXICONS[fallback_language].items():
+                terms.setdefault(key, []).extend(values)
+
+    return terms
+
+
+def get_lexicon(language: str = 'fr') -> CompiledLexicon:
+    """Retourne le lexique compilé d'une langue (compilé une seule fois par processus)"""
+    language = (language or 'fr').lower()
+    lexicon = _compiled.get(language)
+    if lexicon is None:
+        with _lock:
+            lexicon = _compiled.get(language)
+            if lexicon is None:
+                terms = _load_lexicon_terms(language)
+                lexicon = CompiledLexicon(
+                    terms.get('positive', []), terms.get('negative', []), terms.get('negators', [])
+                )
+                _compiled[language] = lexicon
+    return lexicon
+
+
+def _scores_to_result(positive_count: int, negative_count: int) -> tuple:
+    """Convertit les compteurs en (sentiment, scores) au format de l'analyse de sentiment"""
+    if positive_count > negative_count:
+        confidence = min(60.0 + (positive_count * 10), 90.0)
+        return "positive", {
+            "negative": 10.0,
+            "neutral": 100.0 - confidence - 10.0,
+            "positive": confidence
+        }
+    elif negative_count > positive_count:
+        confidence = min(60.0 + (negative_count * 10), 90.0)
+        return "negative", {
+            "negative": confidence,
+            "neutral": 100.0 - confidence - 10.0,
+            "positive": 10.0
+        }
+    else:
+        return "neutral", {"negative": 30.0, "neutral": 40.0, "positive": 30.0}
+
+
+def analyze_lexicon(text: str, language: str = 'fr') -> tuple:
+    """
+    Analyse le sentiment d'un texte avec le lexique compilé de sa langue
+
+    Args:
+        text: Texte du feedback
+        language: Code langue (fr, en, dua, bas, ewo)
+
+    Returns:
+        tuple: (sentiment, scores_dict)
+    """
+    return _scores_to_result(*get_lexicon(language).score(text or ''))
+
+
+def analyze_lexicon_batch(texts: list, languages: list = None) -> list:
+    """
+    Analyse par lot pour les backfills : les textes identiques (après normalisation
+    de la casse et des espaces) ne sont analysés qu'une fois
+
+    Pas de vectorisation au sens numpy : le coût est le parcours regex et la fenêtre de
+    négation de chaque correspondance, pas l'appel par texte (un passage unique sur la
+    concaténation des textes ne s'est pas révélé plus rapide). Le gain vient des doublons,
+    fréquents dans les backfills ("Très bien", "RAS", ...).
+
+    Args:
+        texts: Liste des textes
+        languages: Liste des codes langue (même longueur), 'fr' par défaut
+
+    Returns:
+        list: [(sentiment, scores_dict), ...] dans l'ordre des textes
+    """
+    languages = languages or ['fr'] * len(texts)
+    memo = {}
+    results = []
+    for text, language in zip(texts, languages):
+        key = (language, " ".join((text or '').casefold().split()))
+        result = memo.get(key)
+        if result is None:
+            result = memo[key] = analyze_lexicon(text, language)
+        # Copie des scores pour que chaque feedback ait son propre dict
+        results.append((result[0], dict(result[1])))
+    return results
@@ -0,0 +1,323 @@
+"""
+Client Groq partagé par les modules d'analyse
+Limitation de débit distribuée (Redis, requêtes et tokens par minute),
+concurrence bornée globalement (Redis), reprises respectant Retry-After et disjoncteur
+"""
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import groq
+from groq import Groq
+from django.conf import settings
+from .circuit_breaker import groq_circuit_breaker
+from .metrics import record_llm_usage
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+GROQ_MODEL = "llama-3.1-8b-instant"  # Modèle rapide et gratuit
+
+REQUESTS_BUCKET_KEY = 'llm-rate:groq:requests'
+TOKENS_BUCKET_KEY = 'llm-rate:groq:tokens'
+CONCURRENCY_KEY = 'llm-rate:groq:inflight'
+CONCURRENCY_POLL_SECONDS = 0.05
+
+# Deux seaux à jetons (requêtes et tokens) rechargés en continu sur une minute.
+# Retourne 0 si la requête est admise (jetons débités), sinon l'attente en secondes.
+# ARGV[4] = '1' : débit forcé sans contrôle (réajustement après la réponse, coût éventuellement négatif)
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+
+local function refill(key, capacity)
+    local data = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(data[1])
+    local ts = tonumber(data[2])
+    if level == nil then
+        return capacity
+    end
+    return math.min(capacity, level + (now - ts) * capacity / 60.0)
+end
+
+local requests = refill(KEYS[1], rpm)
+local tokens = refill(KEYS[2], tpm)
+local wait = 0
+
+if force then
+    tokens = math.min(tpm, tokens - cost)
+else
+    if requests < 1 then
+        wait = math.max(wait, (1 - requests) * 60.0 / rpm)
+    end
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) * 60.0 / tpm)
+    end
+    if wait == 0 then
+        requests = requests - 1
+        tokens = tokens - cost
+    end
+end
+
+redis.call('HSET', KEYS[1], 'level', requests, 'ts', now)
+redis.call('HSET', KEYS[2], 'level', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return tostring(wait)
+"""
+
+# Appels Groq en cours, tous workers confondus : un ZSET de baux (score = expiration).
+# Les baux expirés (worker tué en plein appel) sont purgés avant le comptage.
+# Retourne 1 si le bail est accordé, 0 si GROQ_MAX_CONCURRENCY appels sont déjà en cours.
+CONCURRENCY_ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(ttl))
+return 1
+"""
+
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+
+class LLMRateLimitExceeded(Exception):
+    """Quota Groq épuisé au-delà de l'attente maximale autorisée"""
+
+
+_client = None
+_client_lock = threading.Lock()
+_semaphore = None
+_bucket_script = None
+_concurrency_script = None
+
+
+def get_llm_client() -> Groq:
+    """
+    Client Groq unique par processus
+
+    Les reprises automatiques du SDK sont désactivées : elles sont gérées
+    par chat_completion() pour respecter la limitation de débit partagée.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = getattr(settings, 'GROQ_API_KEY', os.getenv('GROQ_API_KEY'))
+                if not api_key:
+                    raise ValueError("GROQ_API_KEY non configurée")
+                _client = Groq(
+                    api_key=api_key,
+                    base_url=settings.GROQ_BASE_URL or None,
+                    timeout=settings.GROQ_TIMEOUT_SECONDS,
+                    max_retries=0
+                )
+                logger.info("Client Groq partagé initialisé")
+    return _client
+
+
+def _get_semaphore() -> threading.BoundedSemaphore:
+    """Sémaphore du processus, utilisé seulement sans Redis (serveur de dev, tests)"""
+    global _semaphore
+    if _semaphore is None:
+        with _client_lock:
+            if _semaphore is None:
+                _semaphore = threading.BoundedSemaphore(settings.GROQ_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _try_acquire_slot(redis, token: str) -> bool:
+    """Demande un bail de concurrence Redis ; True si l'appel peut partir"""
+    global _concurrency_script
+    if _concurrency_script is None:
+        _concurrency_script = redis.register_script(CONCURRENCY_ACQUIRE_SCRIPT)
+    # Bail plus long que le timeout Groq : il n'expire que si le worker a disparu
+    ttl = settings.GROQ_TIMEOUT_SECONDS + 5
+    granted = _concurrency_script(
+        keys=[CONCURRENCY_KEY], args=[settings.GROQ_MAX_CONCURRENCY, ttl, token], client=redis
+    )
+    return int(granted) == 1
+
+
+@contextmanager
+def _concurrency_slot():
+    """
+    Borne le nombre d'appels Groq simultanés à GROQ_MAX_CONCURRENCY sur l'ensemble des workers
+
+    Sous Celery prefork chaque processus n'exécute qu'une tâche à la fois : un sémaphore
+    local ne borne rien, le compteur est donc tenu dans Redis. Sans Redis, repli sur un
+    sémaphore du processus ; en cas d'erreur Redis, l'appel est admis.
+
+    Raises:
+        LLMRateLimitExceeded: Aucun emplacement libéré avant GROQ_RATE_LIMIT_MAX_WAIT_SECONDS
+    """
+    redis = get_redis()
+    if redis is None:
+        with _get_semaphore():
+            yield
+        return
+
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.GROQ_RATE_LIMIT_MAX_WAIT_SECONDS
+    acquired = False
+    while not acquired:
+        try:
+            acquired = _try_acquire_slot(redis, token)
+        except Exception as e:
+            logger.warning(f"Compteur de concurrence Groq indisponible, requête admise: {e}")
+            break
+        if not acquired:
+            if time.monotonic() + CONCURRENCY_POLL_SECONDS > deadline:
+                raise LLMRateLimitExceeded(
+                    f"{settings.GROQ_MAX_CONCURRENCY} appels Groq déjà en cours, attente maximale dépassée"
+                )
+            time.sleep(CONCURRENCY_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                redis.zrem(CONCURRENCY_KEY, token)
+            except Exception as e:
+                logger.debug(f"Libération du bail de concurrence Groq impossible (expiration à venir): {e}")
+
+
+def _run_bucket(cost: int, force: bool = False) -> float:
+    """Exécute le script du seau à jetons ; retourne l'attente requise (0 = admis)"""
+    global _bucket_script
+    redis = get_redis()
+    if redis is None:
+        return 0.0
+    if _bucket_script is None:
+        _bucket_script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+    wait = _bucket_script(
+        keys=[REQUESTS_BUCKET_KEY, TOKENS_BUCKET_KEY],
+        args=[settings.GROQ_RPM_LIMIT, settings.GROQ_TPM_LIMIT, cost, '1' if force else '0'],
+        client=redis
+    )
+    return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+
+def estimate_tokens(messages: list, max_tokens: int) -> int:
+    """Estimation prudente des tokens d'une requête (~4 caractères par token + réponse maximale)"""
+    prompt_chars = sum(len(message.get("content", "")) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+def _acquire_rate_limit(tokens: int):
+    """
+    Attend que les quotas partagés RPM/TPM admettent la requête
+
+    Sans Redis (ou en cas d'erreur Redis), la requête passe : la limitation
+    est une protection, pas une condition de fonctionnement.
+    """
+    tokens = min(tokens, settings.GROQ_TPM_LIMIT)
+    deadline = time.monotonic() + settings.GROQ_RATE_LIMIT_MAX_WAIT_SECONDS
+    while True:
+        try:
+            wait = _run_bucket(tokens)
+        except Exception as e:
+            logger.warning(f"Limiteur de débit Groq indisponible, requête admise: {e}")
+            return
+        if wait <= 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise LLMRateLimitExceeded(f"Quota Groq épuisé (attente estimée {wait:.1f}s)")
+        logger.debug(f"Quota Groq atteint, attente de {wait:.2f}s")
+        time.sleep(wait)
+
+
+def _reconcile_tokens(estimated: int, response):
+    """Réajuste le seau de tokens avec la consommation réelle renvoyée par Groq"""
+    usage = getattr(response, "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    if not isinstance(total_tokens, int):
+        return
+    try:
+        _run_bucket(total_tokens - min(estimated, settings.GROQ_TPM_LIMIT), force=True)
+    except Exception as e:
+        logger.debug(f"Réajustement du quota de tokens impossible: {e}")
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Délai avant la prochaine tentative : Retry-After si fourni, sinon backoff exponentiel avec jitter"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after_ms = headers.get("retry-after-ms")
+    retry_after = headers.get("retry-after")
+    try:
+        if retry_after_ms is not None:
+            return float(retry_after_ms) / 1000
+        if retry_after is not None:
+            return float(retry_after)
+    except ValueError:
+        pass
+    base_delay = settings.GROQ_RETRY_BASE_DELAY_SECONDS * (2 ** attempt)
+    return min(base_delay, 30.0) * random.uniform(0.5, 1.0)
+
+
+def chat_completion(messages: list, max_tokens: int, temperature: float = 0.1, model: str = GROQ_MODEL):
+    """
+    Appel chat.completions Groq avec limitation de débit, concurrence bornée, reprises et disjoncteur
+
+    Args:
+        messages: Messages du chat (system, user)
+        max_tokens: Nombre maximal de tokens de la réponse
+        temperature: Température d'échantillonnage
+        model: Modèle Groq
+
+    Returns:
+        Réponse Groq (choices, usage)
+    """
+    client = get_llm_client()
+    estimated = estimate_tokens(messages, max_tokens)
+    max_retries = settings.GROQ_MAX_RETRIES
+
+    for attempt in range(max_retries + 1):
+        # Circuit ouvert : CircuitOpenError immédiate, l'appelant bascule sur le fallback local
+        probe = groq_circuit_breaker.before_call()
+        recorded = False
+        try:
+            _acquire_rate_limit(estimated)
+            with _concurrency_slot():
+                start = time.monotonic()
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            groq_circuit_breaker.record_success(time.monotonic() - start)
+            recorded = True
+            _reconcile_tokens(estimated, response)
+            record_llm_usage(response)
+            return response
+        except RETRYABLE_ERRORS as e:
+            groq_circuit_breaker.record_failure()
+            recorded = True
+            if attempt >= max_retries:
+                raise
+            delay = _retry_delay(e, attempt)
+            if delay > settings.GROQ_RATE_LIMIT_MAX_WAIT_SECONDS:
+                raise
+            logger.warning(
+                f"Erreur Groq {type(e).__name__} (tentative {attempt + 1}/{max_retries + 1}), nouvel essai dans {delay:.2f}s"
+            )
+            time.sleep(delay)
+        finally:
+            # Sonde sans verdict (quota épuisé, erreur non réessayable) : emplacement rendu
+            if probe and not recorded:
+                groq_circuit_breaker.release_probe()
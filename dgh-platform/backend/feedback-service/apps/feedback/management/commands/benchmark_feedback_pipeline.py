@@ -0,0 +1,246 @@
+"""
+Benchmark hors ligne du pipeline d'analyse des feedbacks
+
+Un serveur local imitant Groq (latence et taux d'erreurs configurables) remplace
+l'API : aucune clé ni accès réseau nécessaire. Des feedbacks synthétiques sont
+créés puis traités par services.process_feedback et/ou tasks.process_feedback_async
+(exécutée localement, verrou compris) par N workers simultanés. Le rapport donne
+le débit, les latences p50/p95/p99 et le taux de repli sur les mots-clés.
+
+Tout se déroule dans une base de test jetable (comme manage.py test) et un cache
+mémoire propre à l'exécution : ni feedbacks, ni thèmes, ni centroïdes, ni compteurs
+ne subsistent après le benchmark. Les mécanismes partagés via Redis (quotas,
+disjoncteur, baux de concurrence) ne sont mesurés qu'avec un Redis dédié (--redis-url).
+"""
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from apps.feedback import llm_client
+from apps.feedback.fake_groq import FakeGroqServer
+from apps.feedback.metrics import PERCENTILES, STAGE_FIELDS, _nearest_rank
+from apps.feedback.models import Feedback, FeedbackProcessingMetric
+from apps.feedback.services import process_feedback
+from apps.feedback.tasks import process_feedback_async
+
+FALLBACK_METHODS = ('keyword_fallback', 'default')
+DEFAULT_WORKERS = 4
+
+SAMPLE_TEXTS = (
+    "Merci à toute l'équipe, accueil aimable et soins excellents",
+    "Attente beaucoup trop longue aux urgences, personne ne nous a informés",
+    "Consultation correcte, le médecin a répondu à mes questions",
+    "Chambre sale et personnel impoli pendant la nuit",
+    "Prise en charge rapide et professionnelle, bravo",
+    "Le parking est payant et les panneaux sont difficiles à lire",
+)
+
+
+def _reset_llm_client():
+    """Oublie le client Groq et le sémaphore du processus (recréés avec la configuration active)"""
+    with llm_client._client_lock:
+        llm_client._client = None
+        llm_client._semaphore = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit et les latences de l'analyse des feedbacks contre un serveur Groq simulé "
+        "local (sans réseau), dans une base de test jetable détruite à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--feedbacks', type=int, default=200, help="Nombre de feedbacks par cible")
+        parser.add_argument(
+            '--workers', type=int,
+            help=f"Nombre de workers simultanés (défaut: {DEFAULT_WORKERS}, 1 sous SQLite)"
+        )
+        parser.add_argument(
+            '--target', choices=['service', 'task', 'both'], default='both',
+            help="services.process_feedback, tasks.process_feedback_async ou les deux"
+        )
+        parser.add_argument('--mode', choices=['separate', 'combined'], default=settings.FEEDBACK_ANALYSIS_MODE)
+        parser.add_argument('--latency-ms', type=float, default=300, help="Latence moyenne du serveur simulé")
+        parser.add_argument('--jitter-ms', type=float, default=100, help="Variation maximale de la latence")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de réponses 500 (0-1)")
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Proportion de réponses 429 (0-1)")
+        parser.add_argument('--seed', type=int, default=42, help="Graine des tirages (latences, erreurs, notes)")
+        parser.add_argument(
+            '--respect-rate-limits', action='store_true',
+            help="Conserve GROQ_RPM_LIMIT/GROQ_TPM_LIMIT (sinon quotas levés pour mesurer le pipeline seul)"
+        )
+        parser.add_argument('--circuit-breaker', action='store_true', help="Active le disjoncteur Groq partagé")
+        parser.add_argument(
+            '--redis-url',
+            help="Redis dédié au benchmark (jamais celui de production) ; sinon cache mémoire local"
+        )
+        parser.add_argument('--analysis-cache', action='store_true', help="Active le cache des analyses")
+        parser.add_argument('--theme-index', action='store_true', help="Active l'index local des thèmes")
+
+    def handle(self, *args, **options):
+        if options['workers'] is None:
+            options['workers'] = 1 if connection.vendor == 'sqlite' else DEFAULT_WORKERS
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            # SQLite sérialise les écritures : les "database is locked" fausseraient les mesures
+            raise CommandError("SQLite n'accepte qu'un writer à la fois : --workers > 1 nécessite PostgreSQL")
+        if options['feedbacks'] < 1 or options['workers'] < 1:
+            raise CommandError("--feedbacks et --workers doivent être positifs")
+        for option in ('error_rate', 'rate_limit_rate'):
+            if not 0 <= options[option] <= 1:
+                raise CommandError(f"--{option.replace('_', '-')} doit être compris entre 0 et 1")
+        if options['circuit_breaker'] and not options['redis_url']:
+            raise CommandError("--circuit-breaker nécessite --redis-url : l'état du disjoncteur est tenu dans Redis")
+
+        targets = ['service', 'task'] if options['target'] == 'both' else [options['target']]
+        server = FakeGroqServer(
+            latency_ms=options['latency_ms'], jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'], rate_limit_rate=options['rate_limit_rate'],
+            seed=options['seed']
+        )
+
+        if options['verbosity'] < 2:
+            # Journaux par feedback trop bavards pour un rapport de benchmark
+            logging.disable(logging.WARNING)
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with server, override_settings(**self._benchmark_settings(server, options)):
+                _reset_llm_client()
+                try:
+                    self._run_targets(targets, server, options)
+                finally:
+                    _reset_llm_client()
+        finally:
+            runner.teardown_databases(old_config)
+            logging.disable(logging.NOTSET)
+
+    def _run_targets(self, targets: list, server: FakeGroqServer, options):
+        self.stdout.write(
+            f"Serveur Groq simulé: {server.base_url} (latence {options['latency_ms']:.0f}±"
+            f"{options['jitter_ms']:.0f} ms, erreurs {options['error_rate']:.0%}, "
+            f"429 {options['rate_limit_rate']:.0%}) - mode {options['mode']}, {options['workers']} workers"
+        )
+        for index, target in enumerate(targets):
+            feedbacks = self._create_feedbacks(options['feedbacks'], options['seed'] + index)
+            self._run(target, feedbacks, options['workers'], server)
+
+    def _benchmark_settings(self, server: FakeGroqServer, options) -> dict:
+        overrides = {
+            'GROQ_API_KEY': 'benchmark',
+            'GROQ_BASE_URL': server.base_url,
+            'SENTIMENT_BACKEND': 'groq',
+            'FEEDBACK_ANALYSIS_MODE': options['mode'],
+            # Un thread = un worker Celery : la concurrence Groq globale ne bride pas les workers
+            'GROQ_MAX_CONCURRENCY': options['workers'],
+            'GROQ_CIRCUIT_BREAKER_ENABLED': options['circuit_breaker'],
+            'FEEDBACK_ANALYSIS_CACHE_ENABLED': options['analysis_cache'],
+            'THEME_INDEX_ENABLED': options['theme_index'],
+            # Pas de publication Celery à la création : le benchmark pilote lui-même le traitement
+            'FEEDBACK_MICRO_BATCHING': True,
+            'CACHES': {'default': self._benchmark_cache(options['redis_url'])},
+        }
+        if not options['respect_rate_limits']:
+            overrides.update({'GROQ_RPM_LIMIT': 1_000_000, 'GROQ_TPM_LIMIT': 1_000_000_000})
+        return overrides
+
+    def _benchmark_cache(self, redis_url: str = None) -> dict:
+        """Cache propre à l'exécution : le cache partagé de l'application n'est jamais touché"""
+        namespace = f'feedback-benchmark-{uuid.uuid4().hex}'
+        if not redis_url:
+            return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': namespace}
+        return {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': redis_url,
+            'KEY_PREFIX': namespace,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        }
+
+    def _create_feedbacks(self, count: int, seed: int) -> list:
+        """Feedbacks synthétiques aux textes uniques (aucun résultat de cache partagé entre eux)"""
+        rng = random.Random(seed)
+        department_id = uuid.uuid4()
+        feedbacks = [
+            Feedback(
+                description=f"{rng.choice(SAMPLE_TEXTS)} (benchmark {index})",
+                rating=rng.randint(1, 5),
+                language='fr',
+                patient_id=uuid.uuid4(),
+                department_id=department_id,
+            )
+            for index in range(count)
+        ]
+        return Feedback.objects.bulk_create(feedbacks, batch_size=settings.FEEDBACK_BULK_CHUNK_SIZE)
+
+    def _run(self, target: str, feedbacks: list, workers: int, server: FakeGroqServer):
+        requests_before = dict(server.stats)
+
+        def run_one(feedback: Feedback) -> tuple:
+            start = time.perf_counter()
+            outcome = 'ok'
+            try:
+                if target == 'service':
+                    process_feedback(feedback)
+                else:
+                    result = process_feedback_async.apply(args=[str(feedback.feedback_id)])
+                    if isinstance(result.result, DatabaseError):
+                        outcome = 'db_error'
+                    elif not (result.successful() and result.result.get('status') == 'success'):
+                        outcome = 'failed'
+            except DatabaseError:
+                outcome = 'db_error'
+            except Exception:
+                outcome = 'failed'
+            return time.perf_counter() - start, outcome
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(run_one, feedbacks))
+        elapsed = time.perf_counter() - start
+
+        feedback_ids = [feedback.feedback_id for feedback in feedbacks]
+        methods = list(Feedback.objects.filter(feedback_id__in=feedback_ids).values_list('analysis_method', flat=True))
+        fallbacks = sum(1 for method in methods if method in FALLBACK_METHODS)
+        failures = sum(1 for _latency, outcome in outcomes if outcome == 'failed')
+        db_errors = sum(1 for _latency, outcome in outcomes if outcome == 'db_error')
+        latencies = sorted(latency * 1000 for latency, _outcome in outcomes)
+        served = {key: server.stats[key] - requests_before[key] for key in server.stats}
+
+        label = 'services.process_feedback' if target == 'service' else 'tasks.process_feedback_async'
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        self.stdout.write(
+            f"  {len(feedbacks)} feedbacks en {elapsed:.2f}s - débit {len(feedbacks) / elapsed:.2f} feedbacks/s"
+        )
+        self.stdout.write(
+            "  latence (ms): " + ", ".join(f"p{p} {_nearest_rank(latencies, p):.0f}" for p in PERCENTILES)
+            + f", max {latencies[-1]:.0f}"
+        )
+        self.stdout.write(
+            f"  repli mots-clés: {fallbacks}/{len(methods)} ({fallbacks / max(len(methods), 1):.1%}), "
+            f"échecs: {failures}, erreurs base de données: {db_errors}"
+        )
+        self.stdout.write(
+            f"  requêtes Groq simulées: {served['requests']} ({served['errors']} erreurs 500, "
+            f"{served['rate_limited']} réponses 429), {served['tokens']} tokens"
+        )
+        self._write_stage_percentiles(feedback_ids)
+
+    def _write_stage_percentiles(self, feedback_ids: list):
+        """p50/p95 par étape, relevés par les métriques de traitement du pipeline"""
+        if not settings.FEEDBACK_METRICS_ENABLED:
+            return
+        rows = FeedbackProcessingMetric.objects.filter(feedback_id__in=feedback_ids, succeeded=True)
+        for name, field in STAGE_FIELDS.items():
+            if name == 'queue_wait':
+                continue
+            values = sorted(value for value in rows.values_list(field, flat=True) if value is not None)
+            if values:
+                self.stdout.write(
+                    f"    {name:<13} p50 {_nearest_rank(values, 50)} ms, p95 {_nearest_rank(values, 95)} ms"
+                )
@@ -0,0 +1,30 @@
+"""
+Reconstruction des agrégats journaliers du tableau de bord à partir des feedbacks traités
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.feedback.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les agrégats journaliers (jour x département x langue x sentiment x thème) "
+        "à partir des feedbacks traités : initialisation, ou correction après une modification "
+        "hors ORM (update en masse, SQL direct)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help="Premier jour recalculé (AAAA-MM-JJ)")
+        parser.add_argument('--date-to', help="Dernier jour recalculé inclus (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for option in ('date_from', 'date_to'):
+            if options[option]:
+                dates[option] = parse_date(options[option])
+                if dates[option] is None:
+                    raise CommandError(f"Date invalide pour --{option.replace('_', '-')}: {options[option]}")
+
+        rows = rebuild_rollups(**dates)
+        self.stdout.write(self.style.SUCCESS(f"{rows} lignes d'agrégat reconstruites"))
@@ -0,0 +1,201 @@
+"""
+Retraitement en masse des feedbacks déjà analysés (changement de prompt ou de modèle)
+
+Les feedbacks sont lus par lots (pagination par clé created_at/feedback_id, sans
+curseur maintenu ouvert pendant les écritures), analysés en parallèle par un pool
+de threads (les quotas Groq partagés de llm_client s'appliquent à chaque appel)
+et la position est sauvegardée après chaque lot pour permettre la reprise.
+Les feedbacks verrouillés par un autre worker sont mémorisés dans le point de
+reprise et retentés en fin d'exécution (puis à l'exécution suivante s'il le faut).
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.feedback.models import Feedback
+from apps.feedback.services import process_feedback
+from apps.feedback.tasks import feedback_lock
+
+CHECKPOINT_KEY_PREFIX = 'reprocess-feedbacks:checkpoint'
+CHECKPOINT_TTL = 7 * 24 * 3600
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def _reprocess_one(feedback: Feedback) -> str:
+    """Relance l'analyse complète d'un feedback ; retourne 'ok', 'locked' ou 'failed'"""
+    with feedback_lock(feedback.feedback_id) as acquired:
+        if not acquired:
+            return 'locked'
+        try:
+            feedback.processing_stage = 'pending'
+            process_feedback(feedback)
+            return 'ok'
+        except Exception:
+            return 'failed'
+
+
+class Command(BaseCommand):
+    help = (
+        "Réanalyse les feedbacks déjà traités (sentiment et thème) après un changement de prompt "
+        "ou de modèle. Le cache d'analyse étant versionné par prompt et modèle, seuls les "
+        "résultats obsolètes repassent par Groq."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help="Date de création minimale (AAAA-MM-JJ)")
+        parser.add_argument('--date-to', help="Date de création maximale incluse (AAAA-MM-JJ)")
+        parser.add_argument('--department-id', help="UUID du département")
+        parser.add_argument('--language', choices=[code for code, _label in Feedback.LANGUAGE_CHOICES])
+        parser.add_argument('--method', help="Méthode d'analyse utilisée (ex: keyword_fallback, groq_api)")
+        parser.add_argument(
+            '--workers', type=int, default=settings.GROQ_MAX_CONCURRENCY,
+            help="Nombre de feedbacks analysés en parallèle"
+        )
+        parser.add_argument('--chunk-size', type=int, default=200, help="Taille des lots lus et sauvegardés")
+        parser.add_argument('--limit', type=int, help="Nombre maximal de feedbacks à retraiter dans cette exécution")
+        parser.add_argument('--restart', action='store_true', help="Ignore le point de reprise existant")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche le nombre de feedbacks concernés sans les traiter")
+
+    def handle(self, *args, **options):
+        filters = self._build_filters(options)
+        checkpoint_key = self._checkpoint_key(filters)
+
+        checkpoint = None if options['restart'] else cache.get(checkpoint_key)
+        if checkpoint:
+            self.stdout.write(
+                f"Reprise au feedback {checkpoint['last_id']} "
+                f"({checkpoint['done']} déjà retraités, {checkpoint['failed']} en échec)"
+            )
+        else:
+            # Borne haute figée : les feedbacks créés pendant le retraitement sont exclus
+            checkpoint = {
+                'cutoff': timezone.now().isoformat(),
+                'last_created_at': None,
+                'last_id': None,
+                'done': 0,
+                'failed': 0,
+                'deferred': [],
+            }
+        checkpoint.setdefault('deferred', [])
+
+        queryset = self._remaining_queryset(filters, checkpoint)
+        total = queryset.count()
+        remaining = min(total, options['limit']) if options['limit'] else total
+        self.stdout.write(
+            f"{remaining} feedbacks à retraiter, {len(checkpoint['deferred'])} verrouillés à retenter "
+            f"({options['workers']} workers)"
+        )
+        if options['dry_run'] or not (remaining or checkpoint['deferred']):
+            return
+
+        chunk_size = max(options['chunk_size'], 1)
+        processed = 0
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            while processed < remaining:
+                chunk = list(
+                    self._remaining_queryset(filters, checkpoint)
+                    .select_related('theme')[:min(chunk_size, remaining - processed)]
+                )
+                if not chunk:
+                    break
+
+                outcomes = list(executor.map(_reprocess_one, chunk))
+                processed += len(chunk)
+                checkpoint['done'] += outcomes.count('ok')
+                checkpoint['failed'] += outcomes.count('failed')
+                checkpoint['deferred'] += [
+                    str(feedback.feedback_id) for feedback, outcome in zip(chunk, outcomes) if outcome == 'locked'
+                ]
+                # Le lot est terminé (verrouillés mis de côté) : le point de reprise avance après son dernier feedback
+                checkpoint['last_created_at'] = chunk[-1].created_at.isoformat()
+                checkpoint['last_id'] = str(chunk[-1].feedback_id)
+                cache.set(checkpoint_key, checkpoint, timeout=CHECKPOINT_TTL)
+
+                elapsed = time.monotonic() - start
+                throughput = processed / elapsed if elapsed else 0.0
+                eta = (remaining - processed) / throughput if throughput else 0.0
+                self.stdout.write(
+                    f"{processed}/{remaining} ({processed * 100 // remaining}%) - "
+                    f"{throughput:.2f} feedbacks/s - ETA {_format_duration(eta)} - "
+                    f"{outcomes.count('failed')} échecs, {outcomes.count('locked')} verrouillés dans ce lot"
+                )
+
+            if checkpoint['deferred']:
+                self._retry_deferred(executor, filters, checkpoint, checkpoint_key)
+
+        if processed >= total and not checkpoint['deferred']:
+            cache.delete(checkpoint_key)
+        self.stdout.write(self.style.SUCCESS(
+            f"Retraitement terminé: {processed} feedbacks en {_format_duration(time.monotonic() - start)} "
+            f"({checkpoint['done']} réussis, {checkpoint['failed']} en échec)"
+        ))
+        if checkpoint['deferred']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(checkpoint['deferred'])} feedbacks toujours en cours de traitement par un autre worker : "
+                "relancer la commande pour les retraiter"
+            ))
+
+    def _retry_deferred(self, executor, filters: dict, checkpoint: dict, checkpoint_key: str):
+        """Nouvelle tentative sur les feedbacks verrouillés pendant leur lot ; ceux encore verrouillés restent en attente"""
+        feedbacks = list(
+            Feedback.objects.filter(feedback_id__in=checkpoint['deferred'], **filters).select_related('theme')
+        )
+        outcomes = list(executor.map(_reprocess_one, feedbacks))
+        checkpoint['done'] += outcomes.count('ok')
+        checkpoint['failed'] += outcomes.count('failed')
+        checkpoint['deferred'] = [
+            str(feedback.feedback_id) for feedback, outcome in zip(feedbacks, outcomes) if outcome == 'locked'
+        ]
+        cache.set(checkpoint_key, checkpoint, timeout=CHECKPOINT_TTL)
+        self.stdout.write(
+            f"{len(feedbacks)} feedbacks verrouillés retentés: {outcomes.count('ok')} réussis, "
+            f"{len(checkpoint['deferred'])} toujours verrouillés"
+        )
+
+    def _build_filters(self, options) -> dict:
+        filters = {'is_processed': True}
+        for option, lookup in (('date_from', 'created_at__date__gte'), ('date_to', 'created_at__date__lte')):
+            if options[option]:
+                if parse_date(options[option]) is None:
+                    raise CommandError(f"Date invalide pour --{option.replace('_', '-')}: {options[option]}")
+                filters[lookup] = options[option]
+        if options['department_id']:
+            filters['department_id'] = options['department_id']
+        if options['language']:
+            filters['language'] = options['language']
+        if options['method']:
+            filters['analysis_method'] = options['method']
+        return filters
+
+    def _checkpoint_key(self, filters: dict) -> str:
+        """Un point de reprise par combinaison de filtres"""
+        digest = hashlib.sha256(json.dumps(filters, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return f'{CHECKPOINT_KEY_PREFIX}:{digest}'
+
+    def _remaining_queryset(self, filters: dict, checkpoint: dict):
+        queryset = Feedback.objects.filter(
+            created_at__lte=datetime.fromisoformat(checkpoint['cutoff']), **filters
+        ).order_by('created_at', 'feedback_id')
+        if checkpoint['last_id']:
+            last_created_at = datetime.fromisoformat(checkpoint['last_created_at'])
+            queryset = queryset.filter(
+                Q(created_at__gt=last_created_at)
+                | Q(created_at=last_created_at, feedback_id__gt=checkpoint['last_id'])
+            )
+        return queryset
@@ -0,0 +1,223 @@
+"""
+Mesure des étapes du pipeline d'analyse des feedbacks
+Chaque traitement collecte ses durées par étape (attente en file, appels LLM,
+upsert du thème, sauvegarde) et ses tokens dans un collecteur porté par un
+ContextVar, puis écrit une ligne FeedbackProcessingMetric
+"""
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, F, FloatField
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Étape -> colonne de FeedbackProcessingMetric (durées en millisecondes)
+STAGE_FIELDS = {
+    'queue_wait': 'queue_wait_ms',
+    'sentiment': 'sentiment_ms',
+    'theme': 'theme_ms',
+    'combined': 'combined_ms',
+    'theme_upsert': 'theme_upsert_ms',
+    'save': 'save_ms',
+    'total': 'total_ms',
+}
+PERCENTILES = (50, 95, 99)
+
+_current = ContextVar('feedback_metrics', default=None)
+
+
+class MetricsCollector:
+    """Durées par étape et consommation LLM d'un traitement de feedback"""
+
+    def __init__(self):
+        self.stages = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.cache_hit = False
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_usage(self, prompt_tokens: int, completion_tokens: int, calls: int = 1):
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.llm_calls += calls
+
+    def add_share(self, other: 'MetricsCollector', parts: int):
+        """Ajoute la part 1/parts d'un collecteur partagé (appel LLM d'un lot)"""
+        for name, seconds in other.stages.items():
+            self.add_stage(name, seconds / parts)
+        self.add_usage(
+            round(other.prompt_tokens / parts), round(other.completion_tokens / parts),
+            calls=0
+        )
+
+
+@contextmanager
+def collecting(collector: MetricsCollector):
+    """Active un collecteur pour le code exécuté dans le bloc"""
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Chronomètre une étape dans le collecteur actif (sans effet hors collecte)"""
+    collector = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if collector is not None:
+            collector.add_stage(name, time.perf_counter() - start)
+
+
+def record_llm_usage(response):
+    """Ajoute les tokens d'une réponse LLM au collecteur actif"""
+    collector = _current.get()
+    usage = getattr(response, "usage", None)
+    if collector is None or usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0)
+    completion_tokens = getattr(usage, "completion_tokens", 0)
+    collector.add_usage(
+        prompt_tokens if isinstance(prompt_tokens, int) else 0,
+        completion_tokens if isinstance(completion_tokens, int) else 0
+    )
+
+
+def record_cache_hit():
+    """Marque le traitement actif comme servi par le cache d'analyse"""
+    collector = _current.get()
+    if collector is not None:
+        collector.cache_hit = True
+
+
+def queue_wait_seconds(feedback) -> float:
+    """Attente entre la création du feedback et le début de son premier traitement"""
+    if feedback.is_processed or feedback.processing_stage != 'pending':
+        # Retraitement ou reprise : l'âge du feedback n'est pas une attente en file
+        return None
+    return max((timezone.now() - feedback.created_at).total_seconds(), 0.0)
+
+
+def save_metrics(feedback, collector: MetricsCollector, mode: str, succeeded: bool, queue_wait: float = None):
+    """
+    Enregistre les mesures d'un traitement (les erreurs d'écriture ne bloquent jamais l'analyse)
+
+    Args:
+        feedback: Feedback traité
+        collector: Collecteur du traitement
+        mode: Mode d'analyse (separate, combined, batch)
+        succeeded: Traitement terminé sans erreur
+        queue_wait: Attente en file en secondes, si mesurable
+    """
+    if not settings.FEEDBACK_METRICS_ENABLED:
+        return
+
+    from .models import FeedbackProcessingMetric
+
+    stages = dict(collector.stages)
+    if queue_wait is not None:
+        stages['queue_wait'] = queue_wait
+    durations = {
+        field: round(stages[name] * 1000) for name, field in STAGE_FIELDS.items() if name in stages
+    }
+    try:
+        FeedbackProcessingMetric.objects.create(
+            feedback_id=feedback.feedback_id,
+            analysis_mode=mode,
+            analysis_method=feedback.analysis_method or '',
+            succeeded=succeeded,
+            prompt_tokens=collector.prompt_tokens,
+            completion_tokens=collector.completion_tokens,
+            llm_calls=collector.llm_calls,
+            cache_hit=collector.cache_hit,
+            **durations
+        )
+    except Exception as e:
+        logger.warning(f"Enregistrement des métriques du feedback {feedback.feedback_id} impossible: {e}")
+
+
+class PercentileCont(Aggregate):
+    """PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY expr), PostgreSQL"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+def _nearest_rank(values: list, percentile: int):
+    if not values:
+        return None
+    return values[max(0, math.ceil(len(values) * percentile / 100) - 1)]
+
+
+def get_stage_percentiles(hours: int = 24, mode: str = None) -> dict:
+    """
+    p50/p95/p99 des durées par étape (et des tokens) sur la période demandée
+
+    Args:
+        hours: Fenêtre d'observation en heures
+        mode: Restreint à un mode d'analyse (separate, combined, batch)
+
+    Returns:
+        dict: Statistiques par étape en millisecondes
+    """
+    from .models import FeedbackProcessingMetric
+
+    recent = FeedbackProcessingMetric.objects.filter(created_at__gte=timezone.now() - timedelta(hours=hours))
+    if mode:
+        recent = recent.filter(analysis_mode=mode)
+    queryset = recent.filter(succeeded=True).annotate(total_tokens=F('prompt_tokens') + F('completion_tokens'))
+
+    columns = {**STAGE_FIELDS, 'tokens': 'total_tokens'}
+    stats = {}
+    for name, field in columns.items():
+        measured = queryset.filter(**{f'{field}__isnull': False})
+        if connection.vendor == 'postgresql':
+            aggregates = measured.aggregate(
+                count=Count('pk'), avg=Avg(field),
+                **{f'p{p}': PercentileCont(field, p / 100) for p in PERCENTILES}
+            )
+        else:
+            values = sorted(measured.values_list(field, flat=True))
+            aggregates = {
+                'count': len(values),
+                'avg': sum(values) / len(values) if values else None,
+                **{f'p{p}': _nearest_rank(values, p) for p in PERCENTILES}
+            }
+        stats[name] = {
+            key: round(value, 1) if isinstance(value, float) else value for key, value in aggregates.items()
+        }
+
+    return {
+        "window_hours": hours,
+        "mode": mode,
+        "feedbacks": queryset.count(),
+        "failures": recent.filter(succeeded=False).count(),
+        "cache_hits": queryset.filter(cache_hit=True).count(),
+        "stages_ms": {name: stats[name] for name in STAGE_FIELDS},
+        "tokens": stats['tokens'],
+    }
+
+
+def purge_old_metrics() -> int:
+    """Supprime les mesures plus anciennes que FEEDBACK_METRICS_RETENTION_DAYS"""
+    from .models import FeedbackProcessingMetric
+
+    cutoff = timezone.now() - timedelta(days=settings.FEEDBACK_METRICS_RETENTION_DAYS)
+    deleted, _details = FeedbackProcessingMetric.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
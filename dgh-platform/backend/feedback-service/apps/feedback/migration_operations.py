@@ -0,0 +1,52 @@
+"""
+Opérations de migration des index des tables chaudes (feedbacks, rendez-vous, rappels)
+Sous PostgreSQL, CREATE / DROP INDEX CONCURRENTLY : les écritures ne sont pas bloquées
+pendant la construction (migration atomic = False). Ailleurs (SQLite de développement
+et des tests), opérations classiques.
+"""
+from django.contrib.postgres import operations as postgres_operations
+from django.db.migrations.operations import AddIndex, RemoveIndex
+
+
+def _is_postgresql(schema_editor) -> bool:
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+class AddIndexConcurrently(postgres_operations.AddIndexConcurrently):
+    """AddIndex en CREATE INDEX CONCURRENTLY sous PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(postgres_operations.RemoveIndexConcurrently):
+    """RemoveIndex en DROP INDEX CONCURRENTLY sous PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class TrigramExtension(postgres_operations.TrigramExtension):
+    """Extension pg_trgm, ignorée hors PostgreSQL dans les deux sens (l'original interroge pg_extension au retour)"""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_create_default_departments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='analysis_method',
+            field=models.CharField(blank=True, help_text="Méthode d'analyse (groq_api, keyword_fallback...)", max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='analysis_mode',
+            field=models.CharField(blank=True, choices=[('separate', 'Sentiment et thème séparés'), ('combined', 'Sentiment et thème combinés'), ('batch', 'Micro-lot')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='processing_time_seconds',
+            field=models.FloatField(blank=True, help_text="Durée de l'analyse (secondes)", null=True),
+        ),
+    ]
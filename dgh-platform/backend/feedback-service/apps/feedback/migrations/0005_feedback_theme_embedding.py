@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0004_feedback_analysis_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackThemeEmbedding',
+            fields=[
+                ('theme', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='feedback.feedbacktheme')),
+                ('embedding_model', models.CharField(help_text='Modèle ayant produit les vecteurs', max_length=100)),
+                ('centroid', models.JSONField(help_text='Moyenne des vecteurs des feedbacks du thème')),
+                ('sample_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Feedback Theme Embedding',
+                'verbose_name_plural': 'Feedback Theme Embeddings',
+                'db_table': 'feedback_theme_embeddings',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+def mark_processed_feedbacks_completed(apps, schema_editor):
+    """Les feedbacks déjà traités sont à l'étape finale"""
+    Feedback = apps.get_model('feedback', 'Feedback')
+    Feedback.objects.filter(is_processed=True).update(processing_stage='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0005_feedback_theme_embedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='processing_stage',
+            field=models.CharField(choices=[('pending', 'En attente'), ('sentiment_done', 'Sentiment analysé'), ('theme_done', 'Thème assigné'), ('completed', 'Terminé')], default='pending', help_text="Dernière étape d'analyse sauvegardée (reprise après échec)", max_length=20),
+        ),
+        migrations.RunPython(mark_processed_feedbacks_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:08
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0006_feedback_processing_stage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackOutbox',
+            fields=[
+                ('outbox_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0, help_text='Tentatives de publication échouées')),
+                ('last_error', models.TextField(blank=True)),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entries', to='feedback.feedback')),
+            ],
+            options={
+                'verbose_name': 'Feedback Outbox Entry',
+                'verbose_name_plural': 'Feedback Outbox',
+                'db_table': 'feedback_outbox',
+                'indexes': [models.Index(fields=['published_at', 'created_at'], name='feedback_ou_publish_ae97e9_idx')],
+            },
+        ),
+    ]
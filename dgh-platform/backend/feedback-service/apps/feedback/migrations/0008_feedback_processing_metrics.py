@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0007_feedback_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackProcessingMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('analysis_mode', models.CharField(max_length=20)),
+                ('analysis_method', models.CharField(blank=True, max_length=50)),
+                ('succeeded', models.BooleanField(default=True)),
+                ('queue_wait_ms', models.IntegerField(blank=True, help_text='Création du feedback -> début du traitement', null=True)),
+                ('sentiment_ms', models.IntegerField(blank=True, null=True)),
+                ('theme_ms', models.IntegerField(blank=True, null=True)),
+                ('combined_ms', models.IntegerField(blank=True, null=True)),
+                ('theme_upsert_ms', models.IntegerField(blank=True, null=True)),
+                ('save_ms', models.IntegerField(blank=True, null=True)),
+                ('total_ms', models.IntegerField(blank=True, null=True)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('llm_calls', models.IntegerField(default=0)),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_metrics', to='feedback.feedback')),
+            ],
+            options={
+                'verbose_name': 'Feedback Processing Metric',
+                'verbose_name_plural': 'Feedback Processing Metrics',
+                'db_table': 'feedback_processing_metrics',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0008_feedback_processing_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('department_id', models.UUIDField()),
+                ('language', models.CharField(max_length=10)),
+                ('sentiment', models.CharField(max_length=20)),
+                ('feedback_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('theme', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='feedback.feedbacktheme')),
+            ],
+            options={
+                'verbose_name': 'Feedback Daily Rollup',
+                'verbose_name_plural': 'Feedback Daily Rollups',
+                'db_table': 'feedback_daily_rollups',
+                'constraints': [models.UniqueConstraint(fields=('day', 'department_id', 'language', 'sentiment', 'theme'), name='feedback_rollup_unique_key'), models.UniqueConstraint(condition=models.Q(('theme__isnull', True)), fields=('day', 'department_id', 'language', 'sentiment'), name='feedback_rollup_unique_key_no_theme')],
+            },
+        ),
+    ]
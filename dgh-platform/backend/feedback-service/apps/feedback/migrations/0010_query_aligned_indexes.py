@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+from apps.feedback.migration_operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Index construits sans bloquer les écritures (CONCURRENTLY, hors transaction)
+    atomic = False
+
+    dependencies = [
+        ('feedback', '0009_feedback_daily_rollups'),
+    ]
+
+    operations = [
+        # Nouveaux index d'abord : les requêtes ne restent jamais sans index
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['scheduled_date', 'time', 'appointment_id'], name='appt_date_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['patient_id', 'scheduled_date', 'time', 'appointment_id'], name='appt_patient_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['professional_id', 'scheduled_date', 'time', 'appointment_id'], name='appt_professional_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['scheduled_date', 'time', 'appointment_id'], name='appt_upcoming_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['-created_at', '-feedback_id'], name='feedback_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['patient_id', '-created_at', '-feedback_id'], name='feedback_patient_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['department_id', 'created_at'], name='feedback_dept_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['theme', '-created_at', '-feedback_id'], name='feedback_theme_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('is_processed', False)), fields=['created_at'], name='feedback_unprocessed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['scheduled_time', 'reminder_id'], name='reminder_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(fields=['patient_id', 'scheduled_time', 'reminder_id'], name='reminder_patient_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['scheduled_time', 'reminder_id'], name='reminder_pending_time_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='appointment',
+            name='appointment_patient_75a4eb_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='appointment',
+            name='appointment_profess_480d0b_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='appointment',
+            name='appointment_schedul_8c112d_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='feedback',
+            name='feedbacks_patient_eb3a37_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='feedback',
+            name='feedbacks_created_1c526e_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='reminder',
+            name='reminders_patient_f08f32_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='reminder',
+            name='reminders_schedul_f9839e_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='reminder',
+            name='reminders_status_9617ae_idx',
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:34
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.feedback.migration_operations import TrigramExtension
+
+# Configuration de recherche selon la langue du feedback (langues locales : 'simple', sans racinisation)
+SEARCH_VECTOR_SQL = """
+to_tsvector(
+    CASE {language} WHEN 'fr' THEN 'french'::regconfig WHEN 'en' THEN 'english'::regconfig
+    ELSE 'simple'::regconfig END,
+    coalesce({description}, '')
+)
+"""
+
+CREATE_TRIGGER_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION feedbacks_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format(language='NEW.language', description='NEW.description')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER feedbacks_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF description, language ON feedbacks
+    FOR EACH ROW EXECUTE FUNCTION feedbacks_search_vector_update()
+    """,
+]
+
+DROP_TRIGGER_SQL = [
+    "DROP TRIGGER IF EXISTS feedbacks_search_vector_trigger ON feedbacks",
+    "DROP FUNCTION IF EXISTS feedbacks_search_vector_update()",
+]
+
+# Index GIN construits sans bloquer les écritures (hors transaction)
+CREATE_INDEX_SQL = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS feedback_search_vector_idx ON feedbacks USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS feedback_description_trgm_idx "
+    "ON feedbacks USING gin (description gin_trgm_ops)",
+]
+
+DROP_INDEX_SQL = [
+    "DROP INDEX CONCURRENTLY IF EXISTS feedback_description_trgm_idx",
+    "DROP INDEX CONCURRENTLY IF EXISTS feedback_search_vector_idx",
+]
+
+# Remplissage par tranches : chaque UPDATE est validé seul (migration non atomique)
+BACKFILL_BATCH_SIZE = 5000
+BACKFILL_SQL = f"""
+UPDATE feedbacks SET search_vector = {SEARCH_VECTOR_SQL.format(language='language', description='description')}
+WHERE feedback_id IN (SELECT feedback_id FROM feedbacks WHERE search_vector IS NULL LIMIT %s)
+"""
+
+
+def _run_on_postgresql(statements):
+    """Trigger et index GIN propres à PostgreSQL : rien à faire sous SQLite (repli icontains)"""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Calcule search_vector des feedbacks existants (les nouveaux passent par le trigger)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(BACKFILL_SQL, [BACKFILL_BATCH_SIZE])
+            if cursor.rowcount < BACKFILL_BATCH_SIZE:
+                break
+
+
+class Migration(migrations.Migration):
+    # CREATE / DROP INDEX CONCURRENTLY et remplissage par tranches : hors transaction
+    atomic = False
+
+    dependencies = [
+        ('feedback', '0010_query_aligned_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='feedback',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(_run_on_postgresql(CREATE_TRIGGER_SQL), _run_on_postgresql(DROP_TRIGGER_SQL)),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(_run_on_postgresql(CREATE_INDEX_SQL), _run_on_postgresql(DROP_INDEX_SQL)),
+    ]
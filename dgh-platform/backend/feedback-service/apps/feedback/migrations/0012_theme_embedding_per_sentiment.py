@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Centroïdes recréés par (thème, sentiment) : les anciens mélangeaient les sentiments
+    # (ils se reconstruisent à mesure que Groq classe de nouveaux feedbacks)
+
+    dependencies = [
+        ('feedback', '0011_feedback_search_vector'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='FeedbackThemeEmbedding',
+        ),
+        migrations.CreateModel(
+            name='FeedbackThemeEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sentiment', models.CharField(max_length=20)),
+                ('embedding_model', models.CharField(help_text='Modèle ayant produit les vecteurs', max_length=100)),
+                ('centroid', models.JSONField(help_text='Moyenne des vecteurs des feedbacks du thème')),
+                ('sample_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('theme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='feedback.feedbacktheme')),
+            ],
+            options={
+                'verbose_name': 'Feedback Theme Embedding',
+                'verbose_name_plural': 'Feedback Theme Embeddings',
+                'db_table': 'feedback_theme_embeddings',
+                'constraints': [models.UniqueConstraint(fields=('theme', 'sentiment'), name='feedback_theme_embedding_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0012_theme_embedding_per_sentiment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='processing_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Traitements en échec (ignoré par le drainage au-delà de FEEDBACK_MAX_PROCESSING_ATTEMPTS)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0013_feedback_processing_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackprocessingmetric',
+            name='cache_hit',
+            field=models.BooleanField(default=False, help_text="Analyse reprise du cache (analysis_method d'origine conservée)"),
+        ),
+    ]
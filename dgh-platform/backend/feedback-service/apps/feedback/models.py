@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 import uuid
 
@@ -36,6 +37,52 @@ class FeedbackTheme(models.Model):
         return self.theme_name[:50]
 
 
+class FeedbackThemeEmbedding(models.Model):
+    """
+    Centroïde des embeddings des feedbacks assignés à un thème, par sentiment (index local de thèmes)
+
+    Un feedback n'est comparé qu'aux centroïdes de son sentiment : les embeddings ne
+    distinguent pas "très bien" de "pas très bien".
+    """
+    theme = models.ForeignKey(FeedbackTheme, on_delete=models.CASCADE, related_name='embeddings')
+    sentiment = models.CharField(max_length=20)
+    embedding_model = models.CharField(max_length=100, help_text="Modèle ayant produit les vecteurs")
+    centroid = models.JSONField(help_text="Moyenne des vecteurs des feedbacks du thème")
+    sample_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'feedback_theme_embeddings'
+        verbose_name = 'Feedback Theme Embedding'
+        verbose_name_plural = 'Feedback Theme Embeddings'
+        constraints = [
+            models.UniqueConstraint(fields=['theme', 'sentiment'], name='feedback_theme_embedding_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Embedding {self.theme_id} / {self.sentiment} ({self.sample_count})"
+
+
+class FeedbackQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, single_job=False, **kwargs):
+        """
+        bulk_create ne déclenche aucun signal : l'outbox, les agrégats et les versions ETag
+        sont traités ici dans la même transaction
+        (single_job=True : analyse des feedbacks créés publiée en une seule tâche batch)
+        """
+        from .etags import bump_feedback_versions
+        from .outbox import record_outbox_entries
+        from .rollups import sync_feedback_rollups
+        
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            record_outbox_entries(created, single_job=single_job)
+            for feedback in created:
+                sync_feedback_rollups(None, feedback)
+            bump_feedback_versions({feedback.patient_id for feedback in created})
+        return created
+
+
 class Feedback(models.Model):
     LANGUAGE_CHOICES = [
         ('fr', 'Français'),
@@ -85,21 +132,155 @@ class Feedback(models.Model):
     # Métadonnées de traitement
     is_processed = models.BooleanField(default=False)
     processed_at = models.DateTimeField(null=True, blank=True)
+    analysis_mode = models.CharField(max_length=20, choices=[
+        ('separate', 'Sentiment et thème séparés'),
+        ('combined', 'Sentiment et thème combinés'),
+        ('batch', 'Micro-lot'),
+    ], null=True, blank=True)
+    analysis_method = models.CharField(max_length=30, null=True, blank=True, help_text="Méthode d'analyse (groq_api, keyword_fallback...)")
+    processing_time_seconds = models.FloatField(null=True, blank=True, help_text="Durée de l'analyse (secondes)")
+    processing_stage = models.CharField(max_length=20, choices=[
+        ('pending', 'En attente'),
+        ('sentiment_done', 'Sentiment analysé'),
+        ('theme_done', 'Thème assigné'),
+        ('completed', 'Terminé'),
+    ], default='pending', help_text="Dernière étape d'analyse sauvegardée (reprise après échec)")
+    processing_attempts = models.PositiveIntegerField(
+        default=0, help_text="Traitements en échec (ignoré par le drainage au-delà de FEEDBACK_MAX_PROCESSING_ATTEMPTS)"
+    )
+
+    # Recherche plein texte : tsvector de la description, tenu à jour par trigger PostgreSQL (voir search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         db_table = 'feedbacks'
         verbose_name = 'Feedback'
         verbose_name_plural = 'Feedbacks'
         ordering = ['-created_at']
+        # Index alignés sur les requêtes : listes paginées par (created_at, feedback_id),
+        # filtres patient / département / thème + période, file des feedbacks non traités
         indexes = [
-            models.Index(fields=['patient_id']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', '-feedback_id'], name='feedback_created_id_idx'),
+            models.Index(fields=['patient_id', '-created_at', '-feedback_id'], name='feedback_patient_created_idx'),
+            models.Index(fields=['department_id', 'created_at'], name='feedback_dept_created_idx'),
+            models.Index(fields=['theme', '-created_at', '-feedback_id'], name='feedback_theme_created_idx'),
+            models.Index(
+                fields=['created_at'], condition=models.Q(is_processed=False), name='feedback_unprocessed_idx'
+            ),
         ]
+        # PostgreSQL uniquement (migration 0011) : GIN sur search_vector, GIN gin_trgm_ops sur description
+    
+    objects = FeedbackQuerySet.as_manager()
     
     def __str__(self):
         return f"Feedback {self.feedback_id} - {self.input_type}"
+    
+    def save(self, *args, **kwargs):
+        """
+        À la création, l'entrée d'outbox est écrite dans la même transaction que le feedback ;
+        les agrégats journaliers suivent chaque changement d'un champ compté d'un feedback traité
+        """
+        from .outbox import record_outbox_entries
+        from .rollups import COUNTED_FIELDS, counted_state, sync_feedback_rollups, written_counted_fields
+        
+        creating = self._state.adding
+        fields = COUNTED_FIELDS if creating else written_counted_fields(self, kwargs.get('update_fields'))
+        if not fields:
+            # Sauvegarde d'étape (processing_stage, scores...) : agrégats inchangés, ni transaction ni verrou
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = None if creating else counted_state(self.pk)
+            super().save(*args, **kwargs)
+            if creating:
+                record_outbox_entries([self])
+            sync_feedback_rollups(previous, self, fields)
+
+
+class FeedbackOutbox(models.Model):
+    """Feedback à publier vers Celery, écrit dans la transaction de création du feedback"""
+    outbox_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='outbox_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0, help_text="Tentatives de publication échouées")
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'feedback_outbox'
+        verbose_name = 'Feedback Outbox Entry'
+        verbose_name_plural = 'Feedback Outbox'
+        indexes = [
+            models.Index(fields=['published_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Outbox {self.feedback_id} ({'publié' if self.published_at else 'en attente'})"
 
 
+
+class FeedbackProcessingMetric(models.Model):
+    """Durées par étape (ms) et consommation LLM d'un traitement de feedback"""
+    feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='processing_metrics')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    analysis_mode = models.CharField(max_length=20)
+    analysis_method = models.CharField(max_length=50, blank=True)
+    succeeded = models.BooleanField(default=True)
+    queue_wait_ms = models.IntegerField(null=True, blank=True, help_text="Création du feedback -> début du traitement")
+    sentiment_ms = models.IntegerField(null=True, blank=True)
+    theme_ms = models.IntegerField(null=True, blank=True)
+    combined_ms = models.IntegerField(null=True, blank=True)
+    theme_upsert_ms = models.IntegerField(null=True, blank=True)
+    save_ms = models.IntegerField(null=True, blank=True)
+    total_ms = models.IntegerField(null=True, blank=True)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    llm_calls = models.IntegerField(default=0)
+    cache_hit = models.BooleanField(default=False, help_text="Analyse reprise du cache (analysis_method d'origine conservée)")
+    
+    class Meta:
+        db_table = 'feedback_processing_metrics'
+        verbose_name = 'Feedback Processing Metric'
+        verbose_name_plural = 'Feedback Processing Metrics'
+    
+    def __str__(self):
+        return f"Métriques {self.feedback_id} ({self.analysis_mode}, {self.total_ms} ms)"
+
+
+class FeedbackDailyRollup(models.Model):
+    """
+    Agrégat journalier des feedbacks traités (jour x département x langue x sentiment x thème),
+    maintenu à chaque sauvegarde d'un feedback : le tableau de bord ne lit que cette table
+    """
+    day = models.DateField()
+    department_id = models.UUIDField()
+    language = models.CharField(max_length=10)
+    sentiment = models.CharField(max_length=20)
+    theme = models.ForeignKey(FeedbackTheme, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rollups')
+    feedback_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'feedback_daily_rollups'
+        verbose_name = 'Feedback Daily Rollup'
+        verbose_name_plural = 'Feedback Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'department_id', 'language', 'sentiment', 'theme'],
+                name='feedback_rollup_unique_key'
+            ),
+            # NULL est distinct de NULL dans un index unique : clé sans thème contrainte à part
+            models.UniqueConstraint(
+                fields=['day', 'department_id', 'language', 'sentiment'],
+                condition=models.Q(theme__isnull=True),
+                name='feedback_rollup_unique_key_no_theme'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.department_id} {self.language} {self.sentiment}: {self.feedback_count}"
+
 class Appointment(models.Model):
     appointment_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     scheduled_date = models.DateField()
@@ -123,9 +304,14 @@ class Appointment(models.Model):
         verbose_name_plural = 'Appointments'
         ordering = ['scheduled_date', 'time']
         indexes = [
-            models.Index(fields=['patient_id']),
-            models.Index(fields=['professional_id']),
-            models.Index(fields=['scheduled_date']),
+            models.Index(fields=['scheduled_date', 'time', 'appointment_id'], name='appt_date_time_idx'),
+            models.Index(fields=['patient_id', 'scheduled_date', 'time', 'appointment_id'], name='appt_patient_date_idx'),
+            models.Index(fields=['professional_id', 'scheduled_date', 'time', 'appointment_id'], name='appt_professional_date_idx'),
+            models.Index(
+                fields=['scheduled_date', 'time', 'appointment_id'],
+                condition=models.Q(status__in=['scheduled', 'confirmed']),
+                name='appt_upcoming_idx'
+            ),
         ]
     
     def __str__(self):
@@ -160,9 +346,12 @@ class Reminder(models.Model):
         verbose_name_plural = 'Reminders'
         ordering = ['scheduled_time']
         indexes = [
-            models.Index(fields=['patient_id']),
-            models.Index(fields=['scheduled_time']),
-            models.Index(fields=['status']),
+            models.Index(fields=['scheduled_time', 'reminder_id'], name='reminder_time_idx'),
+            models.Index(fields=['patient_id', 'scheduled_time', 'reminder_id'], name='reminder_patient_time_idx'),
+            models.Index(
+                fields=['scheduled_time', 'reminder_id'], condition=models.Q(status='pending'),
+                name='reminder_pending_time_idx'
+            ),
         ]
     
     def __str__(self):
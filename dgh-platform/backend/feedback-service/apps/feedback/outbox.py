@@ -0,0 +1,167 @@
+"""
+Outbox transactionnelle des feedbacks à analyser
+Les entrées sont écrites dans la même transaction que le feedback, puis publiées
+vers Celery par lots après le commit ; une tâche périodique rattrape les oubliés
+"""
+import logging
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxPublishError(Exception):
+    """Échec de publication d'un lot d'outbox vers le broker"""
+
+
+def record_outbox_entries(feedbacks: list, single_job: bool = False):
+    """
+    Ajoute une entrée d'outbox par feedback non traité (à appeler dans la transaction du feedback)
+
+    Args:
+        feedbacks: Instances de feedback créées
+        single_job: Publier ces feedbacks en une seule tâche batch (import en masse)
+    """
+    from .models import FeedbackOutbox
+
+    entries = [FeedbackOutbox(feedback_id=feedback.feedback_id) for feedback in feedbacks if not feedback.is_processed]
+    if not entries:
+        return
+    FeedbackOutbox.objects.bulk_create(entries)
+
+    if settings.FEEDBACK_MICRO_BATCHING:
+        # Les feedbacks sont regroupés par la tâche de drainage périodique
+        logger.debug(f"{len(entries)} feedbacks en outbox, traitement différé au prochain micro-lot")
+        return
+    if single_job:
+        feedback_ids = [entry.feedback_id for entry in entries]
+        transaction.on_commit(partial(relay_outbox_after_commit, feedback_ids=feedback_ids, single_job=True))
+    else:
+        transaction.on_commit(relay_outbox_after_commit)
+
+
+def relay_outbox_after_commit(**kwargs):
+    """Publication immédiate après commit ; en cas d'échec la tâche périodique reprendra"""
+    try:
+        relay_outbox(**kwargs)
+    except Exception as e:
+        logger.error(f"Publication de l'outbox après commit impossible: {e}")
+
+
+def _locked_pending_entries(limit: int, min_age_seconds: int, feedback_ids: list = None) -> list:
+    """Entrées non publiées, verrouillées pour la transaction courante (SKIP LOCKED si supporté)"""
+    from .models import FeedbackOutbox
+
+    queryset = FeedbackOutbox.objects.filter(published_at__isnull=True)
+    if feedback_ids is not None:
+        queryset = queryset.filter(feedback_id__in=feedback_ids)
+    if min_age_seconds:
+        queryset = queryset.filter(created_at__lte=timezone.now() - timedelta(seconds=min_age_seconds))
+    if connection.features.has_select_for_update_skip_locked:
+        lock_options = {'skip_locked': True}
+        if connection.features.has_select_for_update_of:
+            lock_options['of'] = ('self',)
+        queryset = queryset.select_for_update(**lock_options)
+    return list(
+        queryset.order_by('created_at').values_list('outbox_id', 'feedback_id', 'feedback__rating', 'feedback__is_processed')[:limit]
+    )
+
+
+def get_feedback_priority(rating) -> int:
+    """Priorité Celery d'un feedback : les avis de 1-2 étoiles passent devant dans la file LLM"""
+    if rating is not None and rating <= settings.FEEDBACK_URGENT_MAX_RATING:
+        return settings.FEEDBACK_URGENT_PRIORITY
+    return settings.FEEDBACK_DEFAULT_PRIORITY
+
+
+def _publish(feedbacks: list, single_job: bool = False):
+    """
+    Publie les feedbacks par lots de FEEDBACK_BATCH_SIZE sur une seule connexion au broker
+
+    Les feedbacks urgents (note basse) forment leurs propres lots, publiés en premier avec une priorité haute.
+
+    Args:
+        feedbacks: Couples (feedback_id, rating)
+        single_job: Une seule tâche pour tous les feedbacks (envoi groupé), à la priorité
+            du plus urgent d'entre eux
+    """
+    from celery import current_app
+    from .tasks import process_feedback_async, process_feedback_batch_async
+
+    batch_size = max(settings.FEEDBACK_BATCH_SIZE, 1)
+    by_priority = {}
+    for feedback_id, rating in feedbacks:
+        by_priority.setdefault(get_feedback_priority(rating), []).append(str(feedback_id))
+    if single_job:
+        batch_size = max(len(feedbacks), 1)
+        by_priority = {min(by_priority): [str(feedback_id) for feedback_id, _rating in feedbacks]}
+
+    with current_app.producer_or_acquire() as producer:
+        for priority in sorted(by_priority):
+            feedback_ids = by_priority[priority]
+            for start in range(0, len(feedback_ids), batch_size):
+                chunk = feedback_ids[start:start + batch_size]
+                if len(chunk) == 1:
+                    process_feedback_async.apply_async(args=[chunk[0]], priority=priority, producer=producer)
+                else:
+                    process_feedback_batch_async.apply_async(args=[chunk], priority=priority, producer=producer)
+
+
+def relay_outbox(limit: int = None, min_age_seconds: int = 0, feedback_ids: list = None, single_job: bool = False) -> int:
+    """
+    Publie les entrées d'outbox en attente vers Celery
+
+    Args:
+        limit: Nombre maximal d'entrées traitées, par défaut OUTBOX_RELAY_LIMIT
+        min_age_seconds: Âge minimal des entrées (évite de doubler la publication après commit)
+        feedback_ids: Restreint la publication aux entrées de ces feedbacks
+        single_job: Publier ces feedbacks en une seule tâche batch (envoi groupé)
+
+    Returns:
+        int: Nombre d'entrées marquées comme publiées
+    """
+    from .models import FeedbackOutbox
+
+    limit = limit or max(settings.OUTBOX_RELAY_LIMIT, len(feedback_ids or []))
+    failed_ids = []
+    try:
+        with transaction.atomic():
+            entries = _locked_pending_entries(limit, min_age_seconds, feedback_ids)
+            if not entries:
+                return 0
+
+            outbox_ids = [outbox_id for outbox_id, _feedback_id, _rating, _processed in entries]
+            # Feedbacks déjà traités (micro-lot, retraitement) : rien à publier
+            to_publish = [
+                (feedback_id, rating) for _outbox_id, feedback_id, rating, processed in entries if not processed
+            ]
+            if to_publish:
+                try:
+                    _publish(to_publish, single_job)
+                except Exception as e:
+                    failed_ids = outbox_ids
+                    raise OutboxPublishError(str(e)) from e
+
+            FeedbackOutbox.objects.filter(outbox_id__in=outbox_ids).update(published_at=timezone.now())
+    except OutboxPublishError as e:
+        logger.error(f"Publication de {len(failed_ids)} entrées d'outbox impossible: {e}")
+        FeedbackOutbox.objects.filter(outbox_id__in=failed_ids).update(
+            attempts=F('attempts') + 1, last_error=str(e)[:500]
+        )
+        return 0
+
+    logger.info(f"Outbox: {len(outbox_ids)} entrées publiées ({len(to_publish)} feedbacks envoyés à Celery)")
+    return len(outbox_ids)
+
+
+def purge_published_entries() -> int:
+    """Supprime les entrées publiées depuis plus de OUTBOX_RETENTION_HOURS"""
+    from .models import FeedbackOutbox
+
+    cutoff = timezone.now() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    deleted, _details = FeedbackOutbox.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,160 @@
+"""
+Pagination par clé (keyset) des listes de l'API
+Un curseur opaque encode la position (valeurs des champs de tri, clé primaire
+comprise) du dernier élément renvoyé : la page suivante est lue par l'index,
+sans OFFSET ni COUNT, et reste stable quand de nouvelles lignes arrivent.
+"""
+import base64
+import json
+import uuid
+from datetime import date, datetime, time
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible ou falsifié"""
+
+
+def encode_cursor(feedback) -> str:
+    """Curseur désignant la position juste après ce feedback (ordre created_at, feedback_id décroissants)"""
+    position = {'created_at': feedback.created_at.isoformat(), 'feedback_id': str(feedback.feedback_id)}
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, feedback_id) encodés dans un curseur"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(position['created_at']), uuid.UUID(position['feedback_id'])
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise InvalidCursor(f"Curseur invalide: {cursor}") from e
+
+
+def after_cursor(queryset, cursor: str):
+    """Feedbacks situés après le curseur dans l'ordre (-created_at, -feedback_id)"""
+    created_at, feedback_id = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, feedback_id__lt=feedback_id)
+    )
+
+
+def _reverse_ordering(ordering: tuple) -> tuple:
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _after_position(ordering: tuple, values: list) -> Q:
+    """Lignes strictement après `values` dans l'ordre lexicographique `ordering`"""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination positionnée sur tous les champs de tri
+
+    La pagination curseur de DRF ne retient que le premier champ de tri et saute
+    les ex aequo par OFFSET ; ici la position contient chaque champ du tri,
+    complété par la clé primaire, d'où une pagination exacte par l'index.
+    Le tri choisi via ?ordering= (OrderingFilter) est respecté.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in (pk_name, 'pk') for field in ordering):
+            # Départage stable des ex aequo par la clé primaire (UUID), dans le sens du premier champ
+            ordering = (*ordering, f'-{pk_name}' if ordering[0].startswith('-') else pk_name)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            try:
+                queryset = queryset.filter(_after_position(ordering, self._decode_position(self.cursor.position)))
+            except (TypeError, ValueError, ValidationError):
+                # Valeurs incompatibles avec les champs du tri : curseur émis pour un autre ?ordering=
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            # Page précédente : la suite existe forcément (on en vient)
+            self.has_next, self.has_previous = self.cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def _decode_position(self, position: str) -> list:
+        try:
+            values = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            # Curseur émis pour un autre tri
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _position(self, instance) -> str:
+        return json.dumps([_json_value(getattr(instance, field.lstrip('-'))) for field in self.ordering])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+
+class FeedbackCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-feedback_id')
+
+
+class AppointmentCursorPagination(KeysetCursorPagination):
+    ordering = ('scheduled_date', 'time', 'appointment_id')
+
+
+class ReminderCursorPagination(KeysetCursorPagination):
+    ordering = ('scheduled_time', 'reminder_id')
+
+
+class FeedbackSearchPagination(LimitOffsetPagination):
+    """Résultats classés par pertinence (rang non stable comme clé) : pagination ?limit=&offset="""
+    default_limit = settings.API_PAGE_SIZE
+    max_limit = settings.API_MAX_PAGE_SIZE
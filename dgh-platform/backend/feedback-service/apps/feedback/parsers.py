@@ -0,0 +1,31 @@
+"""
+Parsers additionnels de l'API feedback
+"""
+import json
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Flux NDJSON (un objet JSON par ligne), utilisé par les bornes pour l'envoi
+    groupé des feedbacks collectés hors ligne. Les lignes vides sont ignorées.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        items = []
+        for line_number, raw_line in enumerate(stream, start=1):
+            try:
+                line = raw_line.decode(encoding).strip() if isinstance(raw_line, bytes) else raw_line.strip()
+                if not line:
+                    continue
+                items.append(json.loads(line))
+            except ValueError as e:
+                # UnicodeDecodeError compris (ligne hors de l'encodage annoncé)
+                raise ParseError(f"NDJSON invalide à la ligne {line_number}: {e}")
+        return items
@@ -0,0 +1,12 @@
+"""
+Accès à la connexion Redis brute du cache Django (scripts Lua, verrous, pub/sub, index)
+"""
+
+
+def get_redis():
+    """Retourne la connexion Redis brute, ou None si le backend de cache n'est pas Redis"""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
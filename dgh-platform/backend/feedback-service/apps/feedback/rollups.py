@@ -0,0 +1,218 @@
+"""
+Agrégats journaliers des feedbacks traités pour le tableau de bord
+Chaque sauvegarde d'un feedback qui écrit un champ compté retire sa contribution précédente
+et ajoute la nouvelle (dans la transaction de la sauvegarde) : les requêtes du tableau de bord restent
+proportionnelles au nombre de jours, pas au nombre de feedbacks.
+"""
+import logging
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Champs du feedback qui déterminent sa ligne d'agrégat et sa contribution
+COUNTED_FIELDS = ('is_processed', 'created_at', 'department_id', 'language', 'sentiment', 'theme_id', 'rating')
+
+
+def counted_state(feedback_id) -> dict:
+    """État enregistré d'un feedback, verrouillé jusqu'à la fin de la transaction (None s'il n'existe pas)"""
+    from .models import Feedback
+
+    return Feedback.objects.select_for_update().filter(pk=feedback_id).values(*COUNTED_FIELDS).first()
+
+
+def written_counted_fields(feedback, update_fields=None) -> tuple:
+    """Champs comptés écrits par une sauvegarde : tous sans update_fields, sinon ceux de la liste"""
+    if update_fields is None:
+        return COUNTED_FIELDS
+    written = {feedback._meta.get_field(name).attname for name in update_fields}
+    return tuple(field for field in COUNTED_FIELDS if field in written)
+
+
+def _contribution(state: dict):
+    """(clé d'agrégat, note) d'un feedback, ou None s'il n'est pas compté"""
+    if not state or not state['is_processed'] or not state['sentiment']:
+        return None
+    key = (
+        timezone.localdate(state['created_at']), state['department_id'],
+        state['language'], state['sentiment'], state['theme_id']
+    )
+    return key, state['rating']
+
+
+def _apply_delta(key: tuple, count: int, rating: int):
+    """Ajoute count feedbacks et rating points à une ligne d'agrégat (créée au besoin)"""
+    from .models import FeedbackDailyRollup
+
+    day, department_id, language, sentiment, theme_id = key
+    lookup = {
+        'day': day, 'department_id': department_id, 'language': language,
+        'sentiment': sentiment, 'theme_id': theme_id,
+    }
+    changes = {
+        'feedback_count': F('feedback_count') + count,
+        'rating_sum': F('rating_sum') + rating,
+        'updated_at': timezone.now(),
+    }
+    if FeedbackDailyRollup.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            FeedbackDailyRollup.objects.create(**lookup, feedback_count=count, rating_sum=rating)
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre transaction
+        FeedbackDailyRollup.objects.filter(**lookup).update(**changes)
+
+
+def sync_feedback_rollups(previous: dict, feedback, fields: tuple = COUNTED_FIELDS):
+    """
+    Répercute la sauvegarde d'un feedback sur les agrégats (à appeler dans sa transaction)
+
+    Args:
+        previous: État enregistré avant la sauvegarde (counted_state), None à la création
+        feedback: Instance sauvegardée
+        fields: Champs comptés écrits par la sauvegarde ; les autres gardent leur valeur enregistrée
+    """
+    before = _contribution(previous)
+    after = _contribution({**(previous or {}), **{field: getattr(feedback, field) for field in fields}})
+    if before == after:
+        return
+    if before:
+        _apply_delta(before[0], -1, -before[1])
+    if after:
+        _apply_delta(after[0], 1, after[1])
+
+
+def remove_feedback_from_rollups(feedback):
+    """
+    Retire des agrégats un feedback sur le point d'être supprimé (à appeler dans la transaction de suppression)
+
+    L'état enregistré fait foi : l'instance en mémoire peut être périmée (thème supprimé depuis son chargement).
+    """
+    contribution = _contribution(counted_state(feedback.pk))
+    if contribution:
+        _apply_delta(contribution[0], -1, -contribution[1])
+
+
+def detach_theme_rollups(theme):
+    """Reporte les agrégats d'un thème supprimé sur la clé sans thème (ses feedbacks passent à NULL)"""
+    from .models import FeedbackDailyRollup
+
+    for rollup in FeedbackDailyRollup.objects.filter(theme=theme):
+        _apply_delta(
+            (rollup.day, rollup.department_id, rollup.language, rollup.sentiment, None),
+            rollup.feedback_count, rollup.rating_sum
+        )
+
+
+def rebuild_rollups(date_from=None, date_to=None) -> int:
+    """
+    Recalcule les agrégats à partir des feedbacks traités
+
+    Args:
+        date_from: Premier jour recalculé (inclus), par défaut depuis le premier feedback
+        date_to: Dernier jour recalculé (inclus), par défaut jusqu'au dernier feedback
+
+    Returns:
+        int: Nombre de lignes d'agrégat écrites
+    """
+    from .models import Feedback, FeedbackDailyRollup
+
+    feedbacks = Feedback.objects.filter(is_processed=True, sentiment__isnull=False).annotate(
+        day=TruncDate('created_at')
+    )
+    rollups = FeedbackDailyRollup.objects.all()
+    if date_from:
+        feedbacks = feedbacks.filter(day__gte=date_from)
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        feedbacks = feedbacks.filter(day__lte=date_to)
+        rollups = rollups.filter(day__lte=date_to)
+
+    rows = feedbacks.values('day', 'department_id', 'language', 'sentiment', 'theme_id').annotate(
+        feedback_count=Count('feedback_id'), rating_sum=Sum('rating')
+    ).order_by()
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Les mises à jour incrémentales attendent la fin de la reconstruction, puis s'appliquent
+            # sur les lignes recalculées (lecture des feedbacks après obtention du verrou)
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {FeedbackDailyRollup._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+        rollups.delete()
+        created = FeedbackDailyRollup.objects.bulk_create(
+            [FeedbackDailyRollup(**row) for row in rows], batch_size=1000
+        )
+    logger.info(f"Agrégats journaliers reconstruits: {len(created)} lignes")
+    return len(created)
+
+
+def get_dashboard(date_from, date_to, department_id=None, language=None) -> dict:
+    """
+    Indicateurs du tableau de bord sur une période, calculés sur les agrégats uniquement
+
+    Args:
+        date_from: Premier jour de la période (inclus)
+        date_to: Dernier jour de la période (inclus)
+        department_id: Restreint à un département
+        language: Restreint à une langue
+
+    Returns:
+        dict: Totaux, répartition par sentiment, série journalière, thèmes, départements et langues
+    """
+    from .models import FeedbackDailyRollup
+
+    rollups = FeedbackDailyRollup.objects.filter(day__gte=date_from, day__lte=date_to, feedback_count__gt=0)
+    if department_id:
+        rollups = rollups.filter(department_id=department_id)
+    if language:
+        rollups = rollups.filter(language=language)
+
+    def grouped(*fields):
+        return rollups.values(*fields).annotate(
+            feedbacks=Sum('feedback_count'), ratings=Sum('rating_sum')
+        ).order_by(*fields)
+
+    def with_average(row: dict) -> dict:
+        ratings = row.pop('ratings')
+        row['average_rating'] = round(ratings / row['feedbacks'], 2) if row['feedbacks'] else None
+        return row
+
+    totals = rollups.aggregate(feedbacks=Sum('feedback_count'), ratings=Sum('rating_sum'))
+    totals['feedbacks'] = totals['feedbacks'] or 0
+
+    by_day = {}
+    for row in grouped('day', 'sentiment'):
+        day = by_day.setdefault(row['day'], {'day': row['day'], 'feedbacks': 0, 'ratings': 0, 'sentiments': {}})
+        day['feedbacks'] += row['feedbacks']
+        day['ratings'] += row['ratings']
+        day['sentiments'][row['sentiment']] = row['feedbacks']
+
+    by_theme = [
+        with_average({
+            'theme_id': row['theme_id'], 'theme_name': row['theme__theme_name'],
+            'feedbacks': row['feedbacks'], 'ratings': row['ratings'],
+        })
+        for row in grouped('theme_id', 'theme__theme_name')
+    ]
+    by_theme.sort(key=lambda row: row['feedbacks'], reverse=True)
+
+    return {
+        'period': {'date_from': date_from, 'date_to': date_to},
+        'filters': {'department_id': department_id, 'language': language},
+        'totals': with_average(dict(totals)),
+        'sentiments': {row['sentiment']: row['feedbacks'] for row in grouped('sentiment')},
+        'by_day': [with_average(day) for day in by_day.values()],
+        'by_theme': by_theme,
+        'by_department': [with_average(row) for row in grouped('department_id')],
+        'by_language': [with_average(row) for row in grouped('language')],
+    }
+
+
+def default_dashboard_period(days: int = 30) -> tuple:
+    """Période par défaut du tableau de bord : les `days` derniers jours, aujourd'hui inclus"""
+    today = timezone.localdate()
+    return today - timedelta(days=days - 1), today
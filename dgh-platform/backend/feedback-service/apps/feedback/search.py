@@ -0,0 +1,91 @@
+"""
+Recherche plein texte dans les descriptions des feedbacks
+Sous PostgreSQL, la colonne search_vector (tsvector maintenu par trigger, configuration
+french / english / simple selon la langue du feedback) est interrogée par son index GIN,
+complétée par une correspondance approximative pg_trgm (fautes de frappe) ; les résultats
+sont classés par pertinence. Ailleurs (SQLite de développement), repli sur icontains.
+"""
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from rest_framework import filters
+
+# Configurations de recherche appliquées à la requête : chaque feedback est indexé dans
+# celle de sa langue (les langues locales, sans racinisation, dans 'simple')
+SEARCH_CONFIGS = ('french', 'english', 'simple')
+
+
+def full_text_enabled() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def _search_query(text: str):
+    from django.contrib.postgres.search import SearchQuery
+
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(text, config=config, search_type='websearch')
+        query = part if query is None else query | part
+    return query
+
+
+def match_feedbacks(queryset, text: str):
+    """
+    Feedbacks dont la description correspond à la recherche (sans classement)
+
+    Args:
+        queryset: Feedbacks déjà filtrés
+        text: Texte saisi (syntaxe websearch : "expression exacte", -exclu, or)
+
+    Returns:
+        QuerySet: Feedbacks correspondants
+    """
+    if not full_text_enabled():
+        return _icontains(queryset, text)
+    return queryset.filter(
+        Q(search_vector=_search_query(text)) | Q(description__trigram_word_similar=text)
+    )
+
+
+def rank_feedbacks(queryset, text: str):
+    """
+    Feedbacks correspondant à la recherche, du plus pertinent au plus récent
+
+    Le rang plein texte (ts_rank_cd) prime ; la similarité trigramme départage et classe
+    les correspondances approximatives. Sous SQLite, rank vaut 0 et l'ordre est chronologique.
+
+    Args:
+        queryset: Feedbacks déjà filtrés (dates, département, sentiment...)
+        text: Texte saisi
+
+    Returns:
+        QuerySet: Feedbacks annotés de rank et similarity, triés par pertinence
+    """
+    if not full_text_enabled():
+        return _icontains(queryset, text).annotate(
+            rank=Value(0.0, output_field=FloatField()), similarity=Value(0.0, output_field=FloatField())
+        ).order_by('-created_at', '-feedback_id')
+
+    from django.contrib.postgres.search import SearchRank, TrigramWordSimilarity
+
+    return match_feedbacks(queryset, text).annotate(
+        rank=SearchRank(F('search_vector'), _search_query(text), cover_density=True),
+        similarity=TrigramWordSimilarity(text, 'description'),
+    ).order_by('-rank', '-similarity', '-created_at', '-feedback_id')
+
+
+def _icontains(queryset, text: str):
+    """Repli sans index : chaque mot doit apparaître dans la description"""
+    condition = Q()
+    for term in text.split():
+        condition &= Q(description__icontains=term.strip('"'))
+    return queryset.filter(condition)
+
+
+class FeedbackSearchFilter(filters.SearchFilter):
+    """?search= des listes de feedbacks, servi par l'index plein texte (ordre de la liste conservé)"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return match_feedbacks(queryset, ' '.join(terms))
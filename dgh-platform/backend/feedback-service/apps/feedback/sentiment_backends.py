@@ -0,0 +1,198 @@
+"""
+Backends d'analyse de sentiment interchangeables
+Sélection via le setting SENTIMENT_BACKEND : 'groq', 'local' ou 'keyword'
+"""
+import logging
+import threading
+from django.conf import settings
+from .hf_config import HF_MODEL_ID, HF_TOKEN
+from .lexicon_sentiment import analyze_lexicon, analyze_lexicon_batch
+
+logger = logging.getLogger(__name__)
+
+# Mapping 3 classes du modèle genie10/feedback_patients
+LABEL_MAPPING = {
+    0: "negative",
+    1: "neutral",
+    2: "positive"
+}
+
+
+class SentimentBackend:
+    """
+    Interface commune des moteurs de sentiment
+
+    analyze() et analyze_batch() lèvent une exception en cas d'échec :
+    l'appelant bascule alors vers le fallback par mots-clés.
+    """
+    name = None
+    method = None
+
+    def analyze(self, text: str, language: str = 'fr') -> dict:
+        """Retourne {'sentiment': str, 'confidence': {positive, negative, neutral}}"""
+        raise NotImplementedError
+
+    def analyze_batch(self, texts: list, languages: list = None) -> list:
+        """Analyse plusieurs textes ; par défaut un appel analyze() par texte"""
+        languages = languages or ['fr'] * len(texts)
+        return [self.analyze(text, language) for text, language in zip(texts, languages)]
+
+    def warm_up(self):
+        """Précharge les ressources lourdes (modèle, client)"""
+
+
+class GroqSentimentBackend(SentimentBackend):
+    """Analyse via l'API Groq (LLM distant)"""
+    name = 'groq'
+    method = 'groq_api'
+
+    def analyze(self, text: str, language: str = 'fr') -> dict:
+        from .sentimental_analysis import _analyze_sentiment_groq
+        return _analyze_sentiment_groq(text)
+
+
+class KeywordSentimentBackend(SentimentBackend):
+    """Analyse locale par lexique compilé, sans dépendance externe"""
+    name = 'keyword'
+    method = 'keyword'
+
+    def analyze(self, text: str, language: str = 'fr') -> dict:
+        sentiment, confidence = analyze_lexicon(text, language)
+        return {"sentiment": sentiment, "confidence": confidence}
+
+    def analyze_batch(self, texts: list, languages: list = None) -> list:
+        return [
+            {"sentiment": sentiment, "confidence": confidence}
+            for sentiment, confidence in analyze_lexicon_batch(texts, languages)
+        ]
+
+
+class LocalTransformerSentimentBackend(SentimentBackend):
+    """
+    Classifieur fine-tuné genie10/feedback_patients exécuté en local sur CPU
+
+    Le modèle est chargé une seule fois par processus (worker Celery) :
+    - export ONNX si LOCAL_SENTIMENT_ONNX_PATH est configuré (onnxruntime)
+    - sinon modèle PyTorch quantifié dynamiquement en int8
+    """
+    name = 'local'
+    method = 'local_model'
+
+    _lock = threading.Lock()
+    _tokenizer = None
+    _model = None
+    _onnx_session = None
+
+    def warm_up(self):
+        self._load()
+
+    @classmethod
+    def _load(cls):
+        if cls._tokenizer is not None:
+            return
+        with cls._lock:
+            if cls._tokenizer is not None:
+                return
+
+            # Dépendances ML optionnelles (voir requirements.txt)
+            from transformers import AutoTokenizer
+
+            onnx_path = settings.LOCAL_SENTIMENT_ONNX_PATH
+            tokenizer = AutoTokenizer.from_pretrained(onnx_path or HF_MODEL_ID, token=HF_TOKEN)
+
+            if onnx_path:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = settings.LOCAL_SENTIMENT_NUM_THREADS
+                cls._onnx_session = onnxruntime.InferenceSession(
+                    f"{onnx_path.rstrip('/')}/model.onnx",
+                    sess_options=options,
+                    providers=['CPUExecutionProvider']
+                )
+                logger.info(f"Modèle de sentiment ONNX chargé depuis {onnx_path}")
+            else:
+                import torch
+                from transformers import AutoModelForSequenceClassification
+
+                torch.set_grad_enabled(False)
+                torch.set_num_threads(settings.LOCAL_SENTIMENT_NUM_THREADS)
+                model = AutoModelForSequenceClassification.from_pretrained(HF_MODEL_ID, token=HF_TOKEN)
+                model.eval()
+                cls._model = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                logger.info(f"Modèle de sentiment {HF_MODEL_ID} chargé (quantification int8 dynamique)")
+
+            cls._tokenizer = tokenizer
+
+    def _predict_probabilities(self, texts: list) -> list:
+        """Retourne les probabilités (negative, neutral, positive) de chaque texte"""
+        self._load()
+        max_length = settings.LOCAL_SENTIMENT_MAX_LENGTH
+
+        if self._onnx_session is not None:
+            import numpy as np
+
+            inputs = self._tokenizer(
+                texts, return_tensors="np", padding=True, truncation=True, max_length=max_length
+            )
+            input_names = {node.name for node in self._onnx_session.get_inputs()}
+            logits = self._onnx_session.run(
+                None, {name: value for name, value in inputs.items() if name in input_names}
+            )[0]
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+        import torch
+
+        inputs = self._tokenizer(
+            texts, return_tensors="pt", padding=True, truncation=True, max_length=max_length
+        )
+        with torch.no_grad():
+            logits = self._model(**inputs).logits
+        return torch.softmax(logits, dim=-1).tolist()
+
+    @staticmethod
+    def _to_result(probs: list) -> dict:
+        predicted_class = max(range(len(probs)), key=lambda index: probs[index])
+        return {
+            "sentiment": LABEL_MAPPING[predicted_class],
+            "confidence": {
+                "negative": round(probs[0] * 100, 2),
+                "neutral": round(probs[1] * 100, 2),
+                "positive": round(probs[2] * 100, 2)
+            }
+        }
+
+    def analyze(self, text: str, language: str = 'fr') -> dict:
+        return self._to_result(self._predict_probabilities([text])[0])
+
+    def analyze_batch(self, texts: list, languages: list = None) -> list:
+        return [self._to_result(probs) for probs in self._predict_probabilities(texts)]
+
+
+SENTIMENT_BACKENDS = {
+    backend.name: backend
+    for backend in (GroqSentimentBackend, LocalTransformerSentimentBackend, KeywordSentimentBackend)
+}
+
+_backend_instances = {}
+
+
+def get_sentiment_backend(name: str = None) -> SentimentBackend:
+    """
+    Retourne l'instance (unique par processus) du backend de sentiment
+
+    Args:
+        name: Nom du backend, par défaut le setting SENTIMENT_BACKEND
+
+    Returns:
+        SentimentBackend: Backend configuré
+    """
+    name = name or settings.SENTIMENT_BACKEND
+    if name not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Backend de sentiment inconnu: {name}")
+    if name not in _backend_instances:
+        _backend_instances[name] = SENTIMENT_BACKENDS[name]()
+    return _backend_instances[name]
@@ -1,36 +1,54 @@
 """
 Analyse de sentiment pour les feedbacks patients
-Basé sur l'API Groq pour une analyse rapide et efficace
+Basé sur l'API Groq pour une analyse rapide et efficace,
+ou sur un autre backend configuré via SENTIMENT_BACKEND (voir sentiment_backends.py)
 """
 import time
 import json
 import logging
-import os
-from groq import Groq
-from django.conf import settings
+from .llm_client import GROQ_MODEL, chat_completion
+from .sentiment_backends import get_sentiment_backend
+from .lexicon_sentiment import analyze_lexicon, analyze_lexicon_batch
 
 logger = logging.getLogger(__name__)
 
-# Configuration Groq API
-GROQ_MODEL = "llama-3.1-8b-instant"  # Modèle rapide et gratuit
-_groq_client = None
-
-def _get_groq_client():
-    """Initialise le client Groq de façon lazy pour groq==0.30.0"""
-    global _groq_client
-    if _groq_client is None:
-        api_key = getattr(settings, 'GROQ_API_KEY', os.getenv('GROQ_API_KEY'))
-        if not api_key:
-            raise ValueError("GROQ_API_KEY non configurée")
-        
-        # Pour groq==0.30.0, utilisation directe sans paramètres supplémentaires
-        try:
-            _groq_client = Groq(api_key=api_key)
-            logger.info("Client Groq v0.30.0 initialisé avec succès")
-        except Exception as e:
-            logger.error(f"Erreur initialisation client Groq v0.30.0: {e}")
-            raise ValueError(f"Impossible d'initialiser Groq: {e}")
-    return _groq_client
+PROMPT_VERSION = "1"  # À incrémenter à chaque modification des prompts (invalide le cache)
+
+
+def _validate_sentiment_payload(result: dict) -> dict:
+    """
+    Valide un objet JSON de sentiment renvoyé par Groq
+
+    Args:
+        result: Objet JSON décodé (sentiment + confidence)
+
+    Returns:
+        dict: Sentiment normalisé et scores de confiance en float
+    """
+    if not isinstance(result, dict):
+        raise ValueError("Format JSON invalide")
+
+    # Validation du format
+    if "sentiment" not in result or "confidence" not in result:
+        raise ValueError("Format JSON invalide")
+
+    sentiment = str(result["sentiment"]).lower()
+    if sentiment not in ["positive", "negative", "neutral"]:
+        raise ValueError(f"Sentiment invalide: {sentiment}")
+
+    confidence = result["confidence"]
+    required_keys = ["positive", "negative", "neutral"]
+    if not isinstance(confidence, dict) or not all(key in confidence for key in required_keys):
+        raise ValueError("Clés de confiance manquantes")
+
+    return {
+        "sentiment": sentiment,
+        "confidence": {
+            "positive": float(confidence["positive"]),
+            "negative": float(confidence["negative"]),
+            "neutral": float(confidence["neutral"])
+        }
+    }
 
 
 def _analyze_sentiment_groq(text: str) -> dict:
@@ -44,8 +62,6 @@ def _analyze_sentiment_groq(text: str) -> dict:
         dict: Résultat de l'analyse avec sentiment et scores
     """
     try:
-        client = _get_groq_client()
-        
         # Prompt structuré pour l'analyse de sentiment
         prompt = f"""Tu es un expert en analyse de sentiment médical. Analyse le sentiment de ce feedback patient en français.
 
@@ -63,8 +79,7 @@ Réponds UNIQUEMENT au format JSON exact suivant, sans texte supplémentaire:
 
 Les pourcentages doivent totaliser 100%. Sois précis sur le sentiment médical."""
 
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
+        response = chat_completion(
             messages=[
                 {"role": "system", "content": "Tu es un expert en analyse de sentiment médical. Réponds uniquement en JSON valide."},
                 {"role": "user", "content": prompt}
@@ -78,29 +93,7 @@ Les pourcentages doivent totaliser 100%. Sois précis sur le sentiment médical.
         
         # Parse la réponse JSON
         try:
-            result = json.loads(response_text)
-            
-            # Validation du format
-            if "sentiment" not in result or "confidence" not in result:
-                raise ValueError("Format JSON invalide")
-                
-            sentiment = result["sentiment"].lower()
-            if sentiment not in ["positive", "negative", "neutral"]:
-                raise ValueError(f"Sentiment invalide: {sentiment}")
-                
-            confidence = result["confidence"]
-            required_keys = ["positive", "negative", "neutral"]
-            if not all(key in confidence for key in required_keys):
-                raise ValueError("Clés de confiance manquantes")
-                
-            return {
-                "sentiment": sentiment,
-                "confidence": {
-                    "positive": float(confidence["positive"]),
-                    "negative": float(confidence["negative"]),
-                    "neutral": float(confidence["neutral"])
-                }
-            }
+            return _validate_sentiment_payload(json.loads(response_text))
             
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             logger.warning(f"Erreur parsing réponse Groq: {e}, réponse: {response_text}")
@@ -111,55 +104,21 @@ Les pourcentages doivent totaliser 100%. Sois précis sur le sentiment médical.
         raise
 
 
-def _simple_sentiment_analysis(text: str) -> tuple:
+def _simple_sentiment_analysis(text: str, language: str = 'fr') -> tuple:
     """
     Analyse de sentiment légère basée sur des mots-clés pour fallback
+    Délègue au lexique compilé de la langue (frontières de mots + négations)
     """
-    text_lower = text.lower()
-    
-    # Mots positifs étendus (contexte médical)
-    positive_words = [
-        'excellent', 'parfait', 'très bien', 'super', 'formidable', 'fantastique', 'merveilleux',
-        'satisfait', 'content', 'heureux', 'bon', 'bien', 'génial', 'top', 'recommande',
-        'bravo', 'félicitations', 'efficace', 'rapide', 'professionnel', 'qualité', 'compétent',
-        'attentif', 'bienveillant', 'rassurant', 'disponible', 'aimable', 'gentil', 'souriant'
-    ]
-    
-    # Mots négatifs étendus (contexte médical)
-    negative_words = [
-        'mauvais', 'nul', 'problème', 'insatisfait', 'décevant', 'terrible', 'catastrophique', 'mal',
-        'lent', 'attente', 'retard', 'erreur', 'difficile', 'compliqué', 'inquiet', 'peur',
-        'douleur', 'souffrance', 'déçu', 'mécontent', 'plainte', 'inadéquat', 'impoli', 'froid',
-        'indisponible', 'négligent', 'incompétent', 'désagréable', 'stressant', 'angoissant'
-    ]
-    
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    
-    if positive_count > negative_count:
-        confidence = min(60.0 + (positive_count * 10), 90.0)
-        return "positive", {
-            "negative": 10.0, 
-            "neutral": 100.0 - confidence - 10.0, 
-            "positive": confidence
-        }
-    elif negative_count > positive_count:
-        confidence = min(60.0 + (negative_count * 10), 90.0)
-        return "negative", {
-            "negative": confidence, 
-            "neutral": 100.0 - confidence - 10.0, 
-            "positive": 10.0
-        }
-    else:
-        return "neutral", {"negative": 30.0, "neutral": 40.0, "positive": 30.0}
+    return analyze_lexicon(text, language)
 
 
-def analyze_sentiment(text: str) -> dict:
+def analyze_sentiment(text: str, language: str = 'fr') -> dict:
     """
-    Analyse le sentiment d'un texte unique via Groq API
+    Analyse le sentiment d'un texte unique via le backend configuré (SENTIMENT_BACKEND)
     
     Args:
         text: Texte du feedback à analyser
+        language: Code langue du feedback (utilisé par les lexiques)
         
     Returns:
         dict: Résultat de l'analyse avec prediction, scores et temps de traitement
@@ -167,32 +126,33 @@ def analyze_sentiment(text: str) -> dict:
     start = time.time()
     
     try:
-        # Analyse via Groq API
-        groq_result = _analyze_sentiment_groq(text)
+        # Analyse via le backend configuré (Groq API par défaut)
+        backend = get_sentiment_backend()
+        backend_result = backend.analyze(text, language)
         
         end = time.time()
         elapsed = round(end - start, 3)
         
         result = {
             "text": text,
-            "prediction": groq_result["sentiment"],
+            "prediction": backend_result["sentiment"],
             "confidence": {
-                "negative": round(groq_result["confidence"]["negative"], 2),
-                "neutral": round(groq_result["confidence"]["neutral"], 2),
-                "positive": round(groq_result["confidence"]["positive"], 2)
+                "negative": round(backend_result["confidence"]["negative"], 2),
+                "neutral": round(backend_result["confidence"]["neutral"], 2),
+                "positive": round(backend_result["confidence"]["positive"], 2)
             },
             "processing_time_seconds": elapsed,
-            "method": "groq_api"
+            "method": backend.method
         }
         
-        logger.info(f"Sentiment analysé via Groq: {groq_result['sentiment']} en {elapsed}s")
+        logger.info(f"Sentiment analysé via {backend.name}: {backend_result['sentiment']} en {elapsed}s")
         return result
         
     except Exception as e:
-        logger.warning(f"Erreur Groq API, utilisation du fallback: {e}")
+        logger.warning(f"Erreur backend de sentiment, utilisation du fallback: {e}")
         
         # Fallback vers analyse par mots-clés
-        sentiment, confidence = _simple_sentiment_analysis(text)
+        sentiment, confidence = _simple_sentiment_analysis(text, language)
         
         end = time.time()
         elapsed = round(end - start, 3)
@@ -207,6 +167,151 @@ def analyze_sentiment(text: str) -> dict:
         }
 
 
+def _analyze_sentiment_batch_groq(texts: list) -> dict:
+    """
+    Analyse le sentiment de plusieurs feedbacks en une seule requête Groq
+
+    Args:
+        texts: Liste des textes à analyser
+
+    Returns:
+        dict: {index: résultat validé ou exception} pour chaque feedback
+    """
+    feedbacks_list = "\n".join(
+        f'{index}. "{text}"' for index, text in enumerate(texts, start=1)
+    )
+
+    prompt = f"""Tu es un expert en analyse de sentiment médical. Analyse le sentiment de chacun de ces {len(texts)} feedbacks patients.
+
+Feedbacks:
+{feedbacks_list}
+
+Réponds UNIQUEMENT au format JSON exact suivant, sans texte supplémentaire, avec une entrée par feedback:
+{{
+    "results": [
+        {{
+            "id": 1,
+            "sentiment": "positive|negative|neutral",
+            "confidence": {{
+                "positive": 85.2,
+                "negative": 10.1,
+                "neutral": 4.7
+            }}
+        }}
+    ]
+}}
+
+Les pourcentages de chaque entrée doivent totaliser 100%. Sois précis sur le sentiment médical."""
+
+    response = chat_completion(
+        messages=[
+            {"role": "system", "content": "Tu es un expert en analyse de sentiment médical. Réponds uniquement en JSON valide."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        max_tokens=min(80 * len(texts) + 50, 4000)
+    )
+
+    response_text = response.choices[0].message.content.strip()
+    logger.debug(f"Réponse Groq batch brute: {response_text}")
+
+    try:
+        payload = json.loads(response_text)
+        items = payload["results"] if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            raise ValueError("Liste de résultats absente")
+    except (json.JSONDecodeError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Erreur parsing réponse Groq batch: {e}, réponse: {response_text}")
+        raise ValueError(f"Réponse Groq batch invalide: {e}")
+
+    # Validation entrée par entrée : une entrée invalide n'invalide pas le lot
+    results = {}
+    for position, item in enumerate(items, start=1):
+        try:
+            index = int(item.get("id", position)) if isinstance(item, dict) else position
+            if not 1 <= index <= len(texts) or index in results:
+                raise ValueError(f"Identifiant invalide: {index}")
+            results[index] = _validate_sentiment_payload(item)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Entrée batch Groq invalide ({position}): {e}")
+    return results
+
+
+def analyze_sentiment_batch(texts: list, languages: list = None) -> list:
+    """
+    Analyse le sentiment de plusieurs textes en un seul appel au backend configuré
+    (une requête Groq structurée, ou une inférence par lot pour le modèle local)
+
+    Chaque entrée manquante ou invalide dans la réponse bascule
+    individuellement vers l'analyse par mots-clés.
+
+    Args:
+        texts: Liste des textes des feedbacks à analyser
+        languages: Codes langue des feedbacks (même ordre), 'fr' par défaut
+
+    Returns:
+        list: Résultats dans l'ordre des textes, au même format que analyze_sentiment
+    """
+    if not texts:
+        return []
+    languages = languages or ['fr'] * len(texts)
+
+    start = time.time()
+    batch_error = None
+    method = None
+
+    try:
+        backend = get_sentiment_backend()
+        if backend.name == 'groq':
+            backend_results = _analyze_sentiment_batch_groq(texts)
+            method = "groq_api_batch"
+        else:
+            backend_results = dict(enumerate(backend.analyze_batch(texts, languages), start=1))
+            method = backend.method
+    except Exception as e:
+        logger.warning(f"Erreur backend de sentiment batch, utilisation du fallback: {e}")
+        backend_results = {}
+        batch_error = str(e)
+
+    elapsed = round(time.time() - start, 3)
+
+    # Les entrées en échec passent en une fois par le lexique compilé (textes identiques analysés une fois)
+    missing = [index for index in range(1, len(texts) + 1) if backend_results.get(index) is None]
+    fallback_results = dict(zip(missing, analyze_lexicon_batch(
+        [texts[index - 1] for index in missing], [languages[index - 1] for index in missing]
+    )))
+
+    results = []
+    for index, text in enumerate(texts, start=1):
+        backend_result = backend_results.get(index)
+        if backend_result is not None:
+            results.append({
+                "text": text,
+                "prediction": backend_result["sentiment"],
+                "confidence": {
+                    "negative": round(backend_result["confidence"]["negative"], 2),
+                    "neutral": round(backend_result["confidence"]["neutral"], 2),
+                    "positive": round(backend_result["confidence"]["positive"], 2)
+                },
+                "processing_time_seconds": elapsed,
+                "method": method
+            })
+        else:
+            sentiment, confidence = fallback_results[index]
+            results.append({
+                "text": text,
+                "prediction": sentiment,
+                "confidence": confidence,
+                "processing_time_seconds": elapsed,
+                "method": "keyword_fallback",
+                "error": batch_error or "Entrée absente ou invalide dans la réponse batch"
+            })
+
+    fallback_count = sum(1 for result in results if result["method"] == "keyword_fallback")
+    logger.info(f"Sentiment batch analysé: {len(texts)} feedbacks en {elapsed}s ({fallback_count} fallback)")
+    return results
+
+
 def get_sentiment_data(text: str) -> tuple:
     """
     Version simplifiée qui retourne seulement le sentiment et les scores
@@ -1,31 +1,36 @@
 from rest_framework import serializers
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import (
     Department, FeedbackTheme, Feedback, Appointment, 
     Reminder, Medication, Prescription, PrescriptionMedication
 )
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = '__all__'
         read_only_fields = ('department_id', 'created_at', 'updated_at')
 
 
-class FeedbackThemeSerializer(serializers.ModelSerializer):
+class FeedbackThemeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = FeedbackTheme
         fields = '__all__'
         read_only_fields = ('theme_id', 'created_at', 'updated_at')
 
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     theme_name = serializers.CharField(source='theme.theme_name', read_only=True)
     
     class Meta:
         model = Feedback
-        fields = '__all__'
-        read_only_fields = ('feedback_id', 'created_at', 'theme', 'is_processed', 'processed_at')
+        exclude = ('search_vector',)
+        read_only_fields = (
+            'feedback_id', 'created_at', 'theme', 'is_processed', 'processed_at',
+            'analysis_mode', 'analysis_method', 'processing_time_seconds', 'processing_stage',
+            'processing_attempts'
+        )
     
     def validate_rating(self, value):
         if value not in [1, 2, 3, 4, 5]:
@@ -37,6 +42,12 @@ class FeedbackSerializer(serializers.ModelSerializer):
         return value
 
 
+class FeedbackSearchResultSerializer(FeedbackSerializer):
+    """Feedback trouvé par la recherche plein texte, avec sa pertinence"""
+    rank = serializers.FloatField(read_only=True)
+    similarity = serializers.FloatField(read_only=True)
+
+
 class FeedbackCreateSerializer(serializers.ModelSerializer):
     """Serializer spécifique pour la création de feedback"""
     
@@ -66,7 +77,7 @@ class FeedbackCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Department ID doit être un UUID valide")
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     
     class Meta:
@@ -91,7 +102,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return data
 
 
-class ReminderSerializer(serializers.ModelSerializer):
+class ReminderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Reminder
         fields = '__all__'
@@ -106,7 +117,7 @@ class ReminderSerializer(serializers.ModelSerializer):
         return value
 
 
-class MedicationSerializer(serializers.ModelSerializer):
+class MedicationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Medication
         fields = '__all__'
@@ -134,7 +145,7 @@ class PrescriptionMedicationSerializer(serializers.ModelSerializer):
         return data
 
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+class PrescriptionSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     medications = PrescriptionMedicationSerializer(many=True, read_only=True)
     
     class Meta:
@@ -2,9 +2,16 @@
 Services pour le traitement automatique des feedbacks
 """
 from .models import FeedbackTheme, Feedback
-from .sentimental_analysis import get_sentiment_data
-from .theme_extraction import get_feedback_theme
+from .sentimental_analysis import analyze_sentiment, analyze_sentiment_batch
+from .theme_extraction import get_feedback_theme, resolve_feedback_theme
+from .combined_analysis import analyze_feedback_combined
+from .analysis_cache import get_cached_analysis, store_analysis
+from .etags import bump_feedback_versions
+from .events import publish_feedback_processed
+from .metrics import MetricsCollector, collecting, queue_wait_seconds, record_cache_hit, save_metrics, stage
+from django.conf import settings
 from django.utils import timezone
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,43 +49,287 @@ def get_or_create_theme(theme_name: str) -> FeedbackTheme:
     return theme
 
 
+# Champs sauvegardés à la fin de l'étape sentiment
+SENTIMENT_STAGE_FIELDS = [
+    'sentiment', 'sentiment_positive_score', 'sentiment_negative_score',
+    'sentiment_neutral_score', 'analysis_method', 'processing_stage'
+]
+
+
+def _apply_sentiment(feedback: Feedback, sentiment: str, scores: dict, method: str):
+    """Renseigne le sentiment et les scores sur le feedback (sans sauvegarde)"""
+    feedback.sentiment = sentiment
+    feedback.sentiment_positive_score = scores.get('positive', 0)
+    feedback.sentiment_negative_score = scores.get('negative', 0)
+    feedback.sentiment_neutral_score = scores.get('neutral', 0)
+    feedback.analysis_method = method
+    feedback.processing_stage = 'sentiment_done'
+
+
+def _stored_sentiment(feedback: Feedback) -> dict:
+    """Résultat de l'étape sentiment déjà sauvegardé sur le feedback"""
+    return {
+        "prediction": feedback.sentiment,
+        "confidence": {
+            "positive": feedback.sentiment_positive_score,
+            "negative": feedback.sentiment_negative_score,
+            "neutral": feedback.sentiment_neutral_score
+        },
+        "method": feedback.analysis_method
+    }
+
+
+def _run_sentiment_stage(feedback: Feedback):
+    """Étape 1 : analyse du sentiment, sauvegardée avant de passer au thème"""
+    try:
+        with stage('sentiment'):
+            result = analyze_sentiment(feedback.description, feedback.language)
+        sentiment, scores, method = result["prediction"], result["confidence"], result["method"]
+    except Exception as e:
+        logger.error(f"Erreur totale d'analyse de sentiment: {e}")
+        sentiment = "neutral"
+        scores = {"negative": 33.33, "neutral": 33.33, "positive": 33.33}
+        method = "default"
+    logger.info(f"Sentiment obtenu ({method}): {sentiment}, scores: {scores}")
+    
+    _apply_sentiment(feedback, sentiment, scores, method)
+    with stage('save'):
+        feedback.save(update_fields=SENTIMENT_STAGE_FIELDS)
+
+
+def _run_theme_stage(feedback: Feedback) -> dict:
+    """
+    Étape 2 : catégorisation thématique, sauvegardée avant la finalisation
+
+    Returns:
+        dict: theme et theme_method (None à la reprise : origine inconnue, résultat non mis en cache)
+    """
+    if feedback.processing_stage == 'theme_done' and feedback.theme_id:
+        return {"theme": feedback.theme.theme_name, "theme_method": None}
+    
+    # Catégorisation thématique intelligente avec le texte
+    with stage('theme'):
+        resolved = resolve_feedback_theme(feedback.description, feedback.sentiment, feedback.rating)
+    with stage('theme_upsert'):
+        feedback.theme = get_or_create_theme(resolved["theme"])
+    feedback.processing_stage = 'theme_done'
+    with stage('save'):
+        feedback.save(update_fields=['theme', 'processing_stage'])
+    return {"theme": resolved["theme"], "theme_method": resolved["method"]}
+
+
+def _analyze_separately(feedback: Feedback) -> dict:
+    """
+    Mode historique : un appel pour le sentiment puis un appel pour le thème
+    
+    Chaque étape est sauvegardée : après un échec, une nouvelle tentative
+    reprend à l'étape qui a échoué sans refaire l'analyse de sentiment.
+    
+    Args:
+        feedback: Instance de feedback à analyser
+        
+    Returns:
+        dict: prediction, confidence, method, theme et theme_method
+    """
+    if feedback.processing_stage == 'pending':
+        _run_sentiment_stage(feedback)
+    else:
+        logger.info(f"Reprise du feedback {feedback.feedback_id} à l'étape {feedback.processing_stage}")
+    
+    return {**_stored_sentiment(feedback), **_run_theme_stage(feedback)}
+
+
+def _finalize_feedback(feedback: Feedback, analysis: dict, mode: str, elapsed: float) -> Feedback:
+    """
+    Applique le résultat d'analyse (sentiment, thème) et sauvegarde le feedback
+    
+    Args:
+        feedback: Instance de feedback à finaliser
+        analysis: Résultat d'analyse (prediction, confidence, theme, method)
+        mode: Mode d'analyse utilisé (separate, combined, batch)
+        elapsed: Durée de l'analyse en secondes
+        
+    Returns:
+        feedback: Feedback mis à jour et marqué comme traité
+    """
+    # Mise à jour du sentiment et des scores
+    _apply_sentiment(feedback, analysis["prediction"], analysis["confidence"], analysis.get("method"))
+    
+    # Finalisation (le thème peut déjà avoir été sauvegardé par l'étape thème)
+    if not feedback.theme_id or feedback.theme.theme_name != analysis["theme"]:
+        with stage('theme_upsert'):
+            feedback.theme = get_or_create_theme(analysis["theme"])
+    feedback.analysis_mode = mode
+    feedback.processing_time_seconds = round(elapsed, 3)
+    feedback.processing_stage = 'completed'
+    feedback.is_processed = True
+    feedback.processed_at = timezone.now()
+    with stage('save'):
+        feedback.save()
+    # Notification SSE du patient abonné (après commit)
+    publish_feedback_processed(feedback)
+    return feedback
+
+
 def process_feedback(feedback: Feedback) -> Feedback:
     """
     Traite un feedback : analyse sentiment et catégorise
     
+    Le mode d'analyse est choisi via FEEDBACK_ANALYSIS_MODE : 'separate' (deux appels
+    Groq, sentiment puis thème) ou 'combined' (une seule requête structurée).
+    Le mode combiné ne s'applique qu'avec le backend de sentiment 'groq'.
+    Un feedback partiellement traité reprend à sa dernière étape sauvegardée.
+    
     Args:
         feedback: Instance de feedback à traiter
         
     Returns:
         feedback: Feedback traité et mis à jour
+        
+    Raises:
+        Exception: Toute erreur est propagée pour que la tâche Celery retente le traitement
     """
+    mode = settings.FEEDBACK_ANALYSIS_MODE
+    if mode == 'combined' and settings.SENTIMENT_BACKEND != 'groq':
+        # Le sentiment vient d'un backend local : seul le thème passe par Groq
+        mode = 'separate'
+    if feedback.processing_stage != 'pending':
+        # Reprise : le sentiment est déjà sauvegardé, seul le thème reste à faire
+        mode = 'separate'
+    logger.info(f"Traitement du feedback {feedback.feedback_id} (mode {mode}, étape {feedback.processing_stage})")
+    
+    collector = MetricsCollector()
+    queue_wait = queue_wait_seconds(feedback)
+    succeeded = False
+    start = time.perf_counter()
     try:
-        logger.info(f"Traitement du feedback {feedback.feedback_id}")
-        
-        # Analyse de sentiment
-        logger.info("Début analyse de sentiment...")
-        sentiment, scores = get_sentiment_data(feedback.description)
-        logger.info(f"Sentiment obtenu: {sentiment}, scores: {scores}")
-        
-        # Mise à jour du sentiment et des scores
-        feedback.sentiment = sentiment
-        feedback.sentiment_positive_score = scores.get('positive', 0)
-        feedback.sentiment_negative_score = scores.get('negative', 0)
-        feedback.sentiment_neutral_score = scores.get('neutral', 0)
-        
-        # Catégorisation thématique intelligente avec le texte
-        theme_name = categorize_feedback_theme(feedback.description, sentiment, feedback.rating)
-        theme = get_or_create_theme(theme_name)
-        
-        # Finalisation
-        feedback.theme = theme
-        feedback.is_processed = True
-        feedback.processed_at = timezone.now()
-        feedback.save()
-        
-        logger.info(f"Feedback traité: sentiment={sentiment}, thème={theme_name}")
-        return feedback
+        with collecting(collector):
+            # Le cache est consulté avant tout appel réseau
+            cached = None
+            if feedback.processing_stage == 'pending':
+                cached = get_cached_analysis(feedback.description, feedback.language, mode)
+            if cached is not None:
+                # Méthode d'origine conservée ; le hit est compté dans les métriques
+                analysis = cached
+                record_cache_hit()
+            elif mode == 'combined':
+                with stage('combined'):
+                    analysis = analyze_feedback_combined(feedback.description, feedback.rating, feedback.language)
+                store_analysis(feedback.description, feedback.language, mode, analysis)
+            else:
+                analysis = _analyze_separately(feedback)
+                store_analysis(feedback.description, feedback.language, mode, analysis)
+            elapsed = time.perf_counter() - start
+            
+            _finalize_feedback(feedback, analysis, mode, elapsed)
+        succeeded = True
         
     except Exception as e:
-        logger.error(f"Erreur lors du traitement du feedback {feedback.feedback_id}: {e}")
-        return feedback
\ No newline at end of file
+        logger.error(
+            f"Erreur lors du traitement du feedback {feedback.feedback_id} "
+            f"(étape {feedback.processing_stage}): {e}"
+        )
+        raise
+    finally:
+        collector.add_stage('total', time.perf_counter() - start)
+        save_metrics(feedback, collector, mode, succeeded, queue_wait)
+    
+    logger.info(
+        f"Feedback traité: sentiment={feedback.sentiment}, thème={analysis['theme']} "
+        f"({mode}, {feedback.processing_time_seconds}s)"
+    )
+    return feedback
+
+
+def _save_batch_metrics(feedback: Feedback, collector: MetricsCollector, queue_wait: float, succeeded: bool):
+    """Métriques d'un feedback traité en lot (durée totale = ses étapes + sa part des appels du lot)"""
+    collector.add_stage('total', sum(collector.stages.values()))
+    save_metrics(feedback, collector, 'batch', succeeded, queue_wait)
+
+
+def process_feedback_batch(feedbacks: list) -> list:
+    """
+    Traite un lot de feedbacks : un seul appel Groq pour le sentiment du lot,
+    puis catégorisation thématique feedback par feedback
+    
+    Args:
+        feedbacks: Liste d'instances de feedback à traiter
+        
+    Returns:
+        list: Feedbacks traités avec succès
+    """
+    if not feedbacks:
+        return []
+    
+    logger.info(f"Traitement batch de {len(feedbacks)} feedbacks")
+    
+    processed = []
+    pending = []
+    collectors = {}
+    queue_waits = {}
+    for feedback in feedbacks:
+        collectors[feedback.feedback_id] = MetricsCollector()
+        queue_waits[feedback.feedback_id] = queue_wait_seconds(feedback)
+        cached = None
+        if feedback.processing_stage == 'pending':
+            cached = get_cached_analysis(feedback.description, feedback.language, 'batch')
+        if cached is None:
+            pending.append(feedback)
+            continue
+        succeeded = False
+        try:
+            with collecting(collectors[feedback.feedback_id]):
+                record_cache_hit()
+                _finalize_feedback(feedback, cached, 'batch', 0.0)
+            processed.append(feedback)
+            succeeded = True
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement batch du feedback {feedback.feedback_id}: {e}")
+        _save_batch_metrics(feedback, collectors[feedback.feedback_id], queue_waits[feedback.feedback_id], succeeded)
+    
+    if not pending:
+        return processed
+    
+    # Étape sentiment en un appel par tranche de FEEDBACK_BATCH_SIZE pour les feedbacks qui ne l'ont pas encore franchie
+    to_analyze = [feedback for feedback in pending if feedback.processing_stage == 'pending']
+    batch_shares = {}
+    chunk_size = max(settings.FEEDBACK_BATCH_SIZE, 1)
+    for start in range(0, len(to_analyze), chunk_size):
+        chunk = to_analyze[start:start + chunk_size]
+        # Appel et sauvegarde communs au lot : chaque feedback en reçoit une part égale
+        chunk_collector = MetricsCollector()
+        with collecting(chunk_collector):
+            with stage('sentiment'):
+                results = analyze_sentiment_batch(
+                    [feedback.description for feedback in chunk],
+                    [feedback.language for feedback in chunk]
+                )
+            for feedback, result in zip(chunk, results):
+                _apply_sentiment(feedback, result["prediction"], result["confidence"], result["method"])
+                # Temps de traitement : part du lot Groq attribuée à chaque feedback
+                batch_shares[feedback.feedback_id] = result["processing_time_seconds"] / len(chunk)
+            with stage('save'):
+                Feedback.objects.bulk_update(chunk, SENTIMENT_STAGE_FIELDS)
+                # bulk_update n'envoie pas post_save : versions ETag incrémentées ici (après commit)
+                bump_feedback_versions({feedback.patient_id for feedback in chunk})
+        for feedback in chunk:
+            collectors[feedback.feedback_id].add_share(chunk_collector, len(chunk))
+    
+    for feedback in pending:
+        succeeded = False
+        try:
+            with collecting(collectors[feedback.feedback_id]):
+                start = time.perf_counter()
+                analysis = {**_stored_sentiment(feedback), **_run_theme_stage(feedback)}
+                elapsed = batch_shares.get(feedback.feedback_id, 0.0) + time.perf_counter() - start
+                _finalize_feedback(feedback, analysis, 'batch', elapsed)
+            store_analysis(feedback.description, feedback.language, 'batch', analysis)
+            processed.append(feedback)
+            succeeded = True
+            logger.info(f"Feedback {feedback.feedback_id} traité en batch ({analysis['method']}): {analysis['prediction']}")
+        except Exception as e:
+            # Le feedback garde son étape sauvegardée et sera repris au prochain lot
+            logger.error(f"Erreur lors du traitement batch du feedback {feedback.feedback_id}: {e}")
+        _save_batch_metrics(feedback, collectors[feedback.feedback_id], queue_waits[feedback.feedback_id], succeeded)
+    
+    return processed
@@ -1,41 +1,67 @@
 """
-Signaux Django pour déclencher automatiquement le traitement des feedbacks
+Signaux Django du service feedback
+Le déclenchement du traitement des feedbacks passe par l'outbox (voir outbox.py)
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Feedback
-from .tasks import process_feedback_async
+from .etags import DEPARTMENTS_SCOPE, THEMES_SCOPE, bump_versions, owner_scopes
+from .models import Appointment, Department, Feedback, FeedbackTheme, Reminder
+from .rollups import detach_theme_rollups, remove_feedback_from_rollups
+from .theme_catalog import invalidate_theme_catalog
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_save, sender=FeedbackTheme)
+@receiver(post_delete, sender=FeedbackTheme)
+def invalidate_theme_catalog_on_change(sender, instance, **kwargs):
+    """Invalide le catalogue de thèmes mis en cache après création, modification ou suppression d'un thème"""
+    logger.debug(f"Thème {instance.theme_name} modifié, invalidation du catalogue")
+    # Après commit : un lecteur concurrent ne peut pas remettre en cache l'ancien catalogue sous la nouvelle version
+    transaction.on_commit(invalidate_theme_catalog)
+
+
+@receiver(pre_delete, sender=FeedbackTheme)
+def detach_rollups_on_theme_delete(sender, instance, **kwargs):
+    """Les feedbacks du thème passent sans thème : leurs agrégats sont reportés avant la suppression en cascade"""
+    detach_theme_rollups(instance)
+
+
+@receiver(pre_delete, sender=Feedback)
+def remove_rollups_on_feedback_delete(sender, instance, **kwargs):
+    """Retire des agrégats journaliers un feedback traité, avant sa suppression (état lu en base)"""
+    remove_feedback_from_rollups(instance)
+
+
 @receiver(post_save, sender=Feedback)
-def trigger_feedback_processing(sender, instance, created, **kwargs):
-    """
-    Signal déclenché après la création d'un nouveau feedback
-    Lance automatiquement le traitement asynchrone
-    
-    Args:
-        sender: Modèle Feedback
-        instance: Instance du feedback créé
-        created: True si c'est une création, False si c'est une mise à jour
-        **kwargs: Arguments additionnels
-    """
-    print(f"🔥 SIGNAL FEEDBACK: {instance.feedback_id}, created={created}, is_processed={instance.is_processed}")
-    logger.info(f"Signal déclenché pour feedback {instance.feedback_id}: created={created}, is_processed={instance.is_processed}")
-    
-    if created and not instance.is_processed:
-        logger.info(f"Nouveau feedback créé: {instance.feedback_id}, lancement du traitement asynchrone")
-        
-        # Déclenche la tâche Celery en arrière-plan avec gestion d'erreur
-        try:
-            task = process_feedback_async.delay(str(instance.feedback_id))
-            logger.info(f"Tâche Celery lancée: {task.id} pour feedback {instance.feedback_id}")
-        except Exception as e:
-            logger.error(f"Erreur Celery pour feedback {instance.feedback_id}: {e}")
-            logger.info("Le feedback a été créé mais le traitement asynchrone a échoué")
-    elif not created:
-        logger.debug(f"Feedback {instance.feedback_id} mis à jour, pas de retraitement")
-    else:
-        logger.info(f"Feedback {instance.feedback_id} déjà traité ou condition non remplie")
\ No newline at end of file
+@receiver(post_delete, sender=Feedback)
+def bump_feedback_etags(sender, instance, **kwargs):
+    """Nouvelle version des listes de feedbacks du patient (ETag de my_feedbacks)"""
+    bump_versions(*owner_scopes('feedbacks', patient_id=instance.patient_id))
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def bump_appointment_etags(sender, instance, **kwargs):
+    """Nouvelle version des rendez-vous du patient et du professionnel (ETag de upcoming)"""
+    bump_versions(*owner_scopes(
+        'appointments', patient_id=instance.patient_id, professional_id=instance.professional_id
+    ))
+
+
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def bump_reminder_etags(sender, instance, **kwargs):
+    """Nouvelle version des rappels du patient (ETag de pending)"""
+    bump_versions(*owner_scopes('reminders', patient_id=instance.patient_id))
+
+
+@receiver(post_save, sender=FeedbackTheme)
+@receiver(post_delete, sender=FeedbackTheme)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def bump_name_etags(sender, instance, **kwargs):
+    """Les listes affichent les noms de thème et de département : toutes changent de version"""
+    bump_versions(THEMES_SCOPE if sender is FeedbackTheme else DEPARTMENTS_SCOPE)
@@ -1,15 +1,129 @@
 """
 Tâches Celery pour le traitement asynchrone des feedbacks
 """
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
 from celery import shared_task
+from celery.signals import worker_process_init
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from .etags import bump_feedback_versions
+from .metrics import purge_old_metrics
 from .models import Feedback
-from .services import process_feedback
+from .outbox import purge_published_entries, relay_outbox
+from .redis_client import get_redis
+from .services import process_feedback, process_feedback_batch
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+@worker_process_init.connect
+def warm_up_sentiment_backend(**kwargs):
+    """Charge le backend de sentiment une seule fois par processus worker"""
+    from .sentiment_backends import get_sentiment_backend
+    
+    try:
+        get_sentiment_backend().warm_up()
+    except Exception as e:
+        logger.error(f"Préchargement du backend de sentiment impossible: {e}")
+
+
+@contextmanager
+def feedback_lock(feedback_id):
+    """
+    Verrou exclusif (non bloquant) sur un feedback, expirant après FEEDBACK_PROCESSING_LOCK_TIMEOUT
+    
+    Yields:
+        bool: True si le verrou est obtenu, False si un autre worker traite déjà ce feedback
+    """
+    key = f'feedback-lock:{feedback_id}'
+    timeout = settings.FEEDBACK_PROCESSING_LOCK_TIMEOUT
+    
+    redis = get_redis()
+    lock = redis.lock(key, timeout=timeout, blocking=False) if redis is not None else None
+    
+    if lock is not None:
+        try:
+            acquired = lock.acquire()
+        except Exception as e:
+            logger.warning(f"Verrou Redis indisponible pour le feedback {feedback_id}: {e}")
+            yield True
+            return
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception as e:
+                    # Verrou expiré pendant le traitement
+                    logger.warning(f"Libération du verrou du feedback {feedback_id} impossible: {e}")
+        return
+    
+    # Backend de cache local : add() atomique, suppression seulement si le verrou nous appartient
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def _lock_feedbacks(feedback_ids: list, stack: ExitStack) -> list:
+    """
+    Verrouille chaque feedback du lot et le relit après verrouillage
+    
+    Les feedbacks déjà en cours de traitement par un autre worker, ou terminés
+    entre-temps, sont écartés du lot.
+    """
+    locked_ids = []
+    for feedback_id in feedback_ids:
+        if stack.enter_context(feedback_lock(feedback_id)):
+            locked_ids.append(feedback_id)
+        else:
+            logger.info(f"Feedback {feedback_id} déjà en cours de traitement, ignoré dans ce lot")
+    return list(Feedback.objects.filter(feedback_id__in=locked_ids, is_processed=False).order_by('created_at'))
+
+
+def _record_failed_attempts(feedback_ids: list):
+    """
+    Compte un traitement en échec pour chaque feedback (sans passer par save : agrégats inchangés)
+
+    processing_attempts est exposé par l'API : les versions ETag des patients concernés sont incrémentées.
+    """
+    if feedback_ids:
+        feedbacks = Feedback.objects.filter(feedback_id__in=feedback_ids)
+        feedbacks.update(processing_attempts=F('processing_attempts') + 1)
+        bump_feedback_versions(set(feedbacks.values_list('patient_id', flat=True)))
+
+
+def _process_locked_batch(feedbacks: list) -> list:
+    """
+    Traite un lot déjà verrouillé ; chaque feedback resté non traité compte une tentative en échec
+    
+    Returns:
+        list: Feedbacks traités avec succès
+    """
+    try:
+        processed = process_feedback_batch(feedbacks)
+    except Exception as e:
+        logger.error(f"Échec du lot de {len(feedbacks)} feedbacks: {e}")
+        processed = []
+    processed_ids = {feedback.feedback_id for feedback in processed}
+    failed_ids = [feedback.feedback_id for feedback in feedbacks if feedback.feedback_id not in processed_ids]
+    if failed_ids:
+        logger.warning(f"{len(failed_ids)} feedbacks du lot en échec, repris au prochain drainage")
+        _record_failed_attempts(failed_ids)
+    return processed
+
+
+# acks_late : un feedback n'est retiré de la file qu'une fois traité (reprise par étape, verrou par feedback)
+@shared_task(bind=True, max_retries=3, acks_late=True)
 def process_feedback_async(self, feedback_id: str):
     """
     Tâche asynchrone pour traiter un feedback
@@ -24,15 +138,20 @@ def process_feedback_async(self, feedback_id: str):
     try:
         logger.info(f"Début traitement asynchrone du feedback {feedback_id}")
         
-        # Récupération du feedback
-        feedback = Feedback.objects.get(feedback_id=feedback_id)
-        
-        if feedback.is_processed:
-            logger.info(f"Feedback {feedback_id} déjà traité")
-            return {"status": "already_processed", "feedback_id": feedback_id}
-        
-        # Utilise la logique existante du service
-        processed_feedback = process_feedback(feedback)
+        with feedback_lock(feedback_id) as acquired:
+            if not acquired:
+                logger.info(f"Feedback {feedback_id} déjà en cours de traitement par un autre worker")
+                return {"status": "locked", "feedback_id": feedback_id}
+            
+            # Récupération du feedback (après verrouillage pour lire son étape à jour)
+            feedback = Feedback.objects.get(feedback_id=feedback_id)
+            
+            if feedback.is_processed:
+                logger.info(f"Feedback {feedback_id} déjà traité")
+                return {"status": "already_processed", "feedback_id": feedback_id}
+            
+            # Utilise la logique existante du service (reprise à la dernière étape sauvegardée)
+            processed_feedback = process_feedback(feedback)
         
         result = {
             "status": "success",
@@ -57,4 +176,115 @@ def process_feedback_async(self, feedback_id: str):
             logger.info(f"Retry {self.request.retries + 1}/{self.max_retries} pour {feedback_id}")
             raise self.retry(countdown=60, exc=e)
         
-        return {"status": "error", "message": str(e), "feedback_id": feedback_id}
\ No newline at end of file
+        _record_failed_attempts([feedback_id])
+        return {"status": "error", "message": str(e), "feedback_id": feedback_id}
+
+
+@shared_task(acks_late=True)
+def process_feedback_batch_async(feedback_ids: list):
+    """
+    Tâche asynchrone pour traiter un lot de feedbacks en un seul appel Groq
+    
+    Args:
+        feedback_ids: Liste des UUID des feedbacks à traiter
+        
+    Returns:
+        dict: Résumé du traitement du lot
+    """
+    with ExitStack() as stack:
+        feedbacks = _lock_feedbacks(feedback_ids, stack)
+        processed = _process_locked_batch(feedbacks)
+    
+    result = {
+        "status": "success",
+        "requested": len(feedback_ids),
+        "processed": len(processed)
+    }
+    logger.info(f"Lot de feedbacks traité: {result}")
+    return result
+
+
+@shared_task
+def drain_unprocessed_feedbacks():
+    """
+    Tâche périodique qui vide la file des feedbacks non traités par micro-lots
+    
+    Un lot incomplet n'est traité que si son plus ancien feedback attend depuis
+    plus de FEEDBACK_BATCH_MAX_WAIT_SECONDS, afin de regrouper les pics de soumissions.
+    Chaque feedback n'est tenté qu'une fois par passage : un lot en échec ne bloque pas
+    la file, et les feedbacks au-delà de FEEDBACK_MAX_PROCESSING_ATTEMPTS sont écartés.
+    
+    Returns:
+        dict: Nombre de lots et de feedbacks traités
+    """
+    batch_size = settings.FEEDBACK_BATCH_SIZE
+    max_wait = timedelta(seconds=settings.FEEDBACK_BATCH_MAX_WAIT_SECONDS)
+    
+    batches = 0
+    processed_count = 0
+    attempted_ids = set()
+    
+    while batches < settings.FEEDBACK_BATCH_MAX_PER_RUN:
+        feedbacks = list(
+            Feedback.objects.filter(
+                is_processed=False, processing_attempts__lt=settings.FEEDBACK_MAX_PROCESSING_ATTEMPTS
+            ).exclude(feedback_id__in=attempted_ids).order_by('created_at')[:batch_size]
+        )
+        if not feedbacks:
+            break
+        
+        if len(feedbacks) < batch_size and timezone.now() - feedbacks[0].created_at < max_wait:
+            logger.debug(f"Lot incomplet ({len(feedbacks)}/{batch_size}), attente de nouveaux feedbacks")
+            break
+        
+        feedback_ids = [feedback.feedback_id for feedback in feedbacks]
+        # Feedbacks en échec ou verrouillés par un autre worker : repris au prochain passage
+        attempted_ids.update(feedback_ids)
+        with ExitStack() as stack:
+            locked = _lock_feedbacks(feedback_ids, stack)
+            processed = _process_locked_batch(locked) if locked else []
+        batches += 1
+        processed_count += len(processed)
+    
+    if batches:
+        logger.info(f"Drainage des feedbacks: {processed_count} traités en {batches} lots")
+    return {"status": "success", "batches": batches, "processed": processed_count}
+
+
+@shared_task
+def relay_feedback_outbox():
+    """
+    Tâche périodique de rattrapage de l'outbox
+    
+    Publie les entrées restées en attente (broker indisponible au commit, worker
+    arrêté) puis purge les entrées publiées au-delà de la durée de rétention.
+    
+    Returns:
+        dict: Nombre d'entrées publiées et purgées
+    """
+    published = 0
+    # Quelques passes au plus : le reste attend le prochain passage
+    for _ in range(10):
+        count = relay_outbox(min_age_seconds=settings.OUTBOX_SWEEP_MIN_AGE_SECONDS)
+        published += count
+        if count < settings.OUTBOX_RELAY_LIMIT:
+            break
+    
+    purged = purge_published_entries()
+    if published or purged:
+        logger.info(f"Rattrapage de l'outbox: {published} entrées publiées, {purged} purgées")
+    return {"status": "success", "published": published, "purged": purged}
+
+
+@shared_task
+def purge_processing_metrics():
+    """
+    Tâche périodique de purge des métriques de traitement au-delà de FEEDBACK_METRICS_RETENTION_DAYS
+    
+    Returns:
+        dict: Nombre de mesures supprimées
+    """
+    purged = purge_old_metrics()
+    if purged:
+        logger.info(f"Purge des métriques de traitement: {purged} mesures supprimées")
+    return {"status": "success", "purged": purged}
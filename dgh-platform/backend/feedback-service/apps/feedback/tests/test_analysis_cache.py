@@ -0,0 +1,83 @@
+"""Tests du cache des résultats d'analyse (clé par contenu, résultats non cacheables)"""
+import uuid
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from ..analysis_cache import MISSES_KEY, get_cached_analysis, make_cache_key, store_analysis
+from ..models import Feedback
+from ..services import process_feedback
+
+GROQ_SENTIMENT = {
+    "prediction": "negative",
+    "confidence": {"positive": 5.0, "negative": 90.0, "neutral": 5.0},
+    "processing_time_seconds": 0.1,
+    "method": "groq_api",
+}
+
+
+@override_settings(
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=True,
+    FEEDBACK_ANALYSIS_MODE='separate',
+    THEME_INDEX_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'analysis-cache-tests'}}
+)
+class AnalysisCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _analysis(self, **overrides):
+        return {
+            "prediction": "negative", "confidence": GROQ_SENTIMENT["confidence"],
+            "theme": "Temps d'attente", "method": "groq_api", "theme_method": "groq", **overrides
+        }
+
+    def test_trivial_variants_share_a_key(self):
+        self.assertEqual(
+            make_cache_key("Très bien !", 'fr', 'separate'), make_cache_key("  très   BIEN", 'fr', 'separate')
+        )
+        self.assertNotEqual(make_cache_key("Très bien", 'fr', 'separate'), make_cache_key("Très bien", 'en', 'separate'))
+
+    def test_only_text_derived_results_are_cached(self):
+        store_analysis("Attente", 'fr', 'separate', self._analysis(method='keyword_fallback'))
+        self.assertIsNone(get_cached_analysis("Attente", 'fr', 'separate'))
+        # Thème déduit de la note : ne vaut pas pour le même texte avec une autre note
+        store_analysis("Attente", 'fr', 'separate', self._analysis(theme_method='fallback'))
+        self.assertIsNone(get_cached_analysis("Attente", 'fr', 'separate'))
+        store_analysis("Attente", 'fr', 'separate', self._analysis())
+        self.assertEqual(get_cached_analysis("Attente", 'fr', 'separate')["theme"], "Temps d'attente")
+
+    def _process(self, rating):
+        feedback = Feedback.objects.create(
+            description="Attente interminable", rating=rating, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+        )
+        return process_feedback(feedback)
+
+    @mock.patch('apps.feedback.services.analyze_sentiment', return_value=GROQ_SENTIMENT)
+    def test_rating_based_fallback_theme_is_not_reused(self, _analyze_sentiment):
+        with mock.patch('apps.feedback.theme_extraction._extract_theme_with_groq', side_effect=RuntimeError("429")):
+            first = self._process(rating=1)
+        self.assertEqual(first.theme.theme_name, "Insatisfaction - Problème majeur")
+
+        with mock.patch(
+            'apps.feedback.theme_extraction._extract_theme_with_groq',
+            return_value={"theme": "Temps d'attente", "is_new": False, "confidence": 0.9}
+        ):
+            second = self._process(rating=3)
+        self.assertEqual(second.theme.theme_name, "Temps d'attente")
+        self.assertFalse(second.processing_metrics.get().cache_hit)
+        # Thème issu du texte : réutilisé pour le feedback suivant au même texte
+        third = self._process(rating=5)
+        self.assertEqual((third.analysis_method, third.theme.theme_name), ('groq_api', "Temps d'attente"))
+        self.assertTrue(third.processing_metrics.get().cache_hit)
+
+    def test_counters_use_a_single_incr_on_redis(self):
+        from django.core.cache import cache
+
+        redis = mock.Mock()
+        with mock.patch('apps.feedback.analysis_cache.get_redis', return_value=redis), \
+                mock.patch.object(cache, 'add') as add:
+            get_cached_analysis("Attente", 'fr', 'separate')
+        redis.incr.assert_called_once_with(cache.make_key(MISSES_KEY), 1)
+        add.assert_not_called()
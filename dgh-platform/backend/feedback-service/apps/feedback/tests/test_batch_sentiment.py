@@ -0,0 +1,83 @@
+"""Tests de l'analyse de sentiment par micro-lots (une requête Groq par lot, repli par entrée)"""
+import json
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..models import Feedback
+from ..sentimental_analysis import analyze_sentiment_batch
+from ..services import process_feedback_batch
+
+
+def _groq_response(payload) -> SimpleNamespace:
+    content = payload if isinstance(payload, str) else json.dumps(payload)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _entry(index: int, sentiment: str = 'positive') -> dict:
+    return {"id": index, "sentiment": sentiment, "confidence": {"positive": 80, "negative": 10, "neutral": 10}}
+
+
+@override_settings(SENTIMENT_BACKEND='groq')
+class AnalyzeSentimentBatchTests(SimpleTestCase):
+
+    @mock.patch('apps.feedback.sentimental_analysis.chat_completion')
+    def test_one_request_for_the_whole_batch(self, chat_completion):
+        chat_completion.return_value = _groq_response({"results": [_entry(2, 'negative'), _entry(1)]})
+
+        results = analyze_sentiment_batch(["Merci", "Attente trop longue"])
+
+        chat_completion.assert_called_once()
+        self.assertEqual([result["prediction"] for result in results], ['positive', 'negative'])
+        self.assertEqual({result["method"] for result in results}, {'groq_api_batch'})
+
+    @mock.patch('apps.feedback.sentimental_analysis.chat_completion')
+    def test_missing_or_invalid_entries_fall_back_individually(self, chat_completion):
+        chat_completion.return_value = _groq_response({"results": [
+            _entry(1), {"id": 2, "sentiment": "furious", "confidence": {}}, _entry(1, 'negative')
+        ]})
+
+        results = analyze_sentiment_batch(["Merci", "Personnel impoli", "Chambre sale"], ['fr', 'fr', 'fr'])
+
+        self.assertEqual([result["method"] for result in results], ['groq_api_batch', 'keyword_fallback', 'keyword_fallback'])
+        # Identifiant en double : la première entrée est conservée
+        self.assertEqual(results[0]["prediction"], 'positive')
+        self.assertEqual(results[2]["prediction"], 'negative')
+
+    @mock.patch('apps.feedback.sentimental_analysis.chat_completion', return_value=_groq_response("pas du JSON"))
+    def test_unparseable_response_falls_back_for_all(self, _chat_completion):
+        results = analyze_sentiment_batch(["Excellent accueil", "Attente"])
+        self.assertEqual({result["method"] for result in results}, {'keyword_fallback'})
+        self.assertTrue(all(result["error"] for result in results))
+
+
+@override_settings(
+    SENTIMENT_BACKEND='groq',
+    FEEDBACK_BATCH_SIZE=2,
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=False,
+    THEME_INDEX_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'batch-tests'}}
+)
+class ProcessFeedbackBatchTests(TestCase):
+
+    @mock.patch('apps.feedback.services.resolve_feedback_theme', return_value={"theme": "Accueil", "method": "groq"})
+    @mock.patch('apps.feedback.sentimental_analysis.chat_completion')
+    def test_sentiment_requested_per_chunk_of_batch_size(self, chat_completion, _theme):
+        chat_completion.side_effect = lambda **kwargs: _groq_response(
+            {"results": [_entry(1, 'neutral'), _entry(2, 'neutral')]}
+        )
+        feedbacks = [
+            Feedback.objects.create(
+                description=f"Feedback {index}", rating=3, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+            )
+            for index in range(3)
+        ]
+
+        processed = process_feedback_batch(feedbacks)
+
+        self.assertEqual(chat_completion.call_count, 2)
+        self.assertEqual(len(processed), 3)
+        for feedback in Feedback.objects.all():
+            self.assertTrue(feedback.is_processed)
+            self.assertEqual((feedback.analysis_mode, feedback.processing_stage), ('batch', 'completed'))
@@ -0,0 +1,62 @@
+"""Tests du benchmark du pipeline contre le serveur Groq simulé (corpus minimal)"""
+import re
+from io import StringIO
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from ..fake_groq import build_completion_content
+from ..models import Feedback, FeedbackProcessingMetric
+
+COMMAND = 'benchmark_feedback_pipeline'
+RUNNER = 'apps.feedback.management.commands.benchmark_feedback_pipeline.DiscoverRunner'
+
+
+@override_settings(GROQ_MAX_RETRIES=0)
+class BenchmarkCommandTests(TransactionTestCase):
+    """Le benchmark tourne dans la base de test courante (création de la base jetable neutralisée)"""
+
+    def _benchmark(self, **options) -> str:
+        out = StringIO()
+        with mock.patch(RUNNER) as runner:
+            call_command(COMMAND, feedbacks=2, latency_ms=0, jitter_ms=0, stdout=out, **options)
+        runner.return_value.teardown_databases.assert_called_once()
+        return out.getvalue()
+
+    def test_report_covers_both_targets(self):
+        report = self._benchmark(target='both')
+
+        self.assertIn("Serveur Groq simulé: http://", report)
+        for label in ('services.process_feedback', 'tasks.process_feedback_async'):
+            section = report.split(label, 1)[1]
+            self.assertRegex(section, r"2 feedbacks en [\d.]+s - débit [\d.]+ feedbacks/s")
+            self.assertRegex(section, r"latence \(ms\): p50 \d+, p95 \d+, p99 \d+, max \d+")
+            self.assertIn("repli mots-clés: 0/2 (0.0%), échecs: 0, erreurs base de données: 0", section)
+            self.assertRegex(section, r"requêtes Groq simulées: [1-9]\d* \(0 erreurs 500, 0 réponses 429\)")
+            self.assertRegex(section, r"total\s+p50 \d+ ms, p95 \d+ ms")
+        self.assertEqual(Feedback.objects.filter(is_processed=True).count(), 4)
+        self.assertEqual(FeedbackProcessingMetric.objects.filter(succeeded=True).count(), 4)
+
+    def test_server_errors_are_reported_as_fallbacks(self):
+        report = self._benchmark(target='service', error_rate=1.0)
+
+        self.assertNotIn('tasks.process_feedback_async', report)
+        self.assertIn("repli mots-clés: 2/2 (100.0%)", report)
+        errors = re.search(r"requêtes Groq simulées: (\d+) \((\d+) erreurs 500", report)
+        self.assertEqual(errors.group(1), errors.group(2))
+
+
+class BenchmarkOptionsTests(SimpleTestCase):
+
+    def test_invalid_options_are_rejected_before_any_setup(self):
+        for options in ({'error_rate': 2}, {'feedbacks': 0}, {'circuit_breaker': True}):
+            with self.subTest(options=options), mock.patch(RUNNER) as runner, self.assertRaises(CommandError):
+                call_command(COMMAND, stdout=StringIO(), **options)
+            runner.assert_not_called()
+
+    def test_fake_server_answers_batch_prompts_in_order(self):
+        prompt = 'Réponds en JSON {"results": [...]}\n1. "Merci, accueil excellent"\n2. "Attente trop longue"'
+        content = build_completion_content("", prompt)
+        self.assertEqual(
+            [(item["id"], item["sentiment"]) for item in content["results"]], [(1, "positive"), (2, "negative")]
+        )
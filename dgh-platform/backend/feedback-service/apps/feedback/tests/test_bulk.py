@@ -0,0 +1,78 @@
+"""Tests de l'import groupé des feedbacks (bornes hors ligne)"""
+import json
+import uuid
+from unittest import mock
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import Feedback, FeedbackOutbox
+
+URL = '/api/v1/feedbacks/bulk/'
+
+
+@override_settings(
+    FEEDBACK_MICRO_BATCHING=False,
+    FEEDBACK_BULK_MAX_ITEMS=3,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bulk-tests'}}
+)
+class BulkFeedbackTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.department_id = str(uuid.uuid4())
+
+    def _item(self, **overrides) -> dict:
+        return {
+            'description': "Accueil chaleureux", 'rating': 5, 'language': 'fr',
+            'patient_id': str(uuid.uuid4()), 'department_id': self.department_id, **overrides
+        }
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_json_array_created_and_published_as_one_job(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(URL, [self._item(), self._item(rating=1)], format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 0))
+        created_ids = {result['feedback_id'] for result in response.data['results']}
+        self.assertEqual(created_ids, {str(pk) for pk in Feedback.objects.values_list('feedback_id', flat=True)})
+        self.assertEqual(FeedbackOutbox.objects.filter(published_at__isnull=False).count(), 2)
+        publish.assert_called_once()
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_ndjson_with_invalid_items_is_multi_status(self, _publish):
+        body = "\n".join([json.dumps(self._item()), "", json.dumps(self._item(rating=9))])
+        response = self.client.post(URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'error'])
+        self.assertIn('rating', response.data['results'][1]['errors'])
+        self.assertEqual(Feedback.objects.count(), 1)
+
+    def test_invalid_ndjson_line_is_rejected(self):
+        response = self.client.post(URL, '{"rating": 5}\n{oops', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ligne 2', str(response.data))
+
+    def test_ndjson_not_in_declared_encoding_is_rejected(self):
+        body = json.dumps(self._item(description="Accueil")).encode('utf-8') + b'\n{"description": "\xe9t\xe9"}'
+        response = self.client.post(URL, body, content_type='application/x-ndjson; charset=utf-8')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ligne 2", str(response.data))
+        self.assertFalse(Feedback.objects.exists())
+
+    def test_all_invalid_or_too_many_items(self):
+        self.assertEqual(self.client.post(URL, [self._item(rating=0)], format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'description': 'objet'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, [self._item()] * 4, format='json').status_code, 413)
+        self.assertFalse(Feedback.objects.exists())
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_patient_can_only_submit_own_feedbacks(self, _publish):
+        patient_id = uuid.uuid4()
+        self.client.credentials(HTTP_X_USER_TYPE='patient', HTTP_X_USER_ID=str(patient_id))
+
+        response = self.client.post(URL, [self._item(), self._item()], format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(Feedback.objects.values_list('patient_id', flat=True)), {patient_id})
@@ -0,0 +1,104 @@
+"""Tests du regroupement des feedbacks par thème (effectifs, derniers feedbacks et suite par curseur)"""
+import uuid
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Feedback, FeedbackTheme
+
+URL = '/api/v1/feedbacks/by_theme/'
+
+
+@override_settings(
+    FEEDBACK_BY_THEME_LIMIT=2,
+    FEEDBACK_BY_THEME_MAX_LIMIT=3,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'by-theme-tests'}}
+)
+class FeedbacksByThemeTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient_id = uuid.uuid4()
+        self.department_id = uuid.uuid4()
+        self.accueil = FeedbackTheme.objects.create(theme_name="Accueil")
+        self.attente = FeedbackTheme.objects.create(theme_name="Attente")
+        self.minutes_ago = 0
+
+    def _feedback(self, theme, patient_id=None) -> Feedback:
+        # Chaque nouveau feedback est plus ancien que le précédent
+        self.minutes_ago += 1
+        feedback = Feedback.objects.create(
+            description=f"Feedback {self.minutes_ago}", rating=3, theme=theme,
+            patient_id=patient_id or self.patient_id, department_id=self.department_id
+        )
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=timezone.now() - timedelta(minutes=self.minutes_ago))
+        return feedback
+
+    def _ids(self, feedbacks) -> list:
+        return [str(feedback.feedback_id) for feedback in feedbacks]
+
+    def test_counts_and_newest_feedbacks_per_theme(self):
+        attente = [self._feedback(self.attente) for _ in range(3)]
+        accueil = [self._feedback(self.accueil)]
+        self._feedback(None)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        # Thème le plus fourni en tête ; les feedbacks sans thème sont ignorés
+        self.assertEqual(
+            [(group['theme_name'], group['feedback_count']) for group in response.data], [("Attente", 3), ("Accueil", 1)]
+        )
+        first, second = response.data
+        self.assertEqual([f['feedback_id'] for f in first['feedbacks']], self._ids(attente[:2]))
+        self.assertIsNotNone(first['next_cursor'])
+        self.assertEqual([f['feedback_id'] for f in second['feedbacks']], self._ids(accueil))
+        self.assertIsNone(second['next_cursor'])
+
+    def test_query_count_does_not_grow_with_themes(self):
+        for index in range(5):
+            theme = FeedbackTheme.objects.create(theme_name=f"Thème {index}")
+            self._feedback(theme)
+            self._feedback(theme)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(URL)
+        self.assertEqual(len(response.data), 5)
+
+    def test_next_cursor_pages_through_one_theme(self):
+        attente = [self._feedback(self.attente) for _ in range(5)]
+        next_cursor = self.client.get(URL).data[0]['next_cursor']
+
+        seen = []
+        while next_cursor:
+            response = self.client.get(URL, {'theme_id': str(self.attente.theme_id), 'cursor': next_cursor})
+            self.assertEqual(response.status_code, 200)
+            seen.extend(f['feedback_id'] for f in response.data['feedbacks'])
+            next_cursor = response.data['next_cursor']
+
+        self.assertEqual(seen, self._ids(attente[2:]))
+
+    def test_limit_is_capped(self):
+        for _ in range(5):
+            self._feedback(self.accueil)
+        response = self.client.get(URL, {'limit': 10})
+        self.assertEqual(len(response.data[0]['feedbacks']), 3)
+
+    def test_patient_only_sees_own_feedbacks(self):
+        own = self._feedback(self.accueil)
+        self._feedback(self.accueil, patient_id=uuid.uuid4())
+        self._feedback(self.attente, patient_id=uuid.uuid4())
+
+        self.client.credentials(HTTP_X_USER_TYPE='patient', HTTP_X_USER_ID=str(self.patient_id))
+        response = self.client.get(URL)
+
+        self.assertEqual([(group['theme_name'], group['feedback_count']) for group in response.data], [("Accueil", 1)])
+        self.assertEqual([f['feedback_id'] for f in response.data[0]['feedbacks']], self._ids([own]))
+
+    def test_invalid_parameters_are_rejected(self):
+        theme_id = str(self.accueil.theme_id)
+        for params in ({'limit': 'deux'}, {'theme_id': 'accueil'}, {'theme_id': theme_id, 'cursor': 'pas-un-curseur'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(URL, params).status_code, 400)
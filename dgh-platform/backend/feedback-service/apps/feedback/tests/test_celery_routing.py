@@ -0,0 +1,46 @@
+"""Tests des files Celery dédiées (routage, profils de workers) et des priorités"""
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+
+from config.celery import app, configure_worker_for_queues
+from ..outbox import get_feedback_priority
+
+
+class CeleryRoutingTests(SimpleTestCase):
+
+    def _queue(self, task_name: str) -> str:
+        return app.amqp.router.route({}, task_name, (), {})['queue'].name
+
+    def test_llm_work_is_isolated_from_db_work(self):
+        for task_name in (
+            'apps.feedback.tasks.process_feedback_async',
+            'apps.feedback.tasks.process_feedback_batch_async',
+            'apps.feedback.tasks.drain_unprocessed_feedbacks',
+        ):
+            self.assertEqual(self._queue(task_name), 'llm_analysis')
+        self.assertEqual(self._queue('apps.feedback.tasks.relay_feedback_outbox'), 'maintenance')
+        self.assertEqual(self._queue('apps.feedback.tasks.unknown_task'), 'maintenance')
+
+    def test_every_task_has_an_explicit_route(self):
+        app.loader.import_default_modules()
+        task_names = [name for name in app.tasks if name.startswith('apps.')]
+        self.assertTrue(task_names)
+        self.assertEqual([name for name in task_names if name not in app.conf.task_routes], [])
+
+    @override_settings(FEEDBACK_URGENT_MAX_RATING=2)
+    def test_low_ratings_get_the_highest_priority(self):
+        self.assertEqual([get_feedback_priority(rating) for rating in (1, 2, 3, None)], [0, 0, 5, 5])
+
+    @override_settings(WORKER_QUEUE_PROFILES={
+        'llm_analysis': {'concurrency': 4, 'prefetch_multiplier': 1},
+        'maintenance': {'concurrency': 1, 'prefetch_multiplier': 2},
+    })
+    def test_worker_profile_follows_consumed_queues(self):
+        conf = SimpleNamespace(worker_prefetch_multiplier=4, worker_concurrency=8)
+        configure_worker_for_queues(conf=conf, options={'queues': 'llm_analysis,maintenance'})
+        self.assertEqual((conf.worker_prefetch_multiplier, conf.worker_concurrency), (1, 4))
+
+        # --concurrency explicite : conservé
+        conf = SimpleNamespace(worker_prefetch_multiplier=4, worker_concurrency=2)
+        configure_worker_for_queues(conf=conf, options={'queues': ['maintenance'], 'concurrency': 2})
+        self.assertEqual((conf.worker_prefetch_multiplier, conf.worker_concurrency), (2, 2))
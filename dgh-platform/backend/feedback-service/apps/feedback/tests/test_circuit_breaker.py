@@ -0,0 +1,127 @@
+"""Tests du disjoncteur Groq (décisions côté Python, transitions Lua si Redis est joignable)"""
+import time
+import uuid
+from unittest import mock, skipUnless
+from django.test import SimpleTestCase, override_settings
+
+from .. import circuit_breaker, llm_client
+from ..circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, CircuitOpenError
+from ..llm_client import LLMRateLimitExceeded, chat_completion
+from ..redis_client import get_redis
+from ..sentimental_analysis import analyze_sentiment
+
+
+def _redis_available() -> bool:
+    try:
+        redis = get_redis()
+        return redis is not None and redis.ping()
+    except Exception:
+        return False
+
+
+class _ScriptRedis:
+    """Redis minimal dont le script renvoie des décisions prédéfinies"""
+
+    def __init__(self, *decisions):
+        self.decisions = list(decisions)
+        self.calls = []
+
+    def register_script(self, script):
+        def run(keys, args, client):
+            self.calls.append(args[0])
+            return self.decisions.pop(0).encode()
+        return run
+
+
+@override_settings(GROQ_CIRCUIT_BREAKER_ENABLED=True)
+class CircuitBreakerDecisionTests(SimpleTestCase):
+
+    def test_open_circuit_rejects_the_call(self):
+        breaker = CircuitBreaker('test')
+        with mock.patch.object(circuit_breaker, 'get_redis', return_value=_ScriptRedis('probe', 'deny')):
+            breaker.before_call()
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_call()
+
+    @override_settings(GROQ_CIRCUIT_BREAKER_ENABLED=False)
+    def test_disabled_breaker_does_not_touch_redis(self):
+        redis = _ScriptRedis()
+        with mock.patch.object(circuit_breaker, 'get_redis', return_value=redis):
+            CircuitBreaker('test').before_call()
+            CircuitBreaker('test').record_failure()
+        self.assertEqual(redis.calls, [])
+
+    def test_redis_errors_let_calls_through(self):
+        with mock.patch.object(circuit_breaker, 'get_redis', side_effect=ConnectionError("redis down")):
+            CircuitBreaker('test').before_call()
+
+    def _probe_outcome(self, **patches) -> list:
+        """Événements envoyés au disjoncteur pour une sonde qui se termine comme indiqué"""
+        redis = _ScriptRedis('probe', STATE_HALF_OPEN)
+        client = mock.Mock()
+        client.chat.completions.create.side_effect = patches.pop('create_error', None)
+        with mock.patch.object(circuit_breaker, 'get_redis', return_value=redis), \
+                mock.patch.object(llm_client, 'groq_circuit_breaker', CircuitBreaker('test')), \
+                mock.patch.object(llm_client, 'get_llm_client', return_value=client), \
+                mock.patch.object(llm_client, 'get_redis', return_value=None), \
+                mock.patch.object(llm_client, '_acquire_rate_limit', **patches):
+            with self.assertRaises(Exception) as raised:
+                chat_completion([{"role": "user", "content": "Accueil"}], max_tokens=10)
+        return redis.calls, raised.exception
+
+    @override_settings(GROQ_MAX_RETRIES=0)
+    def test_probe_slot_released_when_rate_limit_gives_up(self):
+        calls, error = self._probe_outcome(side_effect=LLMRateLimitExceeded("quota"))
+        self.assertIsInstance(error, LLMRateLimitExceeded)
+        self.assertEqual(calls, ['allow', 'release'])
+
+    @override_settings(GROQ_MAX_RETRIES=0)
+    def test_probe_slot_released_on_non_retryable_error(self):
+        calls, error = self._probe_outcome(create_error=ValueError("requête invalide"))
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(calls, ['allow', 'release'])
+
+    @override_settings(SENTIMENT_BACKEND='groq', GROQ_API_KEY='test')
+    def test_open_circuit_falls_back_without_calling_groq(self):
+        client = mock.Mock()
+        with mock.patch('apps.feedback.llm_client.get_llm_client', return_value=client), \
+                mock.patch.object(circuit_breaker.groq_circuit_breaker, 'before_call', side_effect=CircuitOpenError("ouvert")):
+            result = analyze_sentiment("Accueil excellent", 'fr')
+        client.chat.completions.create.assert_not_called()
+        self.assertEqual((result["method"], result["prediction"]), ('keyword_fallback', 'positive'))
+
+
+@skipUnless(_redis_available(), "Transitions du script Lua vérifiées uniquement avec Redis")
+@override_settings(
+    GROQ_CIRCUIT_BREAKER_ENABLED=True, GROQ_CIRCUIT_FAILURE_THRESHOLD=2, GROQ_CIRCUIT_OPEN_SECONDS=1,
+    GROQ_CIRCUIT_HALF_OPEN_PROBES=1, GROQ_CIRCUIT_MIN_SAMPLES=3, GROQ_CIRCUIT_LATENCY_P95_SECONDS=1.0
+)
+class CircuitBreakerScriptTests(SimpleTestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(f'test-{uuid.uuid4().hex}')
+        self.addCleanup(get_redis().delete, self.breaker.key, self.breaker.latency_key)
+
+    def test_failures_open_then_probe_closes(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker._run('failure'), STATE_OPEN)
+        self.assertEqual(self.breaker._run('allow'), 'deny')
+        # Après GROQ_CIRCUIT_OPEN_SECONDS : semi-ouvert, une seule sonde admise
+        time.sleep(1.05)
+        self.assertEqual(self.breaker._run('allow'), 'probe')
+        self.assertEqual(self.breaker._run('allow'), 'deny')
+        self.assertEqual(self.breaker._run('success', 0.1), STATE_CLOSED)
+        self.assertEqual(self.breaker._run('allow'), 'allow')
+
+    def test_released_probe_frees_the_slot(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(1.05)
+        self.assertEqual(self.breaker._run('allow'), 'probe')
+        self.assertEqual(self.breaker._run('release'), STATE_HALF_OPEN)
+        self.assertEqual(self.breaker._run('allow'), 'probe')
+
+    def test_slow_p95_opens_the_circuit(self):
+        self.breaker.record_success(0.2)
+        self.breaker.record_success(0.3)
+        self.assertEqual(self.breaker._run('success', 5.0), STATE_OPEN)
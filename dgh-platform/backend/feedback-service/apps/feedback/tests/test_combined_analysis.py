@@ -0,0 +1,69 @@
+"""Tests du mode combiné : sentiment et thème en une seule requête Groq"""
+import json
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from ..models import Feedback
+from ..services import process_feedback
+
+COMBINED_PAYLOAD = {
+    "sentiment": "negative",
+    "confidence": {"positive": 5, "negative": 85, "neutral": 10},
+    "theme": "Temps d'attente",
+    "is_new": False,
+    "theme_confidence": 0.9,
+}
+
+
+def _groq_response(content: str) -> SimpleNamespace:
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@override_settings(
+    FEEDBACK_ANALYSIS_MODE='combined',
+    SENTIMENT_BACKEND='groq',
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=False,
+    THEME_INDEX_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'combined-tests'}}
+)
+class CombinedAnalysisTests(TestCase):
+
+    def _feedback(self, **fields) -> Feedback:
+        return Feedback.objects.create(
+            description="Trois heures d'attente aux urgences", rating=1,
+            patient_id=uuid.uuid4(), department_id=uuid.uuid4(), **fields
+        )
+
+    @mock.patch('apps.feedback.combined_analysis.chat_completion')
+    def test_single_request_sets_sentiment_and_theme(self, chat_completion):
+        chat_completion.return_value = _groq_response(json.dumps(COMBINED_PAYLOAD))
+
+        feedback = process_feedback(self._feedback())
+
+        chat_completion.assert_called_once()
+        self.assertEqual((feedback.sentiment, feedback.theme.theme_name), ('negative', "Temps d'attente"))
+        self.assertEqual((feedback.analysis_mode, feedback.analysis_method), ('combined', 'groq_combined'))
+        self.assertEqual(feedback.sentiment_negative_score, 85.0)
+
+    @mock.patch('apps.feedback.combined_analysis.chat_completion', return_value=_groq_response('{"sentiment": "negative"}'))
+    def test_invalid_response_falls_back_locally(self, _chat_completion):
+        feedback = process_feedback(self._feedback())
+        self.assertEqual(feedback.analysis_method, 'keyword_fallback')
+        # Thème de repli déduit du sentiment et de la note
+        self.assertEqual(feedback.theme.theme_name, "Insatisfaction - Problème majeur")
+
+    @mock.patch('apps.feedback.services.resolve_feedback_theme', return_value={"theme": "Accueil", "method": "groq"})
+    @mock.patch('apps.feedback.combined_analysis.chat_completion')
+    def test_resumed_feedback_only_runs_the_theme_stage(self, chat_completion, resolve_theme):
+        feedback = self._feedback(
+            sentiment='positive', sentiment_positive_score=90.0, sentiment_negative_score=5.0,
+            sentiment_neutral_score=5.0, analysis_method='groq_api', processing_stage='sentiment_done'
+        )
+
+        feedback = process_feedback(feedback)
+
+        chat_completion.assert_not_called()
+        resolve_theme.assert_called_once()
+        self.assertEqual((feedback.sentiment, feedback.analysis_mode), ('positive', 'separate'))
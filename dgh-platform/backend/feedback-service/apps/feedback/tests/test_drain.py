@@ -0,0 +1,116 @@
+"""Tests du drainage par micro-lots : verrous, reprise par étape et feedbacks en échec répété"""
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Feedback
+from ..tasks import drain_unprocessed_feedbacks, feedback_lock
+
+NEUTRAL = {"prediction": "neutral", "confidence": {"positive": 10.0, "negative": 10.0, "neutral": 80.0},
+           "processing_time_seconds": 0.1, "method": "groq_api"}
+
+
+@override_settings(
+    FEEDBACK_MICRO_BATCHING=True,
+    FEEDBACK_BATCH_SIZE=2,
+    FEEDBACK_BATCH_MAX_WAIT_SECONDS=0,
+    FEEDBACK_MAX_PROCESSING_ATTEMPTS=2,
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=False,
+    THEME_INDEX_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'drain-tests'}}
+)
+class DrainUnprocessedFeedbacksTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.department_id = uuid.uuid4()
+
+    def _feedback(self, minutes_ago: int, **fields) -> Feedback:
+        feedback = Feedback.objects.create(
+            description=f"Feedback {minutes_ago}", rating=3, patient_id=uuid.uuid4(),
+            department_id=self.department_id, **fields
+        )
+        # created_at est auto_now_add : l'ordre de la file est fixé après coup
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return feedback
+
+    def _batch_failing_for(self, poison_ids):
+        """process_feedback_batch simulé : marque traités les feedbacks sains, échoue sur les autres"""
+        def process(feedbacks):
+            healthy = [feedback for feedback in feedbacks if feedback.feedback_id not in poison_ids]
+            Feedback.objects.filter(feedback_id__in=[f.feedback_id for f in healthy]).update(is_processed=True)
+            return healthy
+        return process
+
+    def test_failing_head_batch_does_not_stall_the_queue(self):
+        poison = [self._feedback(10), self._feedback(9)]
+        healthy = [self._feedback(8), self._feedback(7)]
+        poison_ids = {feedback.feedback_id for feedback in poison}
+
+        with mock.patch('apps.feedback.tasks.process_feedback_batch', side_effect=self._batch_failing_for(poison_ids)):
+            result = drain_unprocessed_feedbacks()
+
+        self.assertEqual(result["processed"], 2)
+        self.assertTrue(all(Feedback.objects.get(pk=f.pk).is_processed for f in healthy))
+        # Une seule tentative par passage, même si le lot de tête échoue
+        self.assertEqual(
+            list(Feedback.objects.filter(pk__in=poison_ids).values_list('processing_attempts', flat=True)), [1, 1]
+        )
+
+    def test_feedbacks_over_attempt_limit_are_skipped(self):
+        poison = self._feedback(10)
+        batch = mock.Mock(side_effect=self._batch_failing_for({poison.feedback_id}))
+
+        with mock.patch('apps.feedback.tasks.process_feedback_batch', batch):
+            drain_unprocessed_feedbacks()
+            drain_unprocessed_feedbacks()
+            drain_unprocessed_feedbacks()
+
+        self.assertEqual(batch.call_count, 2)
+        self.assertEqual(Feedback.objects.get(pk=poison.pk).processing_attempts, 2)
+
+    def test_whole_batch_exception_counts_an_attempt(self):
+        feedback = self._feedback(10)
+        with mock.patch('apps.feedback.tasks.process_feedback_batch', side_effect=RuntimeError("Groq")):
+            result = drain_unprocessed_feedbacks()
+        self.assertEqual(result["processed"], 0)
+        self.assertEqual(Feedback.objects.get(pk=feedback.pk).processing_attempts, 1)
+
+    def test_feedback_locked_by_another_worker_is_left_alone(self):
+        busy = self._feedback(10)
+        free = self._feedback(9)
+        batch = mock.Mock(side_effect=self._batch_failing_for(set()))
+
+        with feedback_lock(busy.feedback_id) as acquired, \
+                mock.patch('apps.feedback.tasks.process_feedback_batch', batch):
+            self.assertTrue(acquired)
+            drain_unprocessed_feedbacks()
+
+        self.assertEqual([f.feedback_id for f in batch.call_args.args[0]], [free.feedback_id])
+        busy.refresh_from_db()
+        self.assertFalse(busy.is_processed)
+        self.assertEqual(busy.processing_attempts, 0)
+
+    @mock.patch(
+        'apps.feedback.theme_extraction._extract_theme_with_groq',
+        return_value={"theme": "Accueil", "is_new": False, "confidence": 0.9}
+    )
+    def test_resumes_at_saved_stage(self, _extract_theme):
+        resumed = self._feedback(
+            10, sentiment='negative', sentiment_negative_score=90.0, sentiment_positive_score=5.0,
+            sentiment_neutral_score=5.0, analysis_method='groq_api', processing_stage='sentiment_done'
+        )
+        fresh = self._feedback(9)
+
+        with mock.patch('apps.feedback.services.analyze_sentiment_batch', return_value=[NEUTRAL]) as batch_sentiment:
+            result = drain_unprocessed_feedbacks()
+
+        self.assertEqual(result["processed"], 2)
+        # Seul le feedback à l'étape 'pending' repasse par l'analyse de sentiment
+        self.assertEqual(batch_sentiment.call_args.args[0], [fresh.description])
+        resumed.refresh_from_db()
+        self.assertEqual((resumed.sentiment, resumed.processing_stage), ('negative', 'completed'))
+        self.assertEqual(resumed.theme.theme_name, "Accueil")
@@ -0,0 +1,69 @@
+"""Tests des GET conditionnels (ETag / If-None-Match)"""
+import uuid
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Feedback
+from ..services import process_feedback_batch
+from ..tasks import _record_failed_attempts
+
+
+# Compteurs de version en mémoire : sans Redis joignable, aucun ETag n'est émis
+@override_settings(
+    FEEDBACK_MICRO_BATCHING=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'etag-tests'}}
+)
+class ConditionalGetTests(TestCase):
+    """ETag des ressources interrogées en boucle : 304 tant que rien n'a changé"""
+
+    def setUp(self):
+        self.patient_id = uuid.uuid4()
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_USER_TYPE='patient', HTTP_X_USER_ID=str(self.patient_id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.feedback = Feedback.objects.create(
+                description="Attente", rating=2, patient_id=self.patient_id, department_id=uuid.uuid4()
+            )
+
+    def test_my_feedbacks_not_modified_until_patient_feedback_changes(self):
+        url = '/api/v1/feedbacks/my_feedbacks/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.feedback.sentiment = 'negative'
+            self.feedback.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bulk_writes_invalidate_my_feedbacks(self):
+        url = '/api/v1/feedbacks/my_feedbacks/'
+        etag = self.client.get(url)['ETag']
+
+        # Échecs comptés par QuerySet.update : pas de post_save
+        with self.captureOnCommitCallbacks(execute=True):
+            _record_failed_attempts([self.feedback.feedback_id])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # Sentiment du lot écrit par bulk_update, puis échec de l'étape thème
+        negative = {"prediction": "negative", "confidence": {"positive": 5.0, "negative": 90.0, "neutral": 5.0},
+                    "processing_time_seconds": 0.1, "method": "groq_api_batch"}
+        with mock.patch('apps.feedback.services.analyze_sentiment_batch', return_value=[negative]), \
+                mock.patch('apps.feedback.services.resolve_feedback_theme', side_effect=RuntimeError("Groq")), \
+                self.captureOnCommitCallbacks(execute=True):
+            process_feedback_batch([Feedback.objects.get(pk=self.feedback.pk)])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_processing_status_etag_follows_processing_state(self):
+        url = f'/api/v1/feedbacks/{self.feedback.feedback_id}/processing_status/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Feedback.objects.filter(pk=self.feedback.pk).update(is_processed=True, processed_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,107 @@
+"""Tests du flux SSE des fins de traitement"""
+import json
+import uuid
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+
+from .. import events
+from ..models import Feedback
+
+
+class FeedbackEventsTests(TestCase):
+    """Flux SSE des fins de traitement (repli par polling : pas de Redis en test)"""
+
+    def setUp(self):
+        self.patient_id = uuid.uuid4()
+        self.headers = {'X-User-Type': 'patient', 'X-User-ID': str(self.patient_id)}
+        self.feedback = Feedback.objects.create(
+            description="Attente", rating=2, patient_id=self.patient_id, department_id=uuid.uuid4(),
+            is_processed=True, processing_stage='completed', processed_at=timezone.now(), sentiment='negative'
+        )
+
+    def _event_id(self, feedback, processed_at=None) -> str:
+        return events.encode_event_id({
+            'processed_at': (processed_at or feedback.processed_at).isoformat(),
+            'feedback_id': str(feedback.feedback_id),
+        })
+
+    def _processed(self, chunks) -> list:
+        return [chunk for chunk in chunks if chunk.startswith(f'event: {events.EVENT_PROCESSED}')]
+
+    async def _read(self, url, count, on_keep_alive=None, **headers):
+        response = await AsyncClient().get(url, headers={**self.headers, **headers})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if on_keep_alive and chunks[-1] == ': keep-alive\n\n':
+                await on_keep_alive()
+                on_keep_alive = None
+            if len(chunks) == count:
+                break
+        await response.streaming_content.aclose()
+        return chunks
+
+    @override_settings(FEEDBACK_EVENTS_MAX_STREAM_SECONDS=0)
+    async def test_snapshot_then_replay_since_last_event_id(self):
+        earlier = self._event_id(self.feedback, self.feedback.processed_at - timedelta(seconds=1))
+        chunks = await self._read(
+            f'/api/v1/feedbacks/events/?feedback_ids={self.feedback.feedback_id}', 3, **{'Last-Event-ID': earlier}
+        )
+        self.assertTrue(chunks[0].startswith('retry: '))
+        # État initial : sans id, ne fait pas avancer Last-Event-ID
+        self.assertTrue(chunks[1].startswith(f'event: {events.EVENT_STATUS}\ndata: '))
+        self.assertIn(f'event: {events.EVENT_PROCESSED}\nid: {self._event_id(self.feedback)}\n', chunks[2])
+        self.assertEqual(json.loads(chunks[2].split('data: ')[1])['sentiment'], 'negative')
+
+    @override_settings(FEEDBACK_EVENTS_MAX_STREAM_SECONDS=0.3, FEEDBACK_EVENTS_POLL_SECONDS=0.05)
+    async def test_polling_does_not_resend_replayed_events(self):
+        earlier = self._event_id(self.feedback, self.feedback.processed_at - timedelta(seconds=1))
+        chunks = await self._read('/api/v1/feedbacks/events/', 100, **{'Last-Event-ID': earlier})
+        self.assertEqual(len(self._processed(chunks)), 1)
+        # Au moins un cycle de polling a eu lieu après le rattrapage
+        self.assertIn(': keep-alive\n\n', chunks)
+
+    @override_settings(FEEDBACK_EVENTS_MAX_STREAM_SECONDS=0)
+    async def test_last_event_id_query_parameter_resumes_after_that_event(self):
+        later = await sync_to_async(Feedback.objects.create)(
+            description="Accueil", rating=5, patient_id=self.patient_id, department_id=uuid.uuid4(),
+            is_processed=True, processing_stage='completed', sentiment='positive',
+            processed_at=self.feedback.processed_at + timedelta(seconds=1)
+        )
+        # Id envoyé tel quel dans l'URL (EventSource sans en-tête) : aucun caractère à encoder
+        chunks = await self._read(f'/api/v1/feedbacks/events/?last_event_id={self._event_id(self.feedback)}', 2)
+
+        self.assertEqual(len(self._processed(chunks)), 1)
+        self.assertIn(f'id: {self._event_id(later)}\n', chunks[1])
+
+    @override_settings(
+        FEEDBACK_EVENTS_MAX_STREAM_SECONDS=0.5, FEEDBACK_EVENTS_POLL_SECONDS=0.05, FEEDBACK_EVENTS_COMMIT_LAG_SECONDS=30
+    )
+    async def test_polling_sends_late_commits_with_earlier_processed_at(self):
+        late = {}
+
+        async def commit_late_feedback():
+            # Traité avant l'ouverture du flux, validé après le premier polling
+            late['feedback'] = await sync_to_async(Feedback.objects.create)(
+                description="Parking", rating=1, patient_id=self.patient_id, department_id=uuid.uuid4(),
+                is_processed=True, processing_stage='completed', sentiment='negative',
+                processed_at=timezone.now() - timedelta(seconds=5)
+            )
+
+        chunks = await self._read('/api/v1/feedbacks/events/', 100, on_keep_alive=commit_late_feedback)
+
+        ids = [chunk.split('id: ')[1].split('\n')[0] for chunk in self._processed(chunks)]
+        self.assertIn(self._event_id(late['feedback']), ids)
+        self.assertEqual(len(ids), len(set(ids)))
+
+    async def test_rejects_non_patients_and_invalid_ids(self):
+        client = AsyncClient()
+        response = await client.get('/api/v1/feedbacks/events/', headers={'X-User-Type': 'professional'})
+        self.assertEqual(response.status_code, 403)
+        response = await client.get('/api/v1/feedbacks/events/?feedback_ids=abc', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        response = await client.get('/api/v1/feedbacks/events/?last_event_id=pas-un-id', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,37 @@
+"""Tests des sélections de champs (?fields= / ?omit=) et de la projection des requêtes"""
+import uuid
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import Feedback, FeedbackTheme
+
+
+@override_settings(FEEDBACK_MICRO_BATCHING=True)
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?omit= : champs renvoyés et colonnes lues"""
+
+    @classmethod
+    def setUpTestData(cls):
+        theme = FeedbackTheme.objects.create(theme_name="Temps d'attente")
+        for rating in (2, 4):
+            Feedback.objects.create(
+                description="Attente", rating=rating, theme=theme,
+                patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_fields_limits_response_and_columns(self):
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/v1/feedbacks/', {'fields': 'feedback_id,rating,theme_name'})
+        self.assertEqual(set(response.data['results'][0]), {'feedback_id', 'rating', 'theme_name'})
+        self.assertNotIn('description', queries.captured_queries[0]['sql'])
+
+    def test_omit_removes_fields(self):
+        response = self.client.get('/api/v1/feedbacks/', {'omit': 'description,sentiment_positive_score'})
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('rating', response.data['results'][0])
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/feedbacks/', {'fields': 'password'}).status_code, 400)
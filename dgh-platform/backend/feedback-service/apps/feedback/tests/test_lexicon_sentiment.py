@@ -0,0 +1,42 @@
+"""Tests du moteur de sentiment par lexique (frontières de mots, négations, lot)"""
+from django.test import SimpleTestCase
+
+from ..lexicon_sentiment import analyze_lexicon, analyze_lexicon_batch, get_lexicon
+
+
+class LexiconSentimentTests(SimpleTestCase):
+
+    def test_terms_match_whole_words_only(self):
+        # "mal" dans "normal", "bon" dans "bonjour" : aucune correspondance
+        self.assertEqual(get_lexicon('fr').score("Bonjour, examen normal"), (0, 0))
+        self.assertEqual(get_lexicon('fr').score("Très   bien"), (1, 0))
+
+    def test_elided_terms_match(self):
+        self.assertEqual(get_lexicon('fr').score("Trois heures d'attente, l’accueil était aimable"), (1, 1))
+        self.assertEqual(analyze_lexicon("Je n'étais pas satisfait", 'fr')[0], 'negative')
+        self.assertEqual(analyze_lexicon("The staff didn't care", 'en')[1]["neutral"], 40.0)
+
+    def test_negation_flips_the_next_words(self):
+        self.assertEqual(analyze_lexicon("Le personnel n'était pas aimable", 'fr')[0], 'negative')
+        self.assertEqual(analyze_lexicon("Jamais mal accueilli", 'fr')[0], 'positive')
+        self.assertEqual(analyze_lexicon("The nurse was not rude", 'en')[0], 'positive')
+
+    def test_negation_window_and_clause_break(self):
+        lexicon = get_lexicon('fr')
+        # Au-delà de NEGATION_WINDOW mots, la polarité n'est plus inversée
+        self.assertEqual(lexicon.score("pas du tout très très bien"), (1, 0))
+        # Une ponctuation referme la fenêtre de négation
+        self.assertEqual(lexicon.score("Pas de souci, excellent"), (1, 0))
+        self.assertEqual(lexicon.score("Pas excellent"), (0, 1))
+
+    def test_languages_without_lexicon_use_french_and_english(self):
+        self.assertEqual(analyze_lexicon("Merci, very good", 'dua')[0], 'positive')
+
+    def test_batch_matches_single_analysis(self):
+        texts = ["Très bien !", "très   BIEN !", "Pas aimable", "Attente interminable", None]
+        languages = ['fr', 'fr', 'fr', 'en', 'fr']
+        results = analyze_lexicon_batch(texts, languages)
+
+        self.assertEqual(results, [analyze_lexicon(text, language) for text, language in zip(texts, languages)])
+        # Doublons analysés une fois, mais chaque feedback reçoit son propre dict de scores
+        self.assertIsNot(results[0][1], results[1][1])
@@ -0,0 +1,76 @@
+"""Tests de la concurrence Groq bornée sur l'ensemble des workers (baux Redis)"""
+from contextlib import ExitStack
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+
+from .. import llm_client
+from ..llm_client import LLMRateLimitExceeded, _concurrency_slot
+
+
+class _LeaseRedis:
+    """Redis minimal : le script de concurrence est rejoué sur un ensemble de baux en mémoire"""
+
+    def __init__(self):
+        self.leases = set()
+
+    def register_script(self, script):
+        def run(keys, args, client):
+            limit, _ttl, token = args
+            if len(self.leases) >= limit:
+                return 0
+            self.leases.add(token)
+            return 1
+        return run
+
+    def zrem(self, key, token):
+        self.leases.discard(token)
+
+
+@override_settings(GROQ_MAX_CONCURRENCY=2, GROQ_RATE_LIMIT_MAX_WAIT_SECONDS=0.1)
+class ConcurrencySlotTests(SimpleTestCase):
+
+    def setUp(self):
+        self.redis = _LeaseRedis()
+        patcher = mock.patch.object(llm_client, 'get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        llm_client._concurrency_script = None
+        self.addCleanup(setattr, llm_client, '_concurrency_script', None)
+
+    def test_limit_is_shared_through_redis(self):
+        with ExitStack() as stack:
+            # Deux workers distincts tiennent chacun un bail : le troisième attend puis abandonne
+            stack.enter_context(_concurrency_slot())
+            stack.enter_context(_concurrency_slot())
+            self.assertEqual(len(self.redis.leases), 2)
+            with self.assertRaises(LLMRateLimitExceeded):
+                with _concurrency_slot():
+                    pass
+        self.assertEqual(self.redis.leases, set())
+
+    def test_lease_released_when_call_fails(self):
+        with self.assertRaises(RuntimeError):
+            with _concurrency_slot():
+                raise RuntimeError("Groq indisponible")
+        self.assertEqual(self.redis.leases, set())
+        with _concurrency_slot(), _concurrency_slot():
+            self.assertEqual(len(self.redis.leases), 2)
+
+    def test_redis_error_admits_the_call(self):
+        with mock.patch.object(llm_client, '_try_acquire_slot', side_effect=ConnectionError("redis down")):
+            with _concurrency_slot():
+                self.assertEqual(self.redis.leases, set())
+
+
+@override_settings(GROQ_MAX_CONCURRENCY=1)
+class LocalConcurrencySlotTests(SimpleTestCase):
+
+    def setUp(self):
+        llm_client._semaphore = None
+        self.addCleanup(setattr, llm_client, '_semaphore', None)
+
+    def test_process_semaphore_without_redis(self):
+        with mock.patch.object(llm_client, 'get_redis', return_value=None):
+            with _concurrency_slot():
+                self.assertFalse(llm_client._semaphore.acquire(blocking=False))
+            self.assertTrue(llm_client._semaphore.acquire(blocking=False))
@@ -0,0 +1,92 @@
+"""Tests de l'instrumentation par étape du pipeline d'analyse"""
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from ..metrics import MetricsCollector, collecting, get_stage_percentiles, record_llm_usage
+from ..models import Feedback, FeedbackProcessingMetric
+from ..services import process_feedback
+
+SENTIMENT = {
+    "prediction": "positive", "confidence": {"positive": 90.0, "negative": 5.0, "neutral": 5.0},
+    "processing_time_seconds": 0.1, "method": "groq_api",
+}
+
+
+def _analyze_sentiment_with_usage(text, language='fr'):
+    record_llm_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30)))
+    return SENTIMENT
+
+
+@override_settings(
+    FEEDBACK_METRICS_ENABLED=True,
+    FEEDBACK_ANALYSIS_MODE='separate',
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=False,
+    THEME_INDEX_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'metrics-tests'}}
+)
+@mock.patch('apps.feedback.services.resolve_feedback_theme', return_value={"theme": "Accueil", "method": "groq"})
+class ProcessingMetricsTests(TestCase):
+
+    def _feedback(self) -> Feedback:
+        return Feedback.objects.create(
+            description="Accueil parfait", rating=5, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+        )
+
+    @mock.patch('apps.feedback.services.analyze_sentiment', side_effect=_analyze_sentiment_with_usage)
+    def test_one_row_per_processing_with_stage_durations(self, _sentiment, _theme):
+        feedback = process_feedback(self._feedback())
+
+        metric = FeedbackProcessingMetric.objects.get(feedback_id=feedback.feedback_id)
+        self.assertTrue(metric.succeeded)
+        self.assertEqual((metric.analysis_mode, metric.analysis_method), ('separate', 'groq_api'))
+        for field in ('queue_wait_ms', 'sentiment_ms', 'theme_ms', 'theme_upsert_ms', 'save_ms', 'total_ms'):
+            self.assertIsNotNone(getattr(metric, field), field)
+        self.assertIsNone(metric.combined_ms)
+        self.assertEqual((metric.prompt_tokens, metric.completion_tokens, metric.llm_calls), (120, 30, 1))
+
+    @mock.patch('apps.feedback.services.analyze_sentiment', return_value=SENTIMENT)
+    def test_failure_is_recorded_and_resume_has_no_queue_wait(self, _sentiment, theme):
+        feedback = self._feedback()
+        theme.side_effect = RuntimeError("base indisponible")
+        with self.assertRaises(RuntimeError):
+            process_feedback(feedback)
+
+        theme.side_effect = None
+        process_feedback(Feedback.objects.get(pk=feedback.pk))
+
+        failed, resumed = FeedbackProcessingMetric.objects.filter(feedback_id=feedback.feedback_id).order_by('created_at')
+        self.assertFalse(failed.succeeded)
+        self.assertIsNotNone(failed.queue_wait_ms)
+        # Reprise à l'étape thème : l'âge du feedback n'est pas une attente en file
+        self.assertTrue(resumed.succeeded)
+        self.assertIsNone(resumed.queue_wait_ms)
+        self.assertIsNone(resumed.sentiment_ms)
+
+    def test_percentiles_use_successful_runs_only(self, _theme):
+        feedback = self._feedback()
+        for total_ms in (10, 20, 30, 40):
+            FeedbackProcessingMetric.objects.create(
+                feedback=feedback, analysis_mode='batch', succeeded=True, total_ms=total_ms
+            )
+        FeedbackProcessingMetric.objects.create(feedback=feedback, analysis_mode='batch', succeeded=False, total_ms=5000)
+
+        stats = get_stage_percentiles(hours=1, mode='batch')
+
+        self.assertEqual((stats['feedbacks'], stats['failures']), (4, 1))
+        self.assertEqual(stats['stages_ms']['total']['count'], 4)
+        self.assertEqual(stats['stages_ms']['total']['p99'], 40)
+        self.assertEqual(stats['stages_ms']['sentiment']['count'], 0)
+
+    def test_batch_share_splits_a_shared_call(self, _theme):
+        shared = MetricsCollector()
+        with collecting(shared):
+            record_llm_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=300, completion_tokens=90)))
+        shared.add_stage('sentiment', 0.9)
+
+        own = MetricsCollector()
+        own.add_share(shared, 3)
+
+        self.assertAlmostEqual(own.stages['sentiment'], 0.3)
+        self.assertEqual((own.prompt_tokens, own.completion_tokens, own.llm_calls), (100, 30, 0))
@@ -0,0 +1,114 @@
+"""Tests de l'outbox transactionnelle : écriture avec le feedback, publication après commit, rattrapage"""
+import uuid
+from contextlib import contextmanager
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from ..models import Feedback, FeedbackOutbox
+from ..outbox import _publish, relay_outbox
+
+
+@override_settings(
+    FEEDBACK_MICRO_BATCHING=False,
+    FEEDBACK_BATCH_SIZE=2,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'outbox-tests'}}
+)
+class OutboxTests(TestCase):
+
+    def _create(self, rating: int = 4) -> Feedback:
+        return Feedback.objects.create(
+            description="Très bon accueil", rating=rating, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+        )
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_entry_published_only_after_commit(self, publish):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            feedback = self._create(rating=2)
+        entry = FeedbackOutbox.objects.get(feedback=feedback)
+        self.assertIsNone(entry.published_at)
+        publish.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        publish.assert_called_once_with([(feedback.feedback_id, 2)], False)
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.published_at)
+
+    def test_broker_failure_is_recorded_and_retried(self):
+        with mock.patch('apps.feedback.outbox._publish', side_effect=ConnectionError("broker down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                feedback = self._create()
+        entry = FeedbackOutbox.objects.get(feedback=feedback)
+        self.assertEqual((entry.attempts, entry.published_at), (1, None))
+        self.assertIn("broker down", entry.last_error)
+
+        # Rattrapage périodique une fois le broker revenu
+        with mock.patch('apps.feedback.outbox._publish') as publish:
+            self.assertEqual(relay_outbox(), 1)
+        publish.assert_called_once()
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.published_at)
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_processed_feedbacks_are_marked_without_publishing(self, publish):
+        with self.captureOnCommitCallbacks(execute=False):
+            feedback = self._create()
+        Feedback.objects.filter(pk=feedback.pk).update(is_processed=True)
+
+        self.assertEqual(relay_outbox(), 1)
+        publish.assert_not_called()
+
+    @override_settings(FEEDBACK_MICRO_BATCHING=True)
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_micro_batching_defers_to_the_drain(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create()
+        publish.assert_not_called()
+        self.assertTrue(FeedbackOutbox.objects.filter(published_at__isnull=True).exists())
+
+    @mock.patch('apps.feedback.outbox._publish')
+    def test_bulk_import_published_as_one_job(self, publish):
+        feedbacks = [
+            Feedback(description=f"Import {index}", rating=3, patient_id=uuid.uuid4(), department_id=uuid.uuid4())
+            for index in range(5)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.bulk_create(feedbacks, single_job=True)
+
+        self.assertEqual(FeedbackOutbox.objects.filter(published_at__isnull=False).count(), 5)
+        publish.assert_called_once()
+        self.assertEqual(len(publish.call_args.args[0]), 5)
+        self.assertTrue(publish.call_args.args[1])
+
+
+@override_settings(FEEDBACK_BATCH_SIZE=2)
+class PublishTests(TestCase):
+
+    def test_urgent_feedbacks_go_first_in_their_own_batches(self):
+        @contextmanager
+        def producer_or_acquire():
+            yield mock.sentinel.producer
+
+        published = []
+        single = mock.Mock(side_effect=lambda args, priority, producer: published.append((priority, args[0])))
+        batch = mock.Mock(side_effect=lambda args, priority, producer: published.append((priority, args[0])))
+        feedbacks = [('a', 5), ('b', 1), ('c', 4), ('d', 2), ('e', 3)]
+
+        with mock.patch('celery.current_app.producer_or_acquire', producer_or_acquire), \
+                mock.patch('apps.feedback.tasks.process_feedback_async.apply_async', single), \
+                mock.patch('apps.feedback.tasks.process_feedback_batch_async.apply_async', batch):
+            _publish(feedbacks)
+
+        self.assertEqual(published, [(0, ['b', 'd']), (5, ['a', 'c']), (5, 'e')])
+
+    def test_single_job_keeps_one_task_at_the_most_urgent_priority(self):
+        @contextmanager
+        def producer_or_acquire():
+            yield mock.sentinel.producer
+
+        batch = mock.Mock()
+        with mock.patch('celery.current_app.producer_or_acquire', producer_or_acquire), \
+                mock.patch('apps.feedback.tasks.process_feedback_batch_async.apply_async', batch):
+            _publish([('a', 5), ('b', 1), ('c', 4)], single_job=True)
+
+        batch.assert_called_once_with(args=[['a', 'b', 'c']], priority=0, producer=mock.sentinel.producer)
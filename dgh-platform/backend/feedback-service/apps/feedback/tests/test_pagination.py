@@ -0,0 +1,134 @@
+"""Tests de la pagination par clé des listes (ex aequo, stabilité aux insertions, tri choisi)"""
+import uuid
+from datetime import date, time, timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Appointment, Department, Feedback
+from ..pagination import InvalidCursor, after_cursor, decode_cursor, encode_cursor
+
+FEEDBACKS_URL = '/api/v1/feedbacks/'
+APPOINTMENTS_URL = '/api/v1/appointments/'
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pagination-tests'}}
+)
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.department_id = uuid.uuid4()
+        self.now = timezone.now()
+
+    def _feedback(self, minutes_ago: int, rating: int = 3) -> Feedback:
+        feedback = Feedback.objects.create(
+            description=f"Feedback {minutes_ago}", rating=rating, patient_id=uuid.uuid4(),
+            department_id=self.department_id
+        )
+        Feedback.objects.filter(pk=feedback.pk).update(created_at=self.now - timedelta(minutes=minutes_ago))
+        return feedback
+
+    def _feedback_ids(self, params: dict) -> list:
+        """Identifiants de chaque page, en suivant les liens `next`"""
+        pages = []
+        response = self.client.get(FEEDBACKS_URL, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['feedback_id'] for row in response.data['results']])
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_ties_on_created_at_are_neither_skipped_nor_repeated(self):
+        feedbacks = [self._feedback(minutes_ago=1) for _ in range(5)]
+
+        pages = self._feedback_ids({'page_size': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        expected = sorted((str(f.feedback_id) for f in feedbacks), key=lambda pk: uuid.UUID(pk), reverse=True)
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_next_page_is_stable_when_feedbacks_arrive(self):
+        older = [self._feedback(minutes_ago) for minutes_ago in range(1, 5)]
+        first = self.client.get(FEEDBACKS_URL, {'page_size': 2})
+
+        # Un nouveau feedback en tête de liste ne décale pas la page suivante
+        self._feedback(minutes_ago=0)
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(
+            [row['feedback_id'] for row in second.data['results']], [str(f.feedback_id) for f in older[2:]]
+        )
+        self.assertIsNone(second.data['next'])
+
+    def test_previous_link_returns_the_page_before(self):
+        for minutes_ago in range(1, 6):
+            self._feedback(minutes_ago)
+        first = self.client.get(FEEDBACKS_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        self.assertIsNone(first.data['previous'])
+
+        previous = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [row['feedback_id'] for row in previous.data['results']],
+            [row['feedback_id'] for row in first.data['results']]
+        )
+
+    def test_requested_ordering_is_kept_across_pages(self):
+        for minutes_ago, rating in enumerate([5, 1, 3, 1, 4], start=1):
+            self._feedback(minutes_ago, rating=rating)
+
+        pages = self._feedback_ids({'page_size': 2, 'ordering': 'rating'})
+
+        ratings = dict(Feedback.objects.values_list('feedback_id', 'rating'))
+        self.assertEqual([ratings[uuid.UUID(pk)] for pk in sum(pages, [])], [1, 1, 3, 4, 5])
+
+    def test_appointments_paginate_on_date_time_and_id(self):
+        department = Department.objects.create(name="Cardiologie test")
+        appointments = [
+            Appointment.objects.create(
+                scheduled_date=date(2026, 1, 2), time=time(9, 0), type='consultation',
+                patient_id=uuid.uuid4(), professional_id=uuid.uuid4(), department=department
+            )
+            for _ in range(3)
+        ]
+
+        ids = []
+        response = self.client.get(APPOINTMENTS_URL, {'page_size': 2})
+        while True:
+            ids.extend(row['appointment_id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(ids, sorted(str(a.appointment_id) for a in appointments))
+
+    def test_tampered_cursor_is_rejected(self):
+        self._feedback(1)
+        self.assertEqual(self.client.get(FEEDBACKS_URL, {'cursor': 'pas-un-curseur'}).status_code, 404)
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        for minutes_ago in range(1, 4):
+            self._feedback(minutes_ago)
+        next_url = self.client.get(FEEDBACKS_URL, {'page_size': 1}).data['next']
+        # Curseur (created_at, feedback_id) réutilisé avec un tri (rating, created_at, feedback_id)
+        response = self.client.get(f"{next_url}&ordering=rating")
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedbackCursorTests(TestCase):
+
+    def test_round_trip(self):
+        feedback = Feedback.objects.create(
+            description="Accueil", rating=4, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+        )
+        self.assertEqual(decode_cursor(encode_cursor(feedback)), (feedback.created_at, feedback.feedback_id))
+        self.assertFalse(after_cursor(Feedback.objects.all(), encode_cursor(feedback)).exists())
+
+    def test_invalid_cursor_raises(self):
+        for cursor in ('pas-un-curseur', 'e30=', 'éé'):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
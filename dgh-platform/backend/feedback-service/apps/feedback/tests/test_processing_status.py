@@ -0,0 +1,53 @@
+"""Tests du statut de traitement groupé"""
+import uuid
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Feedback
+
+
+class BatchProcessingStatusTests(TestCase):
+    """Statut groupé : une requête IN, états compacts dans l'ordre demandé"""
+
+    def setUp(self):
+        self.patient_id = uuid.uuid4()
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_USER_TYPE='patient', HTTP_X_USER_ID=str(self.patient_id))
+        self.feedbacks = [
+            Feedback.objects.create(
+                description=f"Attente {i}", rating=2, patient_id=self.patient_id, department_id=uuid.uuid4()
+            )
+            for i in range(3)
+        ]
+        Feedback.objects.filter(pk=self.feedbacks[1].pk).update(
+            is_processed=True, processing_stage='completed', processed_at=timezone.now(), sentiment='negative'
+        )
+        self.other = Feedback.objects.create(
+            description="Autre patient", rating=4, patient_id=uuid.uuid4(), department_id=uuid.uuid4()
+        )
+
+    def test_statuses_in_one_query(self):
+        ids = [str(feedback.feedback_id) for feedback in reversed(self.feedbacks)] + [str(self.other.feedback_id)]
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                '/api/v1/feedbacks/processing_status/', {'feedback_ids': ids}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['feedback_id'] for result in response.data['results']], ids[:3])
+        self.assertEqual((response.data['processed'], response.data['pending']), (1, 2))
+        self.assertEqual(response.data['results'][1]['sentiment'], 'negative')
+        # Feedback d'un autre patient : non divulgué
+        self.assertEqual(response.data['not_found'], [str(self.other.feedback_id)])
+
+    def test_invalid_ids_rejected(self):
+        url = '/api/v1/feedbacks/processing_status/'
+        response = self.client.post(url, {'feedback_ids': ['abc']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['invalid'], ['abc'])
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, 400)
+        with override_settings(FEEDBACK_STATUS_BATCH_MAX_IDS=1):
+            response = self.client.post(
+                url, {'feedback_ids': [str(feedback.feedback_id) for feedback in self.feedbacks]}, format='json'
+            )
+        self.assertEqual(response.status_code, 413)
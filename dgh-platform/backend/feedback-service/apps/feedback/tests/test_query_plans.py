@@ -0,0 +1,152 @@
+"""
+Tests de non-régression des plans d'exécution des requêtes chaudes
+
+Une base PostgreSQL est peuplée (volumétrie suffisante pour que le planificateur
+préfère les index), puis chaque requête est passée à EXPLAIN : un Seq Scan sur la
+table interrogée signifie qu'un index aligné sur la requête a disparu ou n'est
+plus utilisable. Ignorés hors PostgreSQL (SQLite de développement).
+"""
+import json
+import random
+import uuid
+from datetime import date, time, timedelta
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest import skipUnless
+
+from ..models import Appointment, Department, Feedback, Reminder
+from ..search import match_feedbacks
+
+FEEDBACKS = 20000
+PATIENTS = 500
+DEPARTMENTS = 20
+APPOINTMENTS = 10000
+REMINDERS = 10000
+
+
+def _scans(plan: dict):
+    """Parcourt récursivement les nœuds d'un plan EXPLAIN (FORMAT JSON)"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _scans(child)
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN vérifié uniquement sur PostgreSQL")
+@override_settings(FEEDBACK_MICRO_BATCHING=True)
+class HotQueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(20)
+        now = timezone.now()
+        cls.patient_ids = [uuid.uuid4() for _ in range(PATIENTS)]
+        cls.department_ids = [uuid.uuid4() for _ in range(DEPARTMENTS)]
+        cls.professional_ids = [uuid.uuid4() for _ in range(PATIENTS // 10)]
+
+        feedbacks = Feedback.objects.bulk_create([
+            Feedback(
+                description=f"Feedback {index} : {rng.choice(['attente aux urgences', 'accueil aimable', 'chambre propre'])}",
+                rating=rng.randint(1, 5),
+                patient_id=rng.choice(cls.patient_ids),
+                department_id=rng.choice(cls.department_ids),
+            )
+            for index in range(FEEDBACKS)
+        ], batch_size=2000)
+        # Dates étalées sur un an, 98 % traités (update en masse : hors agrégats, inutiles ici)
+        for feedback in feedbacks:
+            feedback.created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        Feedback.objects.bulk_update(feedbacks, ['created_at'], batch_size=2000)
+        Feedback.objects.exclude(pk__in=[feedback.pk for feedback in feedbacks[:FEEDBACKS // 50]]).update(
+            is_processed=True, sentiment='neutral', processing_stage='completed'
+        )
+
+        department = Department.objects.create(name="Cardiologie")
+        Appointment.objects.bulk_create([
+            Appointment(
+                scheduled_date=date.today() + timedelta(days=rng.randint(-300, 60)),
+                time=time(rng.randint(8, 17), rng.choice([0, 15, 30, 45])),
+                type='consultation',
+                status=rng.choice(['completed'] * 8 + ['scheduled', 'confirmed']),
+                patient_id=rng.choice(cls.patient_ids),
+                professional_id=rng.choice(cls.professional_ids),
+                department=department,
+            )
+            for _ in range(APPOINTMENTS)
+        ], batch_size=2000)
+        Reminder.objects.bulk_create([
+            Reminder(
+                channel='sms',
+                scheduled_time=now + timedelta(minutes=rng.randint(-300 * 24 * 60, 30 * 24 * 60)),
+                status=rng.choice(['sent'] * 19 + ['pending']),
+                message_content="Rappel de rendez-vous",
+                patient_id=rng.choice(cls.patient_ids),
+            )
+            for _ in range(REMINDERS)
+        ], batch_size=2000)
+
+        with connection.cursor() as cursor:
+            for model in (Feedback, Appointment, Reminder):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def assertNoSeqScan(self, queryset):
+        table = queryset.model._meta.db_table
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        seq_scans = [
+            node for node in _scans(plan)
+            if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') == table
+        ]
+        self.assertFalse(
+            seq_scans, f"Seq Scan sur {table}:\n{str(queryset.query)}\n{json.dumps(plan, indent=2)}"
+        )
+
+    def test_patient_feedbacks_page(self):
+        self.assertNoSeqScan(
+            Feedback.objects.filter(patient_id=self.patient_ids[0]).order_by('-created_at', '-feedback_id')[:20]
+        )
+
+    def test_feedbacks_keyset_next_page(self):
+        cursor = Feedback.objects.order_by('-created_at', '-feedback_id')[100]
+        self.assertNoSeqScan(
+            Feedback.objects.filter(
+                Q(created_at__lt=cursor.created_at)
+                | Q(created_at=cursor.created_at, feedback_id__lt=cursor.feedback_id)
+            ).order_by('-created_at', '-feedback_id')[:20]
+        )
+
+    def test_department_feedbacks_by_period(self):
+        self.assertNoSeqScan(
+            Feedback.objects.filter(
+                department_id=self.department_ids[0], created_at__gte=timezone.now() - timedelta(days=30)
+            )
+        )
+
+    def test_unprocessed_feedbacks_queue(self):
+        self.assertNoSeqScan(Feedback.objects.filter(is_processed=False).order_by('created_at')[:50])
+
+    def test_pending_reminders_by_time(self):
+        self.assertNoSeqScan(
+            Reminder.objects.filter(status='pending', scheduled_time__lte=timezone.now())
+            .order_by('scheduled_time', 'reminder_id')[:100]
+        )
+
+    def test_patient_reminders(self):
+        self.assertNoSeqScan(
+            Reminder.objects.filter(patient_id=self.patient_ids[0]).order_by('scheduled_time', 'reminder_id')[:20]
+        )
+
+    def test_professional_appointments_by_date(self):
+        self.assertNoSeqScan(
+            Appointment.objects.filter(professional_id=self.professional_ids[0], scheduled_date__gte=date.today())
+            .order_by('scheduled_date', 'time', 'appointment_id')[:20]
+        )
+
+    def test_upcoming_appointments(self):
+        self.assertNoSeqScan(
+            Appointment.objects.filter(scheduled_date__gte=date.today(), status__in=['scheduled', 'confirmed'])
+            .order_by('scheduled_date', 'time', 'appointment_id')[:20]
+        )
+
+    def test_full_text_search(self):
+        self.assertNoSeqScan(match_feedbacks(Feedback.objects.all(), 'attente'))
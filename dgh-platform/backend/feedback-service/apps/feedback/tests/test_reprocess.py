@@ -0,0 +1,79 @@
+"""Tests du retraitement en masse : feedbacks verrouillés retentés au lieu d'être sautés"""
+import uuid
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..management.commands.reprocess_feedbacks import Command
+from ..models import Feedback
+
+POSITIVE = {
+    "prediction": "positive", "confidence": {"positive": 90.0, "negative": 5.0, "neutral": 5.0},
+    "processing_time_seconds": 0.1, "method": "groq_api",
+}
+THEME = {"theme": "Accueil", "method": "groq"}
+
+
+# TransactionTestCase : les workers du pool sont des threads avec leur propre connexion
+@override_settings(
+    FEEDBACK_ANALYSIS_MODE='separate',
+    FEEDBACK_ANALYSIS_CACHE_ENABLED=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reprocess-tests'}}
+)
+@mock.patch('apps.feedback.services.resolve_feedback_theme', return_value=THEME)
+class ReprocessFeedbacksTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        department_id = uuid.uuid4()
+        self.feedbacks = [
+            Feedback.objects.create(
+                description=f"Accueil {index}", rating=4, patient_id=uuid.uuid4(), department_id=department_id,
+                is_processed=True, processing_stage='completed', processed_at=timezone.now(),
+                sentiment='neutral', analysis_method='keyword_fallback'
+            )
+            for index in range(3)
+        ]
+        self.busy = self.feedbacks[0]
+
+    def _reprocess(self):
+        call_command('reprocess_feedbacks', method='keyword_fallback', workers=1, chunk_size=2, stdout=StringIO())
+
+    def _checkpoint(self):
+        return cache.get(Command()._checkpoint_key({'is_processed': True, 'analysis_method': 'keyword_fallback'}))
+
+    def _methods(self):
+        return dict(Feedback.objects.values_list('feedback_id', 'analysis_method'))
+
+    def _hold_lock(self):
+        # Verrou d'un autre worker (même clé que tasks.feedback_lock)
+        cache.add(f'feedback-lock:{self.busy.feedback_id}', 'other-worker', timeout=60)
+
+    def test_lock_released_during_run_is_retried_at_the_end(self, _theme):
+        self._hold_lock()
+
+        def release_then_analyze(*args, **kwargs):
+            cache.delete(f'feedback-lock:{self.busy.feedback_id}')
+            return POSITIVE
+
+        with mock.patch('apps.feedback.services.analyze_sentiment', side_effect=release_then_analyze):
+            self._reprocess()
+
+        self.assertEqual(set(self._methods().values()), {'groq_api'})
+        self.assertIsNone(self._checkpoint())
+
+    def test_still_locked_feedback_is_kept_for_the_next_run(self, _theme):
+        self._hold_lock()
+        with mock.patch('apps.feedback.services.analyze_sentiment', return_value=POSITIVE):
+            self._reprocess()
+            self.assertEqual(self._methods()[self.busy.feedback_id], 'keyword_fallback')
+            self.assertEqual(self._checkpoint()['deferred'], [str(self.busy.feedback_id)])
+
+            cache.delete(f'feedback-lock:{self.busy.feedback_id}')
+            self._reprocess()
+
+        self.assertEqual(self._methods()[self.busy.feedback_id], 'groq_api')
+        self.assertIsNone(self._checkpoint())
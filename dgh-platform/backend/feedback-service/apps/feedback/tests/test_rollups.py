@@ -0,0 +1,122 @@
+"""Tests des agrégats journaliers : la mise à jour incrémentale égale une reconstruction complète"""
+import uuid
+from django.test import TestCase
+
+from ..models import Feedback, FeedbackDailyRollup, FeedbackTheme
+from ..rollups import rebuild_rollups
+
+
+class IncrementalRollupTests(TestCase):
+
+    def setUp(self):
+        self.departments = [uuid.uuid4(), uuid.uuid4()]
+        self.waiting = FeedbackTheme.objects.create(theme_name="Temps d'attente")
+        self.welcome = FeedbackTheme.objects.create(theme_name="Accueil")
+
+    def _snapshot(self) -> list:
+        # Les lignes vidées par les décréments restent à 0 : seules les lignes non nulles comptent
+        return sorted(
+            FeedbackDailyRollup.objects.filter(feedback_count__gt=0).values_list(
+                'day', 'department_id', 'language', 'sentiment', 'theme_id', 'feedback_count', 'rating_sum'
+            ),
+            key=str
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self._snapshot())
+
+    def _process(self, feedback: Feedback, sentiment: str, theme: FeedbackTheme = None) -> Feedback:
+        feedback.is_processed = True
+        feedback.processing_stage = 'completed'
+        feedback.sentiment = sentiment
+        feedback.theme = theme
+        feedback.save()
+        return feedback
+
+    def _feedbacks(self):
+        created = [
+            Feedback.objects.create(
+                description="Attente", rating=2, patient_id=uuid.uuid4(), department_id=self.departments[0]
+            ),
+            Feedback.objects.create(
+                description="Accueil", rating=5, language='en', patient_id=uuid.uuid4(),
+                department_id=self.departments[1]
+            ),
+        ]
+        created += Feedback.objects.bulk_create([
+            Feedback(description=f"Lot {index}", rating=index + 1, patient_id=uuid.uuid4(),
+                     department_id=self.departments[index % 2])
+            for index in range(4)
+        ])
+        return created
+
+    def test_processing_and_reprocessing(self):
+        feedbacks = self._feedbacks()
+        # Non traités : aucune contribution
+        self.assertEqual(self._snapshot(), [])
+
+        for index, feedback in enumerate(feedbacks):
+            self._process(feedback, ('negative', 'positive', 'neutral')[index % 3], (self.waiting, self.welcome)[index % 2])
+        self.assertMatchesRebuild()
+
+        # Retraitement : changement de sentiment, de thème, puis de note
+        self._process(feedbacks[0], 'neutral', self.welcome)
+        self._process(feedbacks[1], 'positive', None)
+        feedbacks[2].rating = 1
+        feedbacks[2].save()
+        self.assertMatchesRebuild()
+
+        # Retour en attente (retraitement interrompu) : retiré des agrégats
+        feedbacks[3].is_processed = False
+        feedbacks[3].save()
+        self.assertMatchesRebuild()
+
+    def test_theme_deletion(self):
+        feedbacks = self._feedbacks()
+        for feedback in feedbacks:
+            self._process(feedback, 'negative', self.waiting)
+        self._process(feedbacks[0], 'negative', self.welcome)
+
+        theme_id = self.waiting.pk
+        self.waiting.delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(FeedbackDailyRollup.objects.filter(theme_id=theme_id).exists())
+
+    def test_feedback_deletion(self):
+        feedbacks = self._feedbacks()
+        for feedback in feedbacks:
+            self._process(feedback, 'positive', self.welcome)
+
+        feedbacks[0].delete()
+        Feedback.objects.filter(pk__in=[feedbacks[1].pk, feedbacks[2].pk]).delete()
+        # Feedback non traité : sa suppression ne touche pas les agrégats
+        Feedback.objects.create(
+            description="Brouillon", rating=3, patient_id=uuid.uuid4(), department_id=self.departments[0]
+        ).delete()
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_stale_instance_after_its_theme(self):
+        feedback = self._process(self._feedbacks()[0], 'negative', self.waiting)
+        # L'instance en mémoire garde le thème que la suppression a remis à NULL en base
+        self.waiting.delete()
+        feedback.delete()
+        self.assertMatchesRebuild()
+
+    def test_partial_save_only_counts_written_fields(self):
+        feedback = self._process(self._feedbacks()[0], 'negative', self.waiting)
+        stale = Feedback.objects.get(pk=feedback.pk)
+
+        feedback.theme = self.welcome
+        feedback.save(update_fields=['theme'])
+        # L'instance périmée garde l'ancien thème en mémoire : seule la note est écrite et comptée
+        stale.rating = 4
+        stale.save(update_fields=['rating'])
+        self.assertMatchesRebuild()
+
+    def test_stage_only_save_takes_no_lock(self):
+        feedback = self._process(self._feedbacks()[0], 'negative', self.waiting)
+        feedback.processing_stage = 'theme_done'
+        with self.assertNumQueries(1):
+            feedback.save(update_fields=['processing_stage'])
@@ -0,0 +1,42 @@
+"""Tests de la recherche plein texte des feedbacks (repli icontains sous SQLite)"""
+import uuid
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import Feedback
+
+
+@override_settings(FEEDBACK_MICRO_BATCHING=True)
+class FeedbackSearchTests(TestCase):
+    """Recherche classée : index plein texte sous PostgreSQL, repli icontains sous SQLite"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department_id = uuid.uuid4()
+        for description, department_id in (
+            ("Attente trop longue aux urgences", cls.department_id),
+            ("Très bon accueil, personnel aimable", cls.department_id),
+            ("Longue attente à la pharmacie", uuid.uuid4()),
+        ):
+            Feedback.objects.create(
+                description=description, rating=3, patient_id=uuid.uuid4(), department_id=department_id
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_search_matches_description(self):
+        response = self.client.get('/api/v1/feedbacks/search/', {'q': 'attente'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertIn('rank', response.data['results'][0])
+        self.assertNotIn('search_vector', response.data['results'][0])
+
+    def test_search_combines_list_filters(self):
+        response = self.client.get('/api/v1/feedbacks/search/', {'q': 'attente', 'department_id': self.department_id})
+        self.assertEqual(
+            [feedback['description'] for feedback in response.data['results']], ["Attente trop longue aux urgences"]
+        )
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.client.get('/api/v1/feedbacks/search/').status_code, 400)
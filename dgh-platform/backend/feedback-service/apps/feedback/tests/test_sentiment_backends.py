@@ -0,0 +1,62 @@
+"""Tests de la sélection des backends de sentiment et du repli par mots-clés"""
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+
+from .. import sentiment_backends
+from ..sentiment_backends import (
+    KeywordSentimentBackend, LocalTransformerSentimentBackend, get_sentiment_backend
+)
+from ..sentimental_analysis import analyze_sentiment, analyze_sentiment_batch
+from ..tasks import warm_up_sentiment_backend
+
+
+class SentimentBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        sentiment_backends._backend_instances.clear()
+        self.addCleanup(sentiment_backends._backend_instances.clear)
+
+    @override_settings(SENTIMENT_BACKEND='keyword')
+    def test_backend_selected_by_setting_and_shared(self):
+        backend = get_sentiment_backend()
+        self.assertIsInstance(backend, KeywordSentimentBackend)
+        self.assertIs(get_sentiment_backend(), backend)
+
+    def test_unknown_backend_raises(self):
+        with self.assertRaises(ValueError):
+            get_sentiment_backend('bert')
+
+    @override_settings(SENTIMENT_BACKEND='keyword')
+    def test_keyword_backend_results(self):
+        result = analyze_sentiment("Personnel excellent et très gentil")
+        self.assertEqual((result["prediction"], result["method"]), ("positive", "keyword"))
+
+        results = analyze_sentiment_batch(["Personnel excellent et très gentil", "Attente horrible"])
+        self.assertEqual([r["prediction"] for r in results], ["positive", "negative"])
+        self.assertEqual({r["method"] for r in results}, {"keyword"})
+
+    @override_settings(SENTIMENT_BACKEND='local')
+    def test_local_backend_runs_one_batched_inference(self):
+        probabilities = [[0.8, 0.1, 0.1], [0.05, 0.15, 0.8]]
+        with mock.patch.object(
+            LocalTransformerSentimentBackend, '_predict_probabilities', return_value=probabilities
+        ) as predict:
+            results = analyze_sentiment_batch(["Attente interminable", "Très bon accueil"])
+
+        predict.assert_called_once_with(["Attente interminable", "Très bon accueil"])
+        self.assertEqual([r["prediction"] for r in results], ["negative", "positive"])
+        self.assertEqual(results[0]["confidence"], {"negative": 80.0, "neutral": 10.0, "positive": 10.0})
+        self.assertEqual({r["method"] for r in results}, {"local_model"})
+
+    @override_settings(SENTIMENT_BACKEND='local')
+    def test_local_model_unavailable_falls_back_to_keywords(self):
+        with mock.patch.object(
+            LocalTransformerSentimentBackend, '_load', side_effect=ImportError("No module named 'transformers'")
+        ):
+            result = analyze_sentiment("Attente horrible")
+            results = analyze_sentiment_batch(["Attente horrible"])
+            # Le préchargement au démarrage du worker ne doit pas l'empêcher de démarrer
+            warm_up_sentiment_backend()
+
+        self.assertEqual((result["prediction"], result["method"]), ("negative", "keyword_fallback"))
+        self.assertEqual((results[0]["prediction"], results[0]["method"]), ("negative", "keyword_fallback"))
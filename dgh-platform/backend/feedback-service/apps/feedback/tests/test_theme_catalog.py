@@ -0,0 +1,33 @@
+"""Tests du catalogue de thèmes mis en cache et de la présélection des prompts"""
+from django.test import TestCase, override_settings
+
+from ..models import FeedbackTheme
+from ..theme_catalog import get_theme_catalog, get_theme_shortlist, invalidate_theme_catalog
+
+
+@override_settings(
+    THEME_CATALOG_LOCAL_TTL=0,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'theme-catalog-tests'}}
+)
+class ThemeCatalogTests(TestCase):
+
+    def setUp(self):
+        invalidate_theme_catalog()
+
+    def test_catalog_invalidated_only_after_commit(self):
+        self.assertEqual(get_theme_catalog(), [])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            FeedbackTheme.objects.create(theme_name="Temps d'attente")
+            # Avant commit, le catalogue en cache reste celui déjà publié
+            self.assertEqual(get_theme_catalog(), [])
+        self.assertTrue(callbacks)
+        self.assertEqual(get_theme_catalog(), ["Temps d'attente"])
+
+    @override_settings(THEME_PROMPT_TOP_K=2)
+    def test_shortlist_is_bounded_and_ranked(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name in ("Qualité des soins", "Temps d'attente aux urgences", "Propreté des chambres", "Accueil"):
+                FeedbackTheme.objects.create(theme_name=name)
+        shortlist = get_theme_shortlist("Beaucoup trop d'attente aux urgences")
+        self.assertEqual(len(shortlist), 2)
+        self.assertEqual(shortlist[0], "Temps d'attente aux urgences")
@@ -0,0 +1,65 @@
+"""Tests de l'index local des thèmes (centroïdes par thème et sentiment)"""
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from .. import theme_index
+from ..theme_index import learn_theme, match_theme
+
+PRAISE = "Le service était très bien, personnel accueillant"
+NEGATED = "Le service n etait pas très bien, personnel pas accueillant"
+
+
+class FakeSentenceEncoder:
+    """Modèle de phrases de test : encode avec les embeddings hachés"""
+
+    def encode(self, text, normalize_embeddings=True):
+        return theme_index._hashed_embedding(text)
+
+
+def _reset_index():
+    theme_index._index["entries"] = None
+    theme_index._embed_cached.cache_clear()
+
+
+@override_settings(THEME_INDEX_ENABLED=True, THEME_EMBEDDING_MODEL='fake-encoder', THEME_INDEX_MIN_SAMPLES=1)
+class ThemeIndexTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(theme_index, '_get_encoder', return_value=FakeSentenceEncoder())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_reset_index)
+        _reset_index()
+        learn_theme("Satisfaction - Accueil", PRAISE, 'positive')
+        theme_index._index["entries"] = None
+
+    def test_matches_within_the_same_sentiment(self):
+        self.assertEqual(match_theme(PRAISE, 'positive')[0], "Satisfaction - Accueil")
+
+    def test_negated_feedback_does_not_inherit_praise_theme(self):
+        # Embeddings proches (négation ignorée) : seul le sentiment les sépare
+        self.assertIsNotNone(match_theme(NEGATED, 'positive'))
+        self.assertIsNone(match_theme(NEGATED, 'negative'))
+        self.assertIsNone(match_theme(PRAISE, None))
+
+
+@override_settings(THEME_INDEX_ENABLED=True, THEME_EMBEDDING_MODEL='', THEME_INDEX_MIN_SAMPLES=1)
+class HashedFallbackTests(TestCase):
+
+    def setUp(self):
+        self.addCleanup(_reset_index)
+        _reset_index()
+
+    def test_hashed_embeddings_never_assign_a_theme(self):
+        learn_theme("Satisfaction - Accueil", PRAISE, 'positive')
+        theme_index._index["entries"] = None
+
+        self.assertIsNone(match_theme(PRAISE, 'positive'))
+        self.assertFalse(theme_index.get_theme_index_stats()["enabled"])
+
+    @override_settings(THEME_EMBEDDING_MODEL='paraphrase-multilingual-MiniLM-L12-v2')
+    def test_missing_sentence_transformers_disables_the_index(self):
+        with mock.patch.object(theme_index, '_get_encoder', side_effect=ImportError("sentence_transformers")):
+            learn_theme("Satisfaction - Accueil", PRAISE, 'positive')
+            theme_index._index["entries"] = None
+            self.assertIsNone(match_theme(PRAISE, 'positive'))
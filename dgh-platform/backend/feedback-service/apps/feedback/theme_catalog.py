@@ -0,0 +1,170 @@
+"""
+Catalogue des thèmes de feedback mis en cache (mémoire du processus + Redis)
+Fournit une présélection bornée des thèmes candidats pour les prompts Groq
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_KEY = 'feedback-themes:catalog'
+CATALOG_VERSION_KEY = 'feedback-themes:version'
+
+# Thèmes de base utilisés si la base de données est indisponible
+DEFAULT_THEMES = [
+    "Satisfaction - Service excellent",
+    "Satisfaction - Service correct",
+    "Insatisfaction - Problème majeur",
+    "Insatisfaction - Service à améliorer",
+    "Neutre - Globalement satisfait",
+    "Neutre - Globalement insatisfait",
+    "Neutre - Service moyen",
+    "Feedback - Évaluation générale"
+]
+
+STOPWORDS = frozenset([
+    'les', 'des', 'une', 'est', 'pas', 'par', 'pour', 'avec', 'sur', 'dans', 'que', 'qui', 'mais',
+    'tres', 'tout', 'plus', 'moins', 'the', 'and', 'was', 'for', 'with', 'very', 'not',
+])
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_local = {"version": None, "catalog": None, "checked_at": 0.0}
+_lock = threading.Lock()
+
+
+def _normalize(text: str) -> str:
+    """Minuscules sans accents, pour une comparaison tolérante"""
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _tokens(text: str) -> frozenset:
+    return frozenset(
+        token for token in _TOKEN_RE.findall(_normalize(text))
+        if len(token) >= 3 and token not in STOPWORDS
+    )
+
+
+def _trigrams(tokens: frozenset) -> frozenset:
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _build_catalog(theme_names: list) -> list:
+    """Précalcule les signatures (mots, trigrammes) de chaque thème"""
+    catalog = []
+    for name in theme_names:
+        tokens = _tokens(name)
+        catalog.append((name, tokens, _trigrams(tokens)))
+    return catalog
+
+
+def _load_theme_names() -> list:
+    """Charge les noms de thèmes actifs depuis Redis, ou depuis la base en cas d'absence"""
+    try:
+        theme_names = cache.get(CATALOG_CACHE_KEY)
+        if theme_names is not None:
+            return theme_names
+    except Exception as e:
+        logger.warning(f"Cache du catalogue de thèmes indisponible: {e}")
+
+    from .models import FeedbackTheme
+
+    try:
+        theme_names = list(
+            FeedbackTheme.objects.filter(is_active=True)
+            .order_by('created_at')
+            .values_list('theme_name', flat=True)
+        )
+    except Exception as e:
+        logger.warning(f"Erreur récupération thèmes existants: {e}")
+        return list(DEFAULT_THEMES)
+
+    try:
+        cache.set(CATALOG_CACHE_KEY, theme_names, timeout=settings.THEME_CATALOG_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Impossible de mettre en cache le catalogue de thèmes: {e}")
+    return theme_names
+
+
+def _get_version():
+    try:
+        return cache.get(CATALOG_VERSION_KEY, 0)
+    except Exception:
+        return None
+
+
+def _get_catalog() -> list:
+    """Catalogue local, revalidé contre la version Redis au plus toutes les THEME_CATALOG_LOCAL_TTL secondes"""
+    now = time.monotonic()
+    if _local["catalog"] is not None and now - _local["checked_at"] < settings.THEME_CATALOG_LOCAL_TTL:
+        return _local["catalog"]
+
+    with _lock:
+        version = _get_version()
+        if _local["catalog"] is None or version is None or version != _local["version"]:
+            _local["catalog"] = _build_catalog(_load_theme_names())
+            _local["version"] = version
+        _local["checked_at"] = now
+        return _local["catalog"]
+
+
+def get_theme_catalog() -> list:
+    """Retourne la liste des noms de thèmes actifs"""
+    return [name for name, _tokens_, _grams in _get_catalog()]
+
+
+def get_theme_shortlist(feedback_text: str, k: int = None) -> list:
+    """
+    Présélectionne les k thèmes les plus proches du feedback
+
+    Classement peu coûteux : mots communs (sans accents ni mots vides),
+    puis similarité de trigrammes pour les variantes ("attente" / "attendre").
+
+    Args:
+        feedback_text: Texte du feedback
+        k: Nombre de thèmes retenus, par défaut THEME_PROMPT_TOP_K
+
+    Returns:
+        list: Noms des thèmes candidats, du plus au moins pertinent
+    """
+    k = k or settings.THEME_PROMPT_TOP_K
+    catalog = _get_catalog()
+    if len(catalog) <= k:
+        return [name for name, _tokens_, _grams in catalog]
+
+    text_tokens = _tokens(feedback_text)
+    text_grams = _trigrams(text_tokens)
+
+    def score(entry):
+        _name, tokens, grams = entry
+        overlap = len(text_tokens & tokens)
+        union = len(text_grams | grams)
+        jaccard = len(text_grams & grams) / union if union else 0.0
+        return 2 * overlap + jaccard
+
+    # Tri stable : à score égal, les thèmes les plus anciens (thèmes de base) restent devant
+    ranked = sorted(catalog, key=score, reverse=True)
+    return [name for name, _tokens_, _grams in ranked[:k]]
+
+
+def invalidate_theme_catalog():
+    """Invalide le catalogue dans Redis et dans le processus courant"""
+    with _lock:
+        _local["catalog"] = None
+        _local["version"] = None
+    try:
+        cache.delete(CATALOG_CACHE_KEY)
+        cache.add(CATALOG_VERSION_KEY, 0, timeout=None)
+        cache.incr(CATALOG_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Invalidation du catalogue de thèmes impossible: {e}")
@@ -4,45 +4,48 @@ Utilise Groq API pour analyser le contenu et assigner des thèmes pertinents
 """
 import json
 import logging
-import os
-from django.conf import settings
-from groq import Groq
 from apps.feedback.models import FeedbackTheme
+from .llm_client import chat_completion
+from .theme_catalog import get_theme_catalog, get_theme_shortlist
+from .theme_index import learn_theme, match_theme, record_resolution
 
 logger = logging.getLogger(__name__)
 
-# Client Groq global (réutilise celui de sentimental_analysis si disponible)
-_groq_client = None
+PROMPT_VERSION = "1"  # À incrémenter à chaque modification du prompt (invalide le cache)
 
-def _get_groq_client():
-    """Initialise le client Groq pour l'extraction de thèmes"""
-    global _groq_client
-    if _groq_client is None:
-        api_key = getattr(settings, 'GROQ_API_KEY', os.getenv('GROQ_API_KEY'))
-        if not api_key:
-            raise ValueError("GROQ_API_KEY non configurée")
-        _groq_client = Groq(api_key=api_key)
-        logger.info("Client Groq pour extraction de thèmes initialisé")
-    return _groq_client
+def _get_existing_themes() -> list:
+    """Récupère la liste des thèmes existants (catalogue mis en cache)"""
+    return get_theme_catalog()
 
 
-def _get_existing_themes() -> list:
-    """Récupère la liste des thèmes existants dans la base de données"""
-    try:
-        themes = FeedbackTheme.objects.filter(is_active=True).values_list('theme_name', flat=True)
-        return list(themes)
-    except Exception as e:
-        logger.warning(f"Erreur récupération thèmes existants: {e}")
-        return [
-            "Satisfaction - Service excellent",
-            "Satisfaction - Service correct", 
-            "Insatisfaction - Problème majeur",
-            "Insatisfaction - Service à améliorer",
-            "Neutre - Globalement satisfait",
-            "Neutre - Globalement insatisfait",
-            "Neutre - Service moyen",
-            "Feedback - Évaluation générale"
-        ]
+def _validate_theme_payload(result: dict) -> dict:
+    """
+    Valide un objet JSON de thème renvoyé par Groq
+    
+    Args:
+        result: Objet JSON décodé (theme, is_new, confidence)
+        
+    Returns:
+        dict: Thème nettoyé, indicateur de nouveauté et confiance en float
+    """
+    # Validation du format
+    required_keys = ["theme", "is_new", "confidence"]
+    if not isinstance(result, dict) or not all(key in result for key in required_keys):
+        raise ValueError("Clés manquantes dans la réponse")
+        
+    # Validation des types
+    if not isinstance(result["theme"], str) or not result["theme"].strip():
+        raise ValueError("Theme invalide")
+    if not isinstance(result["is_new"], bool):
+        raise ValueError("is_new doit être boolean")
+    if not isinstance(result["confidence"], (int, float)) or not 0 <= result["confidence"] <= 1:
+        raise ValueError("confidence doit être entre 0 et 1")
+        
+    return {
+        "theme": result["theme"].strip(),
+        "is_new": result["is_new"],
+        "confidence": float(result["confidence"])
+    }
 
 
 def _extract_theme_with_groq(feedback_text: str, sentiment: str, existing_themes: list) -> dict:
@@ -52,7 +55,7 @@ def _extract_theme_with_groq(feedback_text: str, sentiment: str, existing_themes
     Args:
         feedback_text: Texte du feedback patient
         sentiment: Sentiment détecté (positive, negative, neutral)
-        existing_themes: Liste des thèmes existants
+        existing_themes: Thèmes candidats présélectionnés
         
     Returns:
         dict: {
@@ -62,8 +65,6 @@ def _extract_theme_with_groq(feedback_text: str, sentiment: str, existing_themes
         }
     """
     try:
-        client = _get_groq_client()
-        
         # Construction du prompt avec thèmes existants
         themes_list = "\n".join([f"- {theme}" for theme in existing_themes])
         
@@ -91,8 +92,7 @@ Réponds UNIQUEMENT au format JSON suivant:
     "reasoning": "explication courte du choix"
 }}"""
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = chat_completion(
             messages=[
                 {"role": "system", "content": "Tu es un expert en classification de feedbacks médicaux. Réponds uniquement en JSON valide."},
                 {"role": "user", "content": prompt}
@@ -106,26 +106,7 @@ Réponds UNIQUEMENT au format JSON suivant:
         
         # Parse la réponse JSON
         try:
-            result = json.loads(response_text)
-            
-            # Validation du format
-            required_keys = ["theme", "is_new", "confidence"]
-            if not all(key in result for key in required_keys):
-                raise ValueError("Clés manquantes dans la réponse")
-                
-            # Validation des types
-            if not isinstance(result["theme"], str) or not result["theme"].strip():
-                raise ValueError("Theme invalide")
-            if not isinstance(result["is_new"], bool):
-                raise ValueError("is_new doit être boolean")
-            if not isinstance(result["confidence"], (int, float)) or not 0 <= result["confidence"] <= 1:
-                raise ValueError("confidence doit être entre 0 et 1")
-                
-            return {
-                "theme": result["theme"].strip(),
-                "is_new": result["is_new"],
-                "confidence": float(result["confidence"])
-            }
+            return _validate_theme_payload(json.loads(response_text))
             
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             logger.warning(f"Erreur parsing réponse Groq theme: {e}, réponse: {response_text}")
@@ -169,9 +150,9 @@ def _fallback_theme_extraction(sentiment: str, rating: int = None) -> dict:
     }
 
 
-def get_feedback_theme(feedback_text: str = None, sentiment: str = None, rating: int = None) -> str:
+def resolve_feedback_theme(feedback_text: str = None, sentiment: str = None, rating: int = None) -> dict:
     """
-    Détermine le thème d'un feedback de manière intelligente
+    Détermine le thème d'un feedback et l'origine de ce thème
     
     Args:
         feedback_text: Texte du feedback (optionnel pour rétrocompatibilité)
@@ -179,14 +160,22 @@ def get_feedback_theme(feedback_text: str = None, sentiment: str = None, rating:
         rating: Note donnée par le patient (1-5, optionnel)
         
     Returns:
-        theme_name: Nom du thème approprié
+        dict: theme et method ('local_index', 'groq', ou 'fallback' : thème déduit
+        du sentiment et de la note, pas du texte)
     """
     try:
         # Si on a le texte du feedback, utilise Groq pour analyse intelligente
         if feedback_text and feedback_text.strip():
+            # Thème proche d'un centroïde connu : pas d'appel Groq
+            local_match = match_theme(feedback_text, sentiment)
+            if local_match:
+                record_resolution('local')
+                logger.info(f"Thème assigné par l'index local: {local_match[0]} (similarité: {local_match[1]})")
+                return {"theme": local_match[0], "method": "local_index"}
+            
             logger.info("Extraction de thème via Groq API...")
             
-            existing_themes = _get_existing_themes()
+            existing_themes = get_theme_shortlist(feedback_text)
             groq_result = _extract_theme_with_groq(feedback_text, sentiment or "neutral", existing_themes)
             
             # Si c'est un nouveau thème, le créer en base
@@ -203,16 +192,33 @@ def get_feedback_theme(feedback_text: str = None, sentiment: str = None, rating:
                 except Exception as e:
                     logger.warning(f"Erreur création thème en base: {e}")
             
+            record_resolution('llm')
+            learn_theme(groq_result["theme"], feedback_text, sentiment)
             logger.info(f"Thème extrait via Groq: {groq_result['theme']} (confidence: {groq_result['confidence']})")
-            return groq_result["theme"]
+            return {"theme": groq_result["theme"], "method": "groq"}
             
         else:
             # Fallback pour rétrocompatibilité (pas de texte fourni)
             logger.info("Utilisation du fallback theme extraction (pas de texte)")
             fallback_result = _fallback_theme_extraction(sentiment, rating)
-            return fallback_result["theme"]
+            return {"theme": fallback_result["theme"], "method": "fallback"}
             
     except Exception as e:
         logger.warning(f"Erreur extraction thème via Groq, utilisation du fallback: {e}")
         fallback_result = _fallback_theme_extraction(sentiment, rating)
-        return fallback_result["theme"]
\ No newline at end of file
+        return {"theme": fallback_result["theme"], "method": "fallback"}
+
+
+def get_feedback_theme(feedback_text: str = None, sentiment: str = None, rating: int = None) -> str:
+    """
+    Détermine le thème d'un feedback de manière intelligente
+    
+    Args:
+        feedback_text: Texte du feedback (optionnel pour rétrocompatibilité)
+        sentiment: Sentiment détecté (positive, negative, neutral) 
+        rating: Note donnée par le patient (1-5, optionnel)
+        
+    Returns:
+        theme_name: Nom du thème approprié
+    """
+    return resolve_feedback_theme(feedback_text, sentiment, rating)["theme"]
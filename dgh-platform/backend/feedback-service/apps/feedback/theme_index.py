@@ -0,0 +1,256 @@
+"""
+Index local des thèmes par embeddings
+Assigne directement le thème le plus proche quand la similarité est suffisante,
+Groq n'est appelé que pour les feedbacks ambigus ou nouveaux. Les centroïdes sont
+tenus par sentiment : un feedback négatif n'hérite jamais du thème d'éloges proches
+dans l'espace des embeddings ("très bien" / "pas très bien").
+L'index n'assigne de thème qu'avec un vrai modèle de phrases (THEME_EMBEDDING_MODEL) :
+les embeddings hachés ne mesurent que le recouvrement de mots et trigrammes.
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+LOCAL_KEY = 'theme-index:local'
+LLM_KEY = 'theme-index:llm'
+
+# Dimension des vecteurs hachés (fallback sans sentence-transformers)
+HASHING_DIMENSIONS = 512
+HASHING_MODEL_NAME = f'hashing-{HASHING_DIMENSIONS}'
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_index = {"entries": None, "loaded_at": 0.0}
+_index_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Charge le modèle sentence-transformers configuré (une fois par processus), ou None"""
+    global _encoder
+    model_name = settings.THEME_EMBEDDING_MODEL
+    if not model_name:
+        return None
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                # Dépendance optionnelle (voir requirements.txt)
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(model_name, device='cpu')
+                logger.info(f"Modèle d'embeddings {model_name} chargé")
+    return _encoder
+
+
+def get_embedding_model_name() -> str:
+    """Nom du modèle d'embeddings actif (les centroïdes d'un autre modèle sont ignorés)"""
+    if settings.THEME_EMBEDDING_MODEL:
+        try:
+            _get_encoder()
+            return settings.THEME_EMBEDDING_MODEL
+        except ImportError:
+            logger.warning("sentence-transformers non installé, utilisation des embeddings hachés")
+    return HASHING_MODEL_NAME
+
+
+def _index_active() -> bool:
+    """Index activé avec un modèle sentence-transformers chargé (jamais sur les embeddings hachés)"""
+    return settings.THEME_INDEX_ENABLED and get_embedding_model_name() != HASHING_MODEL_NAME
+
+
+def _normalize_vector(vector: list) -> list:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _hashed_embedding(text: str) -> list:
+    """
+    Embedding léger sans dépendance : mots et trigrammes de caractères
+    (sans accents) projetés par hachage signé dans un vecteur de taille fixe
+    """
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    vector = [0.0] * HASHING_DIMENSIONS
+    for token in _TOKEN_RE.findall(plain):
+        if len(token) < 3:
+            continue
+        padded = f" {token} "
+        features = [(token, 1.0)] + [(padded[index:index + 3], 0.5) for index in range(len(padded) - 2)]
+        for feature, weight in features:
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % HASHING_DIMENSIONS
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * weight
+    return _normalize_vector(vector)
+
+
+@lru_cache(maxsize=512)
+def _embed_cached(model_name: str, text: str) -> tuple:
+    if model_name == HASHING_MODEL_NAME:
+        return tuple(_hashed_embedding(text))
+    vector = _get_encoder().encode(text, normalize_embeddings=True)
+    return tuple(float(value) for value in vector)
+
+
+def embed_text(text: str) -> tuple:
+    """Vecteur normalisé d'un texte avec le modèle d'embeddings actif"""
+    return _embed_cached(get_embedding_model_name(), text or '')
+
+
+def _load_index() -> dict:
+    """Charge les centroïdes utilisables (thèmes actifs, même modèle, assez d'exemples) par sentiment"""
+    from .models import FeedbackThemeEmbedding
+
+    model_name = get_embedding_model_name()
+    rows = FeedbackThemeEmbedding.objects.filter(
+        theme__is_active=True,
+        embedding_model=model_name,
+        sample_count__gte=settings.THEME_INDEX_MIN_SAMPLES
+    ).values_list('sentiment', 'theme__theme_name', 'centroid')
+    index = {}
+    for sentiment, theme_name, centroid in rows:
+        index.setdefault(sentiment, []).append((theme_name, _normalize_vector(centroid)))
+    return index
+
+
+def _get_index() -> dict:
+    now = time.monotonic()
+    if _index["entries"] is None or now - _index["loaded_at"] >= settings.THEME_INDEX_REFRESH_SECONDS:
+        with _index_lock:
+            if _index["entries"] is None or now - _index["loaded_at"] >= settings.THEME_INDEX_REFRESH_SECONDS:
+                try:
+                    _index["entries"] = _load_index()
+                except Exception as e:
+                    logger.warning(f"Index de thèmes indisponible: {e}")
+                    _index["entries"] = {}
+                _index["loaded_at"] = now
+    return _index["entries"]
+
+
+def match_theme(feedback_text: str, sentiment: str = None):
+    """
+    Cherche le thème dont le centroïde (du même sentiment) est le plus proche du feedback
+
+    Le thème n'est retenu que si la similarité cosinus dépasse THEME_MATCH_THRESHOLD
+    et devance le deuxième thème d'au moins THEME_MATCH_MARGIN (sinon feedback ambigu).
+    Sans modèle de phrases (embeddings hachés), aucun thème n'est assigné localement.
+
+    Args:
+        feedback_text: Texte du feedback
+        sentiment: Sentiment détecté ; sans sentiment, aucun thème n'est assigné localement
+
+    Returns:
+        tuple | None: (nom du thème, similarité) ou None si aucun thème n'est assez proche
+    """
+    if not sentiment or not feedback_text or not feedback_text.strip() or not _index_active():
+        return None
+
+    entries = _get_index().get(sentiment)
+    if not entries:
+        return None
+
+    try:
+        vector = embed_text(feedback_text)
+    except Exception as e:
+        logger.warning(f"Erreur calcul embedding du feedback: {e}")
+        return None
+
+    scored = sorted(
+        ((sum(a * b for a, b in zip(vector, centroid)), theme_name) for theme_name, centroid in entries),
+        reverse=True
+    )
+    best_score, best_theme = scored[0]
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+
+    if best_score >= settings.THEME_MATCH_THRESHOLD and best_score - runner_up >= settings.THEME_MATCH_MARGIN:
+        return best_theme, round(best_score, 4)
+    logger.debug(f"Index de thèmes: {best_theme} trop incertain ({best_score:.3f}, écart {best_score - runner_up:.3f})")
+    return None
+
+
+def learn_theme(theme_name: str, feedback_text: str, sentiment: str = None):
+    """
+    Ajoute un feedback classé par Groq au centroïde (thème, sentiment) (moyenne glissante)
+
+    Args:
+        theme_name: Thème assigné par le LLM
+        feedback_text: Texte du feedback
+        sentiment: Sentiment du feedback (sans sentiment, rien n'est appris)
+    """
+    if not sentiment or not feedback_text or not feedback_text.strip() or not _index_active():
+        return
+
+    from .models import FeedbackTheme, FeedbackThemeEmbedding
+
+    try:
+        model_name = get_embedding_model_name()
+        vector = embed_text(feedback_text)
+        theme, _created = FeedbackTheme.objects.get_or_create(
+            theme_name=theme_name, defaults={'is_active': True}
+        )
+        with transaction.atomic():
+            embedding = FeedbackThemeEmbedding.objects.select_for_update().filter(
+                theme=theme, sentiment=sentiment
+            ).first()
+            if embedding is None or embedding.embedding_model != model_name or len(embedding.centroid) != len(vector):
+                # Premier exemple, ou centroïde calculé par un autre modèle : on repart de zéro
+                FeedbackThemeEmbedding.objects.update_or_create(
+                    theme=theme, sentiment=sentiment,
+                    defaults={'embedding_model': model_name, 'centroid': list(vector), 'sample_count': 1}
+                )
+            else:
+                count = embedding.sample_count + 1
+                embedding.centroid = [
+                    old + (new - old) / count for old, new in zip(embedding.centroid, vector)
+                ]
+                embedding.sample_count = count
+                embedding.save(update_fields=['centroid', 'sample_count', 'updated_at'])
+    except Exception as e:
+        logger.warning(f"Mise à jour de l'index de thèmes impossible pour '{theme_name}': {e}")
+
+
+def record_resolution(source: str):
+    """Compte un thème résolu localement ('local') ou par le LLM ('llm')"""
+    try:
+        key = LOCAL_KEY if source == 'local' else LLM_KEY
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.debug(f"Compteur de l'index de thèmes indisponible: {e}")
+
+
+def get_theme_index_stats() -> dict:
+    """Part des thèmes résolus localement par l'index vs par Groq"""
+    from .models import FeedbackThemeEmbedding
+
+    try:
+        local = cache.get(LOCAL_KEY, 0)
+        llm = cache.get(LLM_KEY, 0)
+    except Exception as e:
+        logger.warning(f"Compteurs de l'index de thèmes indisponibles: {e}")
+        local = llm = None
+
+    total = (local or 0) + (llm or 0)
+    return {
+        "enabled": _index_active(),
+        "embedding_model": get_embedding_model_name(),
+        "resolved_locally": local,
+        "resolved_by_llm": llm,
+        "local_share": round(local / total, 4) if total else None,
+        "indexed_themes": FeedbackThemeEmbedding.objects.filter(
+            sample_count__gte=settings.THEME_INDEX_MIN_SAMPLES
+        ).count(),
+        "threshold": settings.THEME_MATCH_THRESHOLD,
+        "margin": settings.THEME_MATCH_MARGIN,
+    }
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import events, views
 
 router = DefaultRouter()
 router.register(r'departments', views.DepartmentViewSet)
@@ -12,5 +12,7 @@ router.register(r'medications', views.MedicationViewSet)
 router.register(r'prescriptions', views.PrescriptionViewSet)
 
 urlpatterns = [
+    # Avant le routeur : « events » serait sinon lu comme un feedback_id
+    path('api/v1/feedbacks/events/', events.feedback_events, name='feedback-events'),
     path('api/v1/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,9 +1,12 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
+import uuid
 
 from .models import (
     Department, FeedbackTheme, Feedback, Appointment, 
@@ -11,37 +14,68 @@ from .models import (
 )
 from .serializers import (
     DepartmentSerializer, FeedbackThemeSerializer, FeedbackSerializer, FeedbackCreateSerializer,
+    FeedbackSearchResultSerializer,
     AppointmentSerializer, ReminderSerializer, MedicationSerializer,
     PrescriptionSerializer, PrescriptionCreateSerializer
 )
+from .etags import (
+    CACHE_CONTROL, DEPARTMENTS_SCOPE, THEMES_SCOPE, conditional, etag_matches, list_etag, make_etag, not_modified
+)
+from .events import STATUS_FIELDS, compact_status
+from .fieldsets import SparseFieldsetMixin
+from .pagination import AppointmentCursorPagination, FeedbackCursorPagination, ReminderCursorPagination
+from .parsers import NDJSONParser
+from .search import FeedbackSearchFilter
 from .services import process_feedback
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+def _my_feedbacks_etag(view, request):
+    if request.headers.get('X-User-Type') != 'patient' or not request.headers.get('X-User-ID'):
+        return None
+    return list_etag(request, 'feedbacks', scopes=(THEMES_SCOPE,))
+
+
+def _upcoming_etag(view, request):
+    # La liste dépend aussi du jour courant (rendez-vous passés exclus)
+    from datetime import date
+    return list_etag(
+        request, 'appointments', date.today().isoformat(),
+        owner_types=('patient', 'professional'), scopes=(DEPARTMENTS_SCOPE,)
+    )
+
+
+def _pending_reminders_etag(view, request):
+    return list_etag(request, 'reminders')
+
+
+class DepartmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.filter(is_active=True)
     serializer_class = DepartmentSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
 
-class FeedbackThemeViewSet(viewsets.ModelViewSet):
+class FeedbackThemeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = FeedbackTheme.objects.filter(is_active=True)
     serializer_class = FeedbackThemeSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['theme_name']
 
 
-class FeedbackViewSet(viewsets.ModelViewSet):
-    queryset = Feedback.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['input_type', 'language', 'rating', 'is_processed']
-    search_fields = ['description']
+class FeedbackViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Feedback.objects.defer('search_vector')
+    pagination_class = FeedbackCursorPagination
+    filter_backends = [DjangoFilterBackend, FeedbackSearchFilter, filters.OrderingFilter]
+    filterset_fields = ['input_type', 'language', 'rating', 'is_processed', 'department_id', 'sentiment', 'theme']
+    sparse_fieldset_actions = ('list', 'retrieve', 'my_feedbacks', 'search')
     ordering_fields = ['created_at', 'rating']
     ordering = ['-created_at']
     
     def get_serializer_class(self):
         if self.action == 'create':
             return FeedbackCreateSerializer
+        if self.action == 'search':
+            return FeedbackSearchResultSerializer
         return FeedbackSerializer
     
     def get_queryset(self):
@@ -86,7 +120,70 @@ class FeedbackViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(response_data)
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
     
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Création groupée de feedbacks (bornes hors ligne) : tableau JSON ou flux NDJSON
+
+        Chaque élément est validé indépendamment ; les feedbacks valides sont insérés
+        par lots et leur analyse est publiée en une seule tâche batch après commit.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'Un tableau JSON ou un flux NDJSON de feedbacks est attendu'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not items:
+            return Response({'error': 'Aucun feedback fourni'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.FEEDBACK_BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'Maximum {settings.FEEDBACK_BULK_MAX_ITEMS} feedbacks par requête'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        # Un patient ne peut envoyer que ses propres feedbacks
+        user_id = request.headers.get('X-User-ID')
+        user_type = request.headers.get('X-User-Type')
+        forced_patient_id = user_id if user_type == 'patient' and user_id else None
+
+        results = []
+        feedbacks = []
+        for index, item in enumerate(items):
+            if forced_patient_id and isinstance(item, dict):
+                item = {**item, 'patient_id': forced_patient_id}
+            serializer = FeedbackCreateSerializer(data=item)
+            if serializer.is_valid():
+                feedbacks.append(Feedback(**serializer.validated_data))
+                results.append({'index': index, 'status': 'created'})
+            else:
+                results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+
+        if feedbacks:
+            Feedback.objects.bulk_create(
+                feedbacks, batch_size=settings.FEEDBACK_BULK_CHUNK_SIZE, single_job=True
+            )
+            created = iter(feedbacks)
+            for result in results:
+                if result['status'] == 'created':
+                    result['feedback_id'] = str(next(created).feedback_id)
+
+        if not feedbacks:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(feedbacks) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response({
+            'received': len(items),
+            'created': len(feedbacks),
+            'failed': len(items) - len(feedbacks),
+            'results': results
+        }, status=response_status)
+
     @action(detail=False, methods=['get'])
+    @conditional(_my_feedbacks_etag)
     def my_feedbacks(self, request):
         """Récupère les feedbacks du patient connecté"""
         user_id = request.headers.get('X-User-ID')
@@ -98,32 +195,178 @@ class FeedbackViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        feedbacks = self.queryset.filter(patient_id=user_id)
-        serializer = self.get_serializer(feedbacks, many=True)
-        return Response(serializer.data)
+        feedbacks = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(feedbacks)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def by_theme(self, request):
-        """Groupe les feedbacks par thème"""
-        from django.db.models import Count
-        
-        themes = FeedbackTheme.objects.annotate(
-            feedback_count=Count('feedback')
-        ).filter(feedback_count__gt=0)
-        
+        """
+        Groupe les feedbacks par thème : effectif et `limit` feedbacks les plus récents par thème
+        (deux requêtes quel que soit le nombre de thèmes). Les filtres de la liste (patient,
+        dates, langue...) s'appliquent. `next_cursor` + `?theme_id=&cursor=` donnent la suite d'un thème.
+        """
+        from django.db.models import Count, F, Window
+        from django.db.models.functions import RowNumber
+        from .pagination import InvalidCursor, after_cursor, encode_cursor
+
+        try:
+            limit = int(request.query_params.get('limit', settings.FEEDBACK_BY_THEME_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), settings.FEEDBACK_BY_THEME_MAX_LIMIT)
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(theme__isnull=False).order_by()
+        newest_first = [F('created_at').desc(), F('feedback_id').desc()]
+
+        theme_id = request.query_params.get('theme_id')
+        if theme_id:
+            # Page suivante d'un seul thème (pagination par clé)
+            try:
+                theme_id = uuid.UUID(theme_id)
+            except ValueError:
+                return Response({'error': 'theme_id doit être un UUID'}, status=status.HTTP_400_BAD_REQUEST)
+            theme_feedbacks = queryset.filter(theme_id=theme_id)
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                try:
+                    theme_feedbacks = after_cursor(theme_feedbacks, cursor)
+                except InvalidCursor as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            page = list(theme_feedbacks.select_related('theme').order_by(*newest_first)[:limit + 1])
+            return Response({
+                'theme_id': theme_id,
+                'feedbacks': self.get_serializer(page[:limit], many=True).data,
+                'next_cursor': encode_cursor(page[limit - 1]) if len(page) > limit else None,
+            })
+
+        counts = list(
+            queryset.values('theme_id', 'theme__theme_name')
+            .annotate(feedback_count=Count('feedback_id'))
+            .order_by('-feedback_count', 'theme__theme_name')
+        )
+        latest = queryset.select_related('theme').annotate(
+            theme_rank=Window(RowNumber(), partition_by=[F('theme_id')], order_by=newest_first)
+        ).filter(theme_rank__lte=limit).order_by('theme_id', *newest_first)
+
+        feedbacks_by_theme = {}
+        for feedback in latest:
+            feedbacks_by_theme.setdefault(feedback.theme_id, []).append(feedback)
+
         result = []
-        for theme in themes:
-            feedbacks = self.get_queryset().filter(theme=theme)
-            feedback_data = self.get_serializer(feedbacks, many=True).data
-            
+        for row in counts:
+            feedbacks = feedbacks_by_theme.get(row['theme_id'], [])
             result.append({
-                'theme_name': theme.theme_name,
-                'feedback_count': theme.feedback_count,
-                'feedbacks': feedback_data
+                'theme_id': row['theme_id'],
+                'theme_name': row['theme__theme_name'],
+                'feedback_count': row['feedback_count'],
+                'feedbacks': self.get_serializer(feedbacks, many=True).data,
+                'next_cursor': encode_cursor(feedbacks[-1]) if row['feedback_count'] > len(feedbacks) else None,
             })
-        
+
         return Response(result)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Recherche plein texte dans les descriptions (?q=, syntaxe websearch), classée par pertinence.
+        Les filtres de la liste (dates, département, sentiment, langue...) s'appliquent ;
+        pagination ?limit=&offset=.
+        """
+        from .pagination import FeedbackSearchPagination
+        from .search import rank_feedbacks
+
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'error': 'Paramètre q requis'}, status=status.HTTP_400_BAD_REQUEST)
+
+        feedbacks = rank_feedbacks(self.filter_queryset(self.get_queryset()), text)
+        paginator = FeedbackSearchPagination()
+        page = paginator.paginate_queryset(feedbacks, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """
+        Tableau de bord par période, département et langue, lu uniquement dans les agrégats journaliers
+        (?date_from=&date_to= au format AAAA-MM-JJ, 30 derniers jours par défaut, ?department_id=&language=)
+        """
+        from django.utils.dateparse import parse_date
+        from .rollups import default_dashboard_period, get_dashboard
+
+        if request.headers.get('X-User-Type') == 'patient':
+            return Response(
+                {'error': 'Tableau de bord réservé aux professionnels'}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        default_from, default_to = default_dashboard_period()
+        period = {}
+        for param, default in (('date_from', default_from), ('date_to', default_to)):
+            value = request.query_params.get(param)
+            period[param] = parse_date(value) if value else default
+            if period[param] is None:
+                return Response(
+                    {'error': f'{param} doit être une date AAAA-MM-JJ'}, status=status.HTTP_400_BAD_REQUEST
+                )
+        if period['date_from'] > period['date_to']:
+            return Response({'error': 'date_from doit précéder date_to'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_dashboard(
+            period['date_from'], period['date_to'],
+            department_id=request.query_params.get('department_id'),
+            language=request.query_params.get('language')
+        ))
+
+    @action(detail=False, methods=['get'])
+    def processing_stats(self, request):
+        """Compare les temps de traitement par mode d'analyse (separate, combined, batch)"""
+        from django.db.models import Avg, Count, Max, Min
+
+        stats = self.get_queryset().filter(
+            is_processed=True, analysis_mode__isnull=False
+        ).values('analysis_mode').annotate(
+            feedback_count=Count('feedback_id'),
+            avg_processing_time=Avg('processing_time_seconds'),
+            min_processing_time=Min('processing_time_seconds'),
+            max_processing_time=Max('processing_time_seconds')
+        ).order_by('analysis_mode')
+
+        return Response(list(stats))
+
+    @action(detail=False, methods=['get'])
+    def processing_metrics(self, request):
+        """p50/p95/p99 par étape du pipeline (attente en file, appels LLM, thème, sauvegarde) et tokens"""
+        from .metrics import get_stage_percentiles
+
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response({'error': 'hours doit être un entier'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_stage_percentiles(hours=max(hours, 1), mode=request.query_params.get('mode')))
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Compteurs du cache des résultats d'analyse (hits, misses, évictions)"""
+        from .analysis_cache import get_cache_stats
+
+        return Response(get_cache_stats())
+
+    @action(detail=False, methods=['get'])
+    def circuit_breaker(self, request):
+        """État du disjoncteur des appels Groq (closed, open, half_open)"""
+        from .circuit_breaker import groq_circuit_breaker
+
+        return Response(groq_circuit_breaker.get_state())
+
+    @action(detail=False, methods=['get'])
+    def theme_index_stats(self, request):
+        """Part des thèmes assignés par l'index local d'embeddings vs par Groq"""
+        from .theme_index import get_theme_index_stats
+
+        return Response(get_theme_index_stats())
+
     @action(detail=False, methods=['post'])
     def test_feedback_processing(self, request):
         """Endpoint de test pour créer un feedback et vérifier le traitement"""
@@ -151,32 +394,97 @@ class FeedbackViewSet(viewsets.ModelViewSet):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='processing_status', url_name='batch-processing-status')
+    def batch_processing_status(self, request):
+        """
+        Statut de traitement de plusieurs feedbacks (bornes après un envoi groupé)
+
+        Corps : {"feedback_ids": [...]}. Une seule requête IN sur la clé primaire ; les
+        identifiants inconnus (ou d'un autre patient) sont renvoyés dans not_found.
+        """
+        feedback_ids = request.data.get('feedback_ids') if isinstance(request.data, dict) else None
+        if not isinstance(feedback_ids, list) or not feedback_ids:
+            return Response(
+                {'error': 'Une liste feedback_ids non vide est attendue'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(feedback_ids) > settings.FEEDBACK_STATUS_BATCH_MAX_IDS:
+            return Response(
+                {'error': f'Maximum {settings.FEEDBACK_STATUS_BATCH_MAX_IDS} feedbacks par requête'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        ids, invalid = [], []
+        for value in feedback_ids:
+            try:
+                ids.append(str(uuid.UUID(str(value))))
+            except ValueError:
+                invalid.append(value)
+        if invalid:
+            return Response(
+                {'error': 'Identifiants invalides (UUID attendus)', 'invalid': invalid},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids = list(dict.fromkeys(ids))
+
+        rows = self.get_queryset().filter(feedback_id__in=ids).values(*STATUS_FIELDS)
+        statuses = {row['feedback_id']: row for row in map(compact_status, rows)}
+        results = [statuses[feedback_id] for feedback_id in ids if feedback_id in statuses]
+        return Response({
+            'processed': sum(1 for result in results if result['is_processed']),
+            'pending': sum(1 for result in results if not result['is_processed']),
+            'results': results,
+            'not_found': [feedback_id for feedback_id in ids if feedback_id not in statuses]
+        })
+
     @action(detail=True, methods=['get'])
     def processing_status(self, request, pk=None):
-        """Vérifie le statut de traitement d'un feedback"""
-        feedback = self.get_object()
-        
-        return Response({
-            'feedback_id': feedback.feedback_id,
-            'is_processed': feedback.is_processed,
-            'processed_at': feedback.processed_at,
-            'sentiment': feedback.sentiment,
+        """
+        Vérifie le statut de traitement d'un feedback
+
+        Lu en une requête (colonnes de la réponse uniquement) ; l'ETag est l'empreinte de cet
+        état (processed_at, étape, résultats) : 304 tant que le traitement n'a pas avancé.
+        """
+        from rest_framework.generics import get_object_or_404
+
+        state = get_object_or_404(
+            self.get_queryset().values(
+                'feedback_id', 'is_processed', 'processed_at', 'processing_stage', 'sentiment',
+                'sentiment_positive_score', 'sentiment_negative_score', 'sentiment_neutral_score',
+                'theme__theme_name', 'description', 'rating'
+            ),
+            pk=pk
+        )
+        etag = make_etag(state, request.headers.get('Accept'))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = Response({
+            'feedback_id': state['feedback_id'],
+            'is_processed': state['is_processed'],
+            'processed_at': state['processed_at'],
+            'sentiment': state['sentiment'],
             'sentiment_scores': {
-                'positive': feedback.sentiment_positive_score,
-                'negative': feedback.sentiment_negative_score,
-                'neutral': feedback.sentiment_neutral_score
+                'positive': state['sentiment_positive_score'],
+                'negative': state['sentiment_negative_score'],
+                'neutral': state['sentiment_neutral_score']
             },
-            'theme': feedback.theme.theme_name if feedback.theme else None,
-            'description': feedback.description,
-            'rating': feedback.rating
+            'theme': state['theme__theme_name'],
+            'description': state['description'],
+            'rating': state['rating']
         })
+        response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    pagination_class = AppointmentCursorPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'type', 'department']
+    sparse_fieldset_actions = ('list', 'retrieve', 'upcoming')
     ordering_fields = ['scheduled_date', 'time']
     ordering = ['scheduled_date', 'time']
     
@@ -194,6 +502,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @conditional(_upcoming_etag)
     def upcoming(self, request):
         """Récupère les rendez-vous à venir"""
         from datetime import date
@@ -201,20 +510,23 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         user_id = request.headers.get('X-User-ID')
         user_type = request.headers.get('X-User-Type')
         
-        queryset = self.get_queryset().filter(
+        queryset = self.filter_queryset(self.get_queryset()).filter(
             scheduled_date__gte=date.today(),
             status__in=['scheduled', 'confirmed']
         )
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class ReminderViewSet(viewsets.ModelViewSet):
+class ReminderViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Reminder.objects.all()
     serializer_class = ReminderSerializer
+    pagination_class = ReminderCursorPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'channel', 'language']
+    sparse_fieldset_actions = ('list', 'retrieve', 'pending')
     ordering_fields = ['scheduled_time']
     ordering = ['scheduled_time']
     
@@ -230,21 +542,23 @@ class ReminderViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @conditional(_pending_reminders_etag)
     def pending(self, request):
         """Récupère les rappels en attente"""
-        queryset = self.get_queryset().filter(status='pending')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset()).filter(status='pending')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class MedicationViewSet(viewsets.ModelViewSet):
+class MedicationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Medication.objects.all()
     serializer_class = MedicationSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'dosage']
 
 
-class PrescriptionViewSet(viewsets.ModelViewSet):
+class PrescriptionViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Prescription.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['appointment_id']
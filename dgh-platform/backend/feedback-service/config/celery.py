@@ -3,7 +3,9 @@ Configuration Celery pour le feedback-service
 """
 import os
 from celery import Celery
+from celery.signals import celeryd_init
 from django.conf import settings
+from kombu import Queue
 
 # Définit le module de settings Django par défaut pour Celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.base')
@@ -23,8 +25,29 @@ app.conf.update(
     task_always_eager=False,
     task_eager_propagates=True,
     
-    # Routing - utiliser la queue par défaut
-    task_routes={},
+    # Routing : l'analyse LLM (lente, liée à Groq) ne bloque plus les autres tâches.
+    # Chaque tâche est routée par son nom exact ; 'reminders' reçoit les tâches d'envoi
+    # de rappels (à y router par nom, aucune n'existe encore dans ce service)
+    task_queues=(
+        Queue('llm_analysis'),
+        Queue('reminders'),
+        Queue('maintenance'),
+    ),
+    task_default_queue='maintenance',
+    task_routes={
+        'apps.feedback.tasks.process_feedback_async': {'queue': 'llm_analysis'},
+        'apps.feedback.tasks.process_feedback_batch_async': {'queue': 'llm_analysis'},
+        'apps.feedback.tasks.drain_unprocessed_feedbacks': {'queue': 'llm_analysis'},
+        'apps.feedback.tasks.relay_feedback_outbox': {'queue': 'maintenance'},
+        'apps.feedback.tasks.purge_processing_metrics': {'queue': 'maintenance'},
+    },
+    
+    # Priorités avec Redis : une sous-file par niveau, 0 = la plus haute
+    broker_transport_options={
+        'queue_order_strategy': 'priority',
+        'priority_steps': list(range(10)),
+        'sep': ':',
+    },
     
     # Monitoring
     worker_send_task_events=True,
@@ -35,6 +58,27 @@ app.conf.update(
     task_time_limit=180,       # 3 minutes
 )
 
+
+@celeryd_init.connect
+def configure_worker_for_queues(sender=None, conf=None, options=None, **kwargs):
+    """
+    Applique au worker le profil (prefetch, concurrence) des files qu'il consomme (-Q)
+    
+    Un worker LLM ne réserve qu'une tâche à la fois ; la concurrence passée
+    en ligne de commande (--concurrency) reste prioritaire.
+    """
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    profiles = [settings.WORKER_QUEUE_PROFILES[queue] for queue in queues if queue in settings.WORKER_QUEUE_PROFILES]
+    if not profiles:
+        return
+    
+    conf.worker_prefetch_multiplier = min(profile['prefetch_multiplier'] for profile in profiles)
+    if not options.get('concurrency'):
+        conf.worker_concurrency = max(profile['concurrency'] for profile in profiles)
+
+
 @app.task(bind=True)
 def debug_task(self):
     """Tâche de debug pour tester Celery"""
@@ -44,6 +44,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -82,6 +83,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Pagination par curseur des listes (voir apps/feedback/pagination.py), ?page_size= jusqu'à API_MAX_PAGE_SIZE
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=20, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -130,12 +135,154 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Douala'
 CELERY_ENABLE_UTC = True
 
+# Priorités des tâches (broker Redis : 0 = la plus haute) : les feedbacks notés
+# FEEDBACK_URGENT_MAX_RATING étoiles ou moins passent devant les autres dans la file LLM
+FEEDBACK_URGENT_MAX_RATING = config('FEEDBACK_URGENT_MAX_RATING', default=2, cast=int)
+FEEDBACK_URGENT_PRIORITY = 0
+FEEDBACK_DEFAULT_PRIORITY = 5
+CELERY_TASK_DEFAULT_PRIORITY = FEEDBACK_DEFAULT_PRIORITY
+
+# Profil des workers par file (appliqué selon les files passées avec -Q, voir config/celery.py)
+WORKER_QUEUE_PROFILES = {
+    'llm_analysis': {
+        'concurrency': config('CELERY_LLM_CONCURRENCY', default=4, cast=int),
+        'prefetch_multiplier': config('CELERY_LLM_PREFETCH_MULTIPLIER', default=1, cast=int),
+    },
+    'reminders': {
+        'concurrency': config('CELERY_REMINDERS_CONCURRENCY', default=2, cast=int),
+        'prefetch_multiplier': config('CELERY_REMINDERS_PREFETCH_MULTIPLIER', default=4, cast=int),
+    },
+    'maintenance': {
+        'concurrency': config('CELERY_MAINTENANCE_CONCURRENCY', default=1, cast=int),
+        'prefetch_multiplier': config('CELERY_MAINTENANCE_PREFETCH_MULTIPLIER', default=1, cast=int),
+    },
+}
+
 TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', '')
 TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', '')
 
 # Configuration Groq API pour analyse de sentiment
 GROQ_API_KEY = config('GROQ_API_KEY', default=None)
+GROQ_BASE_URL = config('GROQ_BASE_URL', default='')  # Vide = API Groq officielle
+GROQ_TIMEOUT_SECONDS = config('GROQ_TIMEOUT_SECONDS', default=30, cast=float)
+
+# Quotas Groq partagés entre tous les workers (seaux à jetons Redis) et reprises
+GROQ_RPM_LIMIT = config('GROQ_RPM_LIMIT', default=30, cast=int)
+GROQ_TPM_LIMIT = config('GROQ_TPM_LIMIT', default=6000, cast=int)
+GROQ_RATE_LIMIT_MAX_WAIT_SECONDS = config('GROQ_RATE_LIMIT_MAX_WAIT_SECONDS', default=30, cast=float)
+# Appels Groq simultanés, tous workers et processus confondus (baux Redis)
+GROQ_MAX_CONCURRENCY = config('GROQ_MAX_CONCURRENCY', default=4, cast=int)
+GROQ_MAX_RETRIES = config('GROQ_MAX_RETRIES', default=3, cast=int)
+GROQ_RETRY_BASE_DELAY_SECONDS = config('GROQ_RETRY_BASE_DELAY_SECONDS', default=1.0, cast=float)
+
+# Disjoncteur Groq partagé (Redis) : ouvert après GROQ_CIRCUIT_FAILURE_THRESHOLD échecs consécutifs
+# ou si le p95 des GROQ_CIRCUIT_LATENCY_WINDOW dernières latences dépasse GROQ_CIRCUIT_LATENCY_P95_SECONDS,
+# puis semi-ouvert après GROQ_CIRCUIT_OPEN_SECONDS avec GROQ_CIRCUIT_HALF_OPEN_PROBES requêtes sondes
+GROQ_CIRCUIT_BREAKER_ENABLED = config('GROQ_CIRCUIT_BREAKER_ENABLED', default=True, cast=bool)
+GROQ_CIRCUIT_FAILURE_THRESHOLD = config('GROQ_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+GROQ_CIRCUIT_LATENCY_P95_SECONDS = config('GROQ_CIRCUIT_LATENCY_P95_SECONDS', default=10.0, cast=float)
+GROQ_CIRCUIT_LATENCY_WINDOW = config('GROQ_CIRCUIT_LATENCY_WINDOW', default=50, cast=int)
+GROQ_CIRCUIT_MIN_SAMPLES = config('GROQ_CIRCUIT_MIN_SAMPLES', default=20, cast=int)
+GROQ_CIRCUIT_OPEN_SECONDS = config('GROQ_CIRCUIT_OPEN_SECONDS', default=30, cast=int)
+GROQ_CIRCUIT_HALF_OPEN_PROBES = config('GROQ_CIRCUIT_HALF_OPEN_PROBES', default=2, cast=int)
+
+# Backend de sentiment : 'groq' (API), 'local' (modèle genie10/feedback_patients sur CPU)
+# ou 'keyword' (mots-clés). Le backend local requiert transformers + torch (ou onnxruntime)
+SENTIMENT_BACKEND = config('SENTIMENT_BACKEND', default='groq')
+LOCAL_SENTIMENT_ONNX_PATH = config('LOCAL_SENTIMENT_ONNX_PATH', default='')  # Dossier d'un export ONNX (model.onnx + tokenizer)
+LOCAL_SENTIMENT_NUM_THREADS = config('LOCAL_SENTIMENT_NUM_THREADS', default=1, cast=int)
+LOCAL_SENTIMENT_MAX_LENGTH = config('LOCAL_SENTIMENT_MAX_LENGTH', default=256, cast=int)
+
+# Dossier optionnel de lexiques additionnels <langue>.json pour le fallback par mots-clés
+FEEDBACK_LEXICON_DIR = config('FEEDBACK_LEXICON_DIR', default='')
+
+# Mode d'analyse : 'separate' (sentiment puis thème, deux appels Groq)
+# ou 'combined' (sentiment + thème en une seule requête structurée)
+FEEDBACK_ANALYSIS_MODE = config('FEEDBACK_ANALYSIS_MODE', default='separate')
+
+# Cache des résultats d'analyse (Redis via CACHES), clé = hash texte normalisé + langue + version prompt/modèle
+FEEDBACK_ANALYSIS_CACHE_ENABLED = config('FEEDBACK_ANALYSIS_CACHE_ENABLED', default=True, cast=bool)
+FEEDBACK_ANALYSIS_CACHE_TTL = config('FEEDBACK_ANALYSIS_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+FEEDBACK_ANALYSIS_CACHE_MAX_ENTRIES = config('FEEDBACK_ANALYSIS_CACHE_MAX_ENTRIES', default=10000, cast=int)
+
+# Catalogue des thèmes (mémoire du processus + Redis, invalidé par signaux) :
+# seuls les THEME_PROMPT_TOP_K thèmes les plus proches du feedback sont envoyés au prompt
+THEME_PROMPT_TOP_K = config('THEME_PROMPT_TOP_K', default=12, cast=int)
+THEME_CATALOG_CACHE_TTL = config('THEME_CATALOG_CACHE_TTL', default=3600, cast=int)
+THEME_CATALOG_LOCAL_TTL = config('THEME_CATALOG_LOCAL_TTL', default=30, cast=int)
+
+# Index local des thèmes par embeddings : thème assigné sans Groq si la similarité cosinus
+# dépasse THEME_MATCH_THRESHOLD avec un écart THEME_MATCH_MARGIN sur le deuxième thème
+# (centroïdes par thème et sentiment : seuls ceux du sentiment du feedback sont comparés).
+# Nécessite un modèle sentence-transformers (THEME_EMBEDDING_MODEL) : sans modèle, ou si la
+# dépendance manque, l'index reste inactif et chaque feedback passe par Groq
+THEME_EMBEDDING_MODEL = config('THEME_EMBEDDING_MODEL', default='')
+THEME_INDEX_ENABLED = config('THEME_INDEX_ENABLED', default=bool(THEME_EMBEDDING_MODEL), cast=bool)
+THEME_MATCH_THRESHOLD = config('THEME_MATCH_THRESHOLD', default=0.6, cast=float)
+THEME_MATCH_MARGIN = config('THEME_MATCH_MARGIN', default=0.05, cast=float)
+THEME_INDEX_MIN_SAMPLES = config('THEME_INDEX_MIN_SAMPLES', default=5, cast=int)
+THEME_INDEX_REFRESH_SECONDS = config('THEME_INDEX_REFRESH_SECONDS', default=60, cast=int)
+
+# Micro-batching de l'analyse : les feedbacks sont regroupés par lots de
+# FEEDBACK_BATCH_SIZE, un lot incomplet part après FEEDBACK_BATCH_MAX_WAIT_SECONDS
+FEEDBACK_MICRO_BATCHING = config('FEEDBACK_MICRO_BATCHING', default=False, cast=bool)
+FEEDBACK_BATCH_SIZE = config('FEEDBACK_BATCH_SIZE', default=10, cast=int)
+FEEDBACK_BATCH_MAX_WAIT_SECONDS = config('FEEDBACK_BATCH_MAX_WAIT_SECONDS', default=30, cast=int)
+FEEDBACK_BATCH_MAX_PER_RUN = config('FEEDBACK_BATCH_MAX_PER_RUN', default=20, cast=int)
+# Au-delà de ce nombre de traitements en échec, un feedback n'est plus repris par le drainage
+FEEDBACK_MAX_PROCESSING_ATTEMPTS = config('FEEDBACK_MAX_PROCESSING_ATTEMPTS', default=5, cast=int)
+
+# Import groupé (bornes hors ligne) : nombre maximal de feedbacks par requête, taille des lots d'insertion
+FEEDBACK_BULK_MAX_ITEMS = config('FEEDBACK_BULK_MAX_ITEMS', default=500, cast=int)
+FEEDBACK_BULK_CHUNK_SIZE = config('FEEDBACK_BULK_CHUNK_SIZE', default=100, cast=int)
+# Statut groupé (processing_status en POST) : nombre maximal d'identifiants par requête
+FEEDBACK_STATUS_BATCH_MAX_IDS = config('FEEDBACK_STATUS_BATCH_MAX_IDS', default=500, cast=int)
+
+# Regroupement par thème : nombre de feedbacks récents renvoyés par thème (?limit=), et plafond
+FEEDBACK_BY_THEME_LIMIT = config('FEEDBACK_BY_THEME_LIMIT', default=5, cast=int)
+FEEDBACK_BY_THEME_MAX_LIMIT = config('FEEDBACK_BY_THEME_MAX_LIMIT', default=50, cast=int)
+
+# Notifications SSE de fin de traitement (GET /api/v1/feedbacks/events/, servi en ASGI) : battement
+# de cœur, durée maximale d'un flux (le client se reconnecte avec Last-Event-ID), délai de reconnexion
+# conseillé, intervalle du repli par polling de la base quand Redis est indisponible et fenêtre
+# relue à chaque polling (processed_at est fixé avant le commit du traitement)
+FEEDBACK_EVENTS_HEARTBEAT_SECONDS = config('FEEDBACK_EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+FEEDBACK_EVENTS_MAX_STREAM_SECONDS = config('FEEDBACK_EVENTS_MAX_STREAM_SECONDS', default=300, cast=int)
+FEEDBACK_EVENTS_RETRY_MS = config('FEEDBACK_EVENTS_RETRY_MS', default=3000, cast=int)
+FEEDBACK_EVENTS_POLL_SECONDS = config('FEEDBACK_EVENTS_POLL_SECONDS', default=5, cast=int)
+FEEDBACK_EVENTS_COMMIT_LAG_SECONDS = config('FEEDBACK_EVENTS_COMMIT_LAG_SECONDS', default=30, cast=int)
+FEEDBACK_EVENTS_MAX_FEEDBACK_IDS = config('FEEDBACK_EVENTS_MAX_FEEDBACK_IDS', default=100, cast=int)
+
+# Verrou Redis par feedback : deux tâches ne traitent jamais le même feedback en parallèle
+FEEDBACK_PROCESSING_LOCK_TIMEOUT = config('FEEDBACK_PROCESSING_LOCK_TIMEOUT', default=300, cast=int)
+
+# Métriques par étape du pipeline d'analyse (table feedback_processing_metrics)
+FEEDBACK_METRICS_ENABLED = config('FEEDBACK_METRICS_ENABLED', default=True, cast=bool)
+FEEDBACK_METRICS_RETENTION_DAYS = config('FEEDBACK_METRICS_RETENTION_DAYS', default=30, cast=int)
+
+# Outbox transactionnelle : publication vers Celery après commit, rattrapage périodique
+# des entrées non publiées (broker indisponible) plus anciennes que OUTBOX_SWEEP_MIN_AGE_SECONDS
+OUTBOX_RELAY_LIMIT = config('OUTBOX_RELAY_LIMIT', default=500, cast=int)
+OUTBOX_SWEEP_INTERVAL_SECONDS = config('OUTBOX_SWEEP_INTERVAL_SECONDS', default=30, cast=int)
+OUTBOX_SWEEP_MIN_AGE_SECONDS = config('OUTBOX_SWEEP_MIN_AGE_SECONDS', default=60, cast=int)
+OUTBOX_RETENTION_HOURS = config('OUTBOX_RETENTION_HOURS', default=24, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'relay-feedback-outbox': {
+        'task': 'apps.feedback.tasks.relay_feedback_outbox',
+        'schedule': OUTBOX_SWEEP_INTERVAL_SECONDS,
+    },
+    'purge-processing-metrics': {
+        'task': 'apps.feedback.tasks.purge_processing_metrics',
+        'schedule': 24 * 3600,
+    },
+}
+if FEEDBACK_MICRO_BATCHING:
+    CELERY_BEAT_SCHEDULE['drain-unprocessed-feedbacks'] = {
+        'task': 'apps.feedback.tasks.drain_unprocessed_feedbacks',
+        'schedule': max(FEEDBACK_BATCH_MAX_WAIT_SECONDS // 2, 5),
+    }
 
 TEMPLATES = [
     {